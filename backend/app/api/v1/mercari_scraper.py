@@ -0,0 +1,193 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+from datetime import datetime
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+import uuid
+
+from app.core.config import settings
+from app.db.mongodb import MongoDB
+from app.services.browser_pool import BrowserPool
+from app.services.mercari_saver import FixedMercariScraper
+from app.services.product_parser import init_parse_worker, warm_parse_worker
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# One warm Chromium shared by every API-triggered scrape; started with the app
+browser_pool = BrowserPool.from_settings(settings)
+# Parse worker processes shared by every job; started with the app
+parse_pool: Optional[ProcessPoolExecutor] = None
+
+# Finished jobs kept for status lookups
+MAX_FINISHED_JOBS = 50
+
+
+@dataclass
+class ScrapeJob:
+    """An API-triggered scrape run and its outcome"""
+    id: str
+    limit: int
+    fetch_mode: str
+    entry_points: Optional[List[str]] = None
+    status: str = 'queued'
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    # Time from job start until the scraper had its pages (lease vs. launch)
+    startup_ms: Optional[float] = None
+    stats: Optional[dict] = None
+    rate_limiter: Optional[dict] = None
+    error: Optional[str] = None
+
+
+class ScrapeRequest(BaseModel):
+    limit: int = Field(35, ge=1, le=1000)
+    fetch_mode: Optional[str] = None
+    entry_points: Optional[List[str]] = None
+
+
+jobs: Dict[str, ScrapeJob] = {}
+job_tasks = set()
+
+
+async def start_browser_pool():
+    """Warm the browser pool; the API keeps serving if Chromium cannot start"""
+    if not browser_pool.enabled:
+        return
+    try:
+        await browser_pool.start()
+        logger.info(
+            f"Browser pool ready: {browser_pool.size} warm contexts in {browser_pool.startup_seconds:.2f}s"
+        )
+    except Exception as e:
+        logger.error(f"Could not start browser pool: {e}")
+
+
+async def stop_browser_pool():
+    await browser_pool.close()
+    logger.info("Browser pool closed")
+
+
+async def cancel_jobs():
+    """Cancel running scrape jobs and wait until they have returned their pages"""
+    tasks = list(job_tasks)
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+        logger.info(f"Cancelled {len(tasks)} scrape job(s)")
+
+
+async def start_parse_pool():
+    """Start the parse workers now so a job never waits for them.
+
+    Workers are spawned rather than forked, since the server process
+    already runs threads (Motor, the event loop's executor).
+    """
+    global parse_pool
+    workers = settings.SCRAPER_PARSE_WORKERS or os.cpu_count() or 1
+    parse_pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_parse_worker,
+        initargs=(settings.SCRAPER_HTML_PARSER,),
+    )
+    loop = asyncio.get_running_loop()
+    try:
+        await asyncio.gather(*(loop.run_in_executor(parse_pool, warm_parse_worker) for _ in range(workers)))
+        logger.info(f"Parse pool ready: {workers} processes")
+    except Exception as e:
+        # Jobs fall back to a pool of their own
+        logger.error(f"Could not start parse pool: {e}")
+        await stop_parse_pool()
+
+
+async def stop_parse_pool():
+    global parse_pool
+    if parse_pool is not None:
+        pool, parse_pool = parse_pool, None
+        await asyncio.get_running_loop().run_in_executor(None, pool.shutdown)
+        logger.info("Parse pool closed")
+
+
+async def run_job(job: ScrapeJob):
+    job.status = 'running'
+    job.started_at = datetime.utcnow()
+    scraper = FixedMercariScraper(
+        MongoDB.client,
+        fetch_mode=job.fetch_mode,
+        browser_pool=browser_pool if browser_pool.enabled else None,
+        parse_pool=parse_pool,
+    )
+    try:
+        start = time.monotonic()
+        await scraper.start_browser()
+        job.startup_ms = round((time.monotonic() - start) * 1000, 2)
+        await scraper.ensure_indexes()
+        stats = await scraper.scrape_products(job.limit, job.fetch_mode, job.entry_points)
+        job.stats = asdict(stats)
+        job.rate_limiter = scraper.rate_limiter.metrics()
+        job.status = 'completed'
+    except asyncio.CancelledError:
+        job.status = 'cancelled'
+        raise
+    except Exception as e:
+        logger.error(f"Scrape job {job.id} failed: {e}")
+        job.status = 'failed'
+        job.error = str(e)
+    finally:
+        job.finished_at = datetime.utcnow()
+        await scraper.close_browser()
+        prune_jobs()
+
+
+def prune_jobs():
+    finished = [job for job in jobs.values() if job.finished_at is not None]
+    for job in sorted(finished, key=lambda job: job.finished_at)[:-MAX_FINISHED_JOBS]:
+        del jobs[job.id]
+
+
+@router.post("/scrape", status_code=202)
+async def start_scrape(request: ScrapeRequest):
+    """Start a scrape job on pages leased from the warm browser pool (when enabled)"""
+    if MongoDB.client is None:
+        raise HTTPException(status_code=503, detail="Database is not connected")
+    fetch_mode = request.fetch_mode or settings.SCRAPER_FETCH_MODE
+    if fetch_mode not in FixedMercariScraper.FETCH_MODES:
+        raise HTTPException(status_code=400, detail=f"fetch_mode must be one of {FixedMercariScraper.FETCH_MODES}")
+    # Jobs share the site's request budget, so only one runs at a time
+    if any(job.status in ('queued', 'running') for job in jobs.values()):
+        raise HTTPException(status_code=409, detail="A scrape job is already running")
+
+    job = ScrapeJob(
+        id=uuid.uuid4().hex,
+        limit=request.limit,
+        fetch_mode=fetch_mode,
+        entry_points=request.entry_points,
+    )
+    jobs[job.id] = job
+    task = asyncio.create_task(run_job(job))
+    job_tasks.add(task)
+    task.add_done_callback(job_tasks.discard)
+    return asdict(job)
+
+
+@router.get("/scrape/{job_id}")
+async def get_scrape_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Scrape job not found")
+    return asdict(job)
+
+
+@router.get("/pool")
+async def get_browser_pool():
+    """Warm/cold lease counts and latencies, pool occupancy and memory"""
+    return browser_pool.metrics()
@@ -1,20 +1,26 @@
-from fastapi import APIRouter, HTTPException, Response
-from motor.motor_asyncio import AsyncIOMotorClient
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional, Tuple
 from datetime import datetime
 from pydantic import BaseModel
+from bson import json_util
+import base64
+import binascii
 import logging
-import csv
-import io
+from app.db.mongodb import MongoDB
+from app.services.product_export import (
+    COLUMNAR_BATCH_SIZE, COLUMNAR_FORMATS, EXPORT_BATCH_SIZE, EXPORT_FORMATS, EXPORT_PROJECTION, export_chunks,
+    gzip_chunks, load_pyarrow,
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# MongoDB connection settings
-MONGODB_URL = "mongodb://localhost:27017"
-DB_NAME = "mercari_search"
 COLLECTION_NAME = "products"
 
+# Response header carrying the cursor for the next page of GET /products
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 class ProductResponse(BaseModel):
     id: str
     name: str
@@ -36,14 +42,12 @@ class ProductSearch(BaseModel):
     max_price: Optional[int] = None
 
 async def get_database():
-    """Get database connection"""
-    try:
-        client = AsyncIOMotorClient(MONGODB_URL)
-        db = client[DB_NAME]
-        return client, db
-    except Exception as e:
-        logger.error(f"Failed to connect to MongoDB: {str(e)}")
-        raise HTTPException(status_code=500, detail="Database connection failed")
+    """Dependency returning the application-wide database (pooled client)"""
+    db = MongoDB.get_database()
+    if db is None:
+        logger.error("MongoDB is not connected")
+        raise HTTPException(status_code=503, detail="Database connection failed")
+    return db
 
 def get_sort_query(sort_by: str):
     """Get MongoDB sort query based on sort parameter"""
@@ -58,45 +62,119 @@ def get_sort_query(sort_by: str):
     }
     return sort_mapping.get(sort_by, [('created_at', -1)])
 
+def price_range(min_price: Optional[int], max_price: Optional[int]) -> dict:
+    """Price bounds as a MongoDB condition (empty when unbounded)"""
+    condition = {}
+    if min_price is not None:
+        condition['$gte'] = min_price
+    if max_price is not None:
+        condition['$lte'] = max_price
+    return condition
+
+def build_product_filter(category: Optional[str], min_price: Optional[int], max_price: Optional[int]) -> dict:
+    """Filter used by the product list and export endpoints"""
+    filter_query = {}
+    if category and category != 'all':
+        filter_query['category'] = {'$regex': category, '$options': 'i'}
+    if min_price is not None or max_price is not None:
+        filter_query['price'] = price_range(min_price, max_price)
+    return filter_query
+
+def build_search_filter(search: ProductSearch) -> dict:
+    """Filter used by the search endpoint"""
+    filter_query = {}
+    if search.keyword:
+        filter_query['name'] = {'$regex': search.keyword, '$options' : 'i'}
+    if search.category:
+        filter_query['category'] = {'$regex': search.category, '$options': 'i'}
+    if search.min_price is not None or search.max_price is not None:
+        filter_query['price'] = price_range(search.min_price, search.max_price)
+    return filter_query
+
+def get_keyset_sort(sort_by: str) -> List[Tuple[str, int]]:
+    """Sort query with _id as a tiebreaker, so every product has a unique position"""
+    sort_query = get_sort_query(sort_by)
+    return sort_query + [('_id', sort_query[0][1])]
+
+def encode_cursor(sort_query: List[Tuple[str, int]], product: dict) -> str:
+    """Opaque token for the position just after product"""
+    field, direction = sort_query[0]
+    payload = {'k': field, 'd': direction, 'v': product.get(field), 'id': product['_id']}
+    return base64.urlsafe_b64encode(json_util.dumps(payload).encode('utf-8')).decode('ascii')
+
+def decode_cursor(token: str, sort_query: List[Tuple[str, int]]) -> dict:
+    """Keyset filter for the page after a cursor issued for the same sort"""
+    field, direction = sort_query[0]
+    try:
+        payload = json_util.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        value, last_id = payload['v'], payload['id']
+        valid = payload['k'] == field and payload['d'] == direction
+    except (ValueError, TypeError, KeyError, binascii.Error):
+        valid = False
+    if not valid:
+        raise HTTPException(status_code=400, detail="Invalid cursor for this sort order")
+    return keyset_filter(field, direction, value, last_id)
+
+def keyset_filter(field: str, direction: int, value, last_id) -> dict:
+    """Products strictly after (value, last_id) in (field, _id) order.
+
+    Missing and null values sort before every other value, so they come
+    first in ascending order and last in descending order.
+    """
+    op = '$gt' if direction > 0 else '$lt'
+    if value is None:
+        branches = [{field: None, '_id': {op: last_id}}]
+        if direction > 0:
+            branches.append({field: {'$ne': None}})
+    else:
+        branches = [{field: {op: value}}, {field: value, '_id': {op: last_id}}]
+        if direction < 0:
+            branches.append({field: None})
+    return {'$or': branches}
+
 @router.get("/", response_model=List[ProductResponse])
 async def get_products(
+    response: Response,
     skip: int = 0,
     category: Optional[str] = None,
     min_price: Optional[int] = None,
     max_price: Optional[int] = None,
     sort_by: str = 'created_desc',
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    db=Depends(get_database),
 ):
-    """Get products from MongoDB with optional filters and sorting"""
+    """Get products from MongoDB with optional filters and sorting.
+
+    Pages are keyset-based: when more products follow, the X-Next-Cursor
+    header holds a cursor to pass back for the next page, which costs the
+    same however deep it is. skip still works when no cursor is given.
+    """
     logger.info("Fetching products from MongoDB...")
+    sort_query = get_keyset_sort(sort_by)
+    after = decode_cursor(cursor, sort_query) if cursor else None
     try:
-        client, db = await get_database()
         collection = db[COLLECTION_NAME]
 
         # Build filter
-        filter_query = {}
-        if category and category != 'all':
-            filter_query['category'] = {'$regex': category, '$options': 'i'}
-        if min_price is not None or max_price is not None:
-            filter_query['price'] = {}
-            if min_price is not None:
-                filter_query['price']['$gte'] = min_price
-            if max_price is not None:
-                filter_query['price']['$lte'] = max_price
+        filter_query = build_product_filter(category, min_price, max_price)
 
         logger.info(f"Using filter query: {filter_query}")
 
-        # Get sort query
-        sort_query = get_sort_query(sort_by)
         logger.info(f"Using sort query: {sort_query}")
 
-        # Get products with limit and sort
-        cursor = collection.find(filter_query).sort(sort_query).skip(skip)
-        products = await cursor.to_list(length=100)  # Limit to 100 results
+        # Get one product past the limit to know whether another page follows
+        if after is not None:
+            query = collection.find({'$and': [filter_query, after]} if filter_query else after)
+        else:
+            query = collection.find(filter_query).skip(skip)
+        products = await query.sort(sort_query).limit(limit + 1).to_list(length=limit + 1)
+        if len(products) > limit:
+            products = products[:limit]
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(sort_query, products[-1])
         
         logger.info(f"Found {len(products)} products")
 
-        # Close MongoDB connection
-        client.close()
 
         if not products:
             return []
@@ -113,95 +191,61 @@ async def export_products(
     min_price: Optional[int] = None,
     max_price: Optional[int] = None,
     sort_by: str = 'created_desc',
+    export_format: Literal['csv', 'ndjson', 'parquet', 'arrow'] = Query('csv', alias='format'),
+    gzip: bool = False,
+    db=Depends(get_database),
 ):
+    """Stream products as CSV, NDJSON, Parquet or an Arrow IPC stream.
+
+    Parquet and Arrow are encoded from record batches of the cursor.
+    gzip compresses the CSV, NDJSON and Arrow streams on the fly; Parquet
+    is already zstd-compressed per column, so gzip is ignored for it.
+    """
+    if export_format in COLUMNAR_FORMATS:
+        try:
+            load_pyarrow()
+        except ImportError:
+            raise HTTPException(status_code=501, detail=f"{export_format} export needs pyarrow installed")
     try:
-        client, db = await get_database()
         collection = db[COLLECTION_NAME]
 
         # Build filters
-        filter_query = {}
-        if category and category != 'all':
-            filter_query['category'] = {'$regex': category, '$options': 'i'}
-        if min_price is not None or max_price is not None:
-            filter_query['price'] = {}
-            if min_price is not None:
-                filter_query['price']['$gte'] = min_price
-            if max_price is not None:
-                filter_query['price']['$lte'] = max_price
+        filter_query = build_product_filter(category, min_price, max_price)
 
         # Get sorting
         sort_query = get_sort_query(sort_by)
 
-        # Query MongoDB
-        cursor = collection.find(filter_query).sort(sort_query)
-        products = await cursor.to_list(length=None)
-
-        # Write CSV to StringIO
-        string_io = io.StringIO()
-        writer = csv.writer(string_io)
-        writer.writerow([
-            'ID', 'Name', 'Price', 'Category', 'Condition',
-            'Seller', 'Product URL', 'Image URL', 'Description',
-            'Created At', 'Updated At'
-        ])
-        for product in products:
-            writer.writerow([
-                product.get('id', ''),
-                product.get('name', ''),
-                product.get('price', 0),
-                product.get('category', ''),
-                product.get('condition', ''),
-                product.get('seller_name', ''),
-                product.get('url', ''),
-                product.get('image_url', ''),
-                product.get('description', ''),
-                product.get('created_at', '').isoformat() if product.get('created_at') else '',
-                product.get('updated_at', '').isoformat() if product.get('updated_at') else ''
-            ])
-
-        # Add UTF-8 BOM and encode
-        bom = '\ufeff'  # UTF-8 BOM
-        encoded_csv = (bom + string_io.getvalue()).encode('utf-8')
-
-        return Response(
-            content=encoded_csv,
-            media_type='text/csv',
-            headers={
-                'Content-Disposition': f'attachment; filename=products_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-            }
-        )
+        # Query MongoDB for the exported columns only
+        batch_size = COLUMNAR_BATCH_SIZE if export_format in COLUMNAR_FORMATS else EXPORT_BATCH_SIZE
+        cursor = collection.find(filter_query, EXPORT_PROJECTION).sort(sort_query).batch_size(batch_size)
+
+        media_type, extension = EXPORT_FORMATS[export_format]
+        headers = {
+            'Content-Disposition': f'attachment; filename=products_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}'
+        }
+        chunks = export_chunks(cursor, export_format)
+        if gzip and export_format != 'parquet':
+            chunks = gzip_chunks(chunks)
+            headers['Content-Encoding'] = 'gzip'
+        return StreamingResponse(chunks, media_type=media_type, headers=headers)
 
     except Exception as e:
         logger.error(f"Error exporting products: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-
 @router.post("/search", response_model=List[ProductResponse])
-async def search_products(search: ProductSearch):
+async def search_products(search: ProductSearch, db=Depends(get_database)):
     """Search products with JSON filters"""
     try:
-        client, db = await get_database()
         collection = db[COLLECTION_NAME]
 
         # Build filter
-        filter_query = {}
-        if search.keyword:
-            filter_query['name'] = {'$regex': search.keyword, '$options' : 'i'}
-        if search.category:
-            filter_query['category'] = {'$regex': search.category, '$options': 'i'}
-        if search.min_price is not None or search.max_price is not None:
-            filter_query['price'] = {}
-            if search.min_price is not None:
-                filter_query['price']['$gte'] = search.min_price
-            if search.max_price is not None:
-                filter_query['price']['$lte'] = search.max_price
+        filter_query = build_search_filter(search)
 
         # Get products
         cursor = collection.find(filter_query)
         products = await cursor.to_list(length=100)  # Limit to 100 results
 
-        # Close MongoDB connection
-        client.close()
 
         if not products:
             return []
@@ -212,18 +256,20 @@ async def search_products(search: ProductSearch):
         logger.error(f"Error searching products: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/db-pool")
+async def get_db_pool_metrics():
+    """Checkout counts, wait latency and open connections of the shared MongoDB pool"""
+    return MongoDB.get_pool_metrics()
+
 @router.get("/{product_id}", response_model=ProductResponse)
-async def get_product(product_id: str):
+async def get_product(product_id: str, db=Depends(get_database)):
     """Get a single product by ID"""
     try:
-        client, db = await get_database()
         collection = db[COLLECTION_NAME]
 
         # Get product
         product = await collection.find_one({'id': product_id})
         
-        # Close MongoDB connection
-        client.close()
 
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
@@ -13,6 +13,14 @@ class Settings(BaseSettings):
     # MongoDB Settings
     MONGODB_URL: str = "mongodb://localhost:27017"
     MONGODB_DB_NAME: str = "mercari_search"
+    # One client per process (app.db.mongodb.MongoDB); pool sizes and timeouts
+    MONGODB_MAX_POOL_SIZE: int = 100
+    MONGODB_MIN_POOL_SIZE: int = 5
+    MONGODB_MAX_IDLE_TIME_MS: int = 300000
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int = 5000
+    MONGODB_CONNECT_TIMEOUT_MS: int = 5000
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGODB_SOCKET_TIMEOUT_MS: int = 30000
 
     # CORS Settings
     BACKEND_CORS_ORIGINS: List[str] = [
@@ -32,6 +40,122 @@ class Settings(BaseSettings):
 
     # Scraper Settings
     SCRAPER_USER_AGENT: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+    SCRAPER_CONCURRENCY: int = 4  # Number of browser pages used for detail extraction
+    # Ranking/search pages to discover products from, relative to the Mercari
+    # base URL, and how many browser pages read them concurrently
+    SCRAPER_ENTRY_POINTS: List[str] = ["/ranking"]
+    SCRAPER_COLLECTOR_CONCURRENCY: int = 2
+    # Shared request budget for listing and product page fetches; 0 disables it.
+    # The rate starts at SCRAPER_RATE_PER_SECOND and adapts (AIMD) within the
+    # min/max bounds: +INCREASE_STEP after clean responses faster than SLOW_MS,
+    # x DECREASE_FACTOR on timeouts, 429/503s or validation failure spikes
+    SCRAPER_RATE_PER_SECOND: float = 5.0
+    SCRAPER_RATE_BURST: int = 5
+    SCRAPER_RATE_MIN_PER_SECOND: float = 0.5
+    SCRAPER_RATE_MAX_PER_SECOND: float = 20.0
+    SCRAPER_RATE_INCREASE_STEP: float = 0.25
+    SCRAPER_RATE_DECREASE_FACTOR: float = 0.5
+    SCRAPER_RATE_SLOW_MS: float = 5000
+    # Navigation retries: timeouts, network errors, 429s and 5xx are retried up
+    # to MAX_ATTEMPTS with exponential backoff and full jitter, drawing on a
+    # per-run BUDGET; failed product URLs are re-queued up to URL_RETRIES times
+    SCRAPER_RETRY_MAX_ATTEMPTS: int = 3
+    SCRAPER_RETRY_BASE_DELAY_MS: int = 1000
+    SCRAPER_RETRY_MAX_DELAY_MS: int = 30000
+    SCRAPER_RETRY_BUDGET: int = 100
+    SCRAPER_URL_RETRIES: int = 1
+    # Browser recycling: a worker's context is replaced after RECYCLE_NAVIGATIONS
+    # navigations, or (after at least RECYCLE_MIN_NAVIGATIONS) once RSS of the
+    # scraper plus Chromium exceeds RECYCLE_RSS_MB, sampled every
+    # MEMORY_CHECK_SECONDS; keep RECYCLE_RSS_MB below pm2's max_memory_restart
+    SCRAPER_RECYCLE_NAVIGATIONS: int = 200
+    SCRAPER_RECYCLE_RSS_MB: int = 1536
+    SCRAPER_RECYCLE_MIN_NAVIGATIONS: int = 20
+    SCRAPER_MEMORY_CHECK_SECONDS: float = 10
+    # Warm browser pool for API-triggered scrapes: POOL_SIZE contexts are opened
+    # at app startup and kept warm, with at most POOL_MAX_SIZE leased at once
+    SCRAPER_BROWSER_POOL_ENABLED: bool = True
+    SCRAPER_BROWSER_POOL_SIZE: int = 6
+    SCRAPER_BROWSER_POOL_MAX_SIZE: int = 12
+    SCRAPER_BROWSER_POOL_LEASE_TIMEOUT_SECONDS: float = 60
+    # Circuit breaker: pause every navigation for PAUSE_SECONDS once
+    # FAILURE_RATE of the last WINDOW navigations failed
+    SCRAPER_BREAKER_WINDOW: int = 20
+    SCRAPER_BREAKER_FAILURE_RATE: float = 0.5
+    SCRAPER_BREAKER_PAUSE_SECONDS: float = 60
+    SCRAPER_BLOCK_RESOURCES: bool = True
+    SCRAPER_BLOCKED_RESOURCE_TYPES: List[str] = ["image", "media", "font"]
+    SCRAPER_BLOCKED_HOSTS: List[str] = [
+        "bat.bing.com",
+        "google-analytics.com",
+        "googletagmanager.com",
+        "doubleclick.net",
+        "facebook.net",
+        "connect.facebook.net",
+        "analytics.twitter.com",
+        "t.co",
+        "criteo.com",
+        "criteo.net",
+    ]
+    SCRAPER_ALLOWED_RESOURCE_TYPES: List[str] = ["document"]
+    SCRAPER_ALLOWED_HOSTS: List[str] = []
+
+    # HTML parser backend: "html.parser", "lxml" or "selectolax"
+    SCRAPER_HTML_PARSER: str = "html.parser"
+    # Processes used for parsing and field extraction; 0 means one per CPU core
+    SCRAPER_PARSE_WORKERS: int = 0
+    # How product pages are fetched: "browser" (Playwright) or "http" (pooled
+    # HTTP client, escalating to the browser when validation fails)
+    SCRAPER_FETCH_MODE: str = "browser"
+    SCRAPER_HTTP_CONCURRENCY: int = 16
+    SCRAPER_HTTP_TIMEOUT_MS: int = 15000
+    SCRAPER_HTTP2: bool = True
+    # Directory where fetched product pages are saved for parser parity checks
+    SCRAPER_RECORD_PAGES_DIR: Optional[str] = None
+    # Products per bulk_write batch when saving to MongoDB
+    SCRAPER_SAVE_BATCH_SIZE: int = 500
+    # Streaming pipeline: capacity of each stage queue, and how many products
+    # (or seconds) the writer buffers before flushing to MongoDB
+    SCRAPER_PIPELINE_QUEUE_SIZE: int = 16
+    SCRAPER_WRITE_BATCH_SIZE: int = 20
+    SCRAPER_WRITE_FLUSH_SECONDS: float = 5.0
+    # Crawl frontier: URL states persisted in MongoDB so runs resume and skip done work
+    SCRAPER_FRONTIER_ENABLED: bool = True
+    SCRAPER_FRONTIER_LEASE_SECONDS: int = 300
+    SCRAPER_FRONTIER_MAX_ATTEMPTS: int = 3
+    # Backoff before a failed URL is claimable again: RETRY_BASE_SECONDS doubled
+    # per attempt, capped at RETRY_MAX_SECONDS
+    SCRAPER_FRONTIER_RETRY_BASE_SECONDS: int = 60
+    SCRAPER_FRONTIER_RETRY_MAX_SECONDS: int = 21600
+    # Revisit scheduling for completed URLs (see RevisitPolicy)
+    SCRAPER_REVISIT_ENABLED: bool = True
+    SCRAPER_REVISIT_BASE_HOURS: float = 24
+    SCRAPER_REVISIT_MIN_HOURS: float = 1
+    SCRAPER_REVISIT_MAX_HOURS: float = 168
+    SCRAPER_REVISIT_HOT_RANK: int = 20
+    SCRAPER_REVISIT_WINDOW_DAYS: float = 7
+    # Record old/new values of changed products in the product_changes collection
+    SCRAPER_RECORD_CHANGES: bool = True
+    # Selector hit/miss counters; selectors with no hits in their last N
+    # evaluations run last in their DOM fallback chain. Stored in Mongo when
+    # the scraper has a client, otherwise in this file
+    SCRAPER_ADAPTIVE_SELECTORS: bool = True
+    SCRAPER_SELECTOR_STATS_FILE: str = "selector_stats.json"
+    SCRAPER_SELECTOR_STATS_DECAY: float = 0.9
+    SCRAPER_DEAD_SELECTOR_EVALUATIONS: int = 20
+
+    # Readiness waits; timeouts are tuned from observed latencies up to these defaults
+    SCRAPER_NAVIGATION_TIMEOUT_MS: int = 30000
+    SCRAPER_READY_DEADLINE_MS: int = 8000
+    SCRAPER_WAIT_DEFAULT_TIMEOUT_MS: int = 5000
+    SCRAPER_SCROLL_TIMEOUT_MS: int = 2000
+    # Ranking collection keeps scrolling until the limit, or until this many
+    # steps in a row find no new links; SCRAPER_MAX_SCROLL_STEPS is a safety cap
+    SCRAPER_SCROLL_IDLE_STEPS: int = 2
+    SCRAPER_MAX_SCROLL_STEPS: int = 200
+    SCRAPER_WAIT_MIN_TIMEOUT_MS: int = 500
+    SCRAPER_WAIT_PERCENTILE: float = 95
+    SCRAPER_WAIT_HEADROOM: float = 1.5
 
     # Authentication Settings
     SECRET_KEY: str = "your-secret-key-here"  # Change this in production
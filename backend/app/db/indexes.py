@@ -0,0 +1,131 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """One index a collection should have"""
+    keys: Tuple[Tuple[str, int], ...]
+    name: str
+    unique: bool = False
+    sparse: bool = False
+    partial_filter: Optional[dict] = None
+
+    def options(self) -> dict:
+        options = {'name': self.name}
+        if self.unique:
+            options['unique'] = True
+        if self.sparse:
+            options['sparse'] = True
+        if self.partial_filter:
+            options['partialFilterExpression'] = self.partial_filter
+        return options
+
+    def matches_options(self, info: dict) -> bool:
+        """Whether an existing index (from index_information) has this spec's options"""
+        return (
+            bool(info.get('unique')) == self.unique
+            and bool(info.get('sparse')) == self.sparse
+            and info.get('partialFilterExpression') == self.partial_filter
+        )
+
+
+# Indexes every environment should have, by collection. Names of indexes
+# that already existed before the registry are kept so nothing is rebuilt.
+# The products indexes cover the filters and sorts issued by
+# app/api/v1/products.py (see app/scripts/check_query_plans.py).
+INDEXES: Dict[str, List[IndexSpec]] = {
+    'users': [
+        IndexSpec((('email', ASCENDING),), name='email_1', unique=True),
+        IndexSpec((('phone', ASCENDING),), name='phone_sparse_idx', sparse=True),
+    ],
+    'products': [
+        # Upsert key for the scraper and lookup key for GET /products/{id}
+        IndexSpec((('url', ASCENDING),), name='url_unique', unique=True),
+        IndexSpec((('id', ASCENDING),), name='id_lookup'),
+        # Price ranges and every sort offered by get_sort_query, with the _id
+        # tiebreaker keyset pagination adds (see get_keyset_sort). Name search
+        # and the category filter are unanchored case-insensitive regexes,
+        # which no index can narrow, so name and category are not indexed.
+        IndexSpec((('price', ASCENDING), ('_id', ASCENDING)), name='price_keyset'),
+        IndexSpec((('created_at', DESCENDING), ('_id', DESCENDING)), name='created_at_keyset'),
+        IndexSpec((('updated_at', DESCENDING), ('_id', DESCENDING)), name='updated_at_keyset'),
+        IndexSpec((('like_count', DESCENDING), ('_id', DESCENDING)), name='like_count_keyset'),
+        IndexSpec((('views', DESCENDING), ('_id', DESCENDING)), name='views_keyset'),
+        IndexSpec((('sold', DESCENDING), ('_id', DESCENDING)), name='sold_keyset'),
+    ],
+    'product_changes': [
+        IndexSpec((('url', ASCENDING), ('changed_at', DESCENDING)), name='url_1_changed_at_-1'),
+    ],
+}
+
+
+@dataclass
+class ReconcileReport:
+    """What reconciling one collection's indexes did"""
+    collection: str
+    created: List[str] = field(default_factory=list)
+    present: List[str] = field(default_factory=list)
+    conflicts: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+    unmanaged: List[str] = field(default_factory=list)
+
+
+async def reconcile_collection(collection, specs: List[IndexSpec]) -> ReconcileReport:
+    """Create missing indexes for one collection; never drops or rebuilds.
+
+    An index counts as present when one with the same keys exists, under
+    any name. Existing indexes whose name or keys clash with a spec but
+    differ in definition are reported as conflicts and left alone, and
+    indexes not in the registry are reported as unmanaged.
+    """
+    report = ReconcileReport(collection.name)
+    existing = await collection.index_information()
+    # Key specs are compared as stored: directions may come back as floats,
+    # which compare equal to the spec's ints, or as strings such as 'text'
+    # or '2dsphere', which never match a spec
+    by_keys = {tuple(tuple(key) for key in info['key']): name for name, info in existing.items()}
+    for spec in specs:
+        name = by_keys.get(spec.keys)
+        if name is not None:
+            if spec.matches_options(existing[name]):
+                report.present.append(spec.name)
+            else:
+                report.conflicts.append(f"{spec.name}: index {name} has the same keys but different options")
+            continue
+        if spec.name in existing:
+            report.conflicts.append(f"{spec.name}: name is taken by an index on other keys")
+            continue
+        try:
+            await collection.create_index(list(spec.keys), **spec.options())
+            report.created.append(spec.name)
+        except OperationFailure as e:
+            # e.g. duplicate values already stored under a unique spec
+            report.failed.append(f"{spec.name}: {e}")
+    managed = {spec.name for spec in specs} | {by_keys.get(spec.keys) for spec in specs}
+    report.unmanaged = [name for name in existing if name != '_id_' and name not in managed]
+    return report
+
+
+async def reconcile_indexes(db, registry: Dict[str, List[IndexSpec]] = None) -> List[ReconcileReport]:
+    """Bring every registered collection's indexes up to date and log the outcome"""
+    reports = []
+    for collection_name, specs in (registry or INDEXES).items():
+        report = await reconcile_collection(db[collection_name], specs)
+        if report.created:
+            logger.info(f"{collection_name}: created indexes {', '.join(report.created)}")
+        for conflict in report.conflicts:
+            logger.warning(f"{collection_name}: index conflict, {conflict}")
+        for failure in report.failed:
+            logger.error(f"{collection_name}: could not create index {failure}")
+        if report.unmanaged:
+            logger.info(f"{collection_name}: indexes not in the registry: {', '.join(report.unmanaged)}")
+        reports.append(report)
+    return reports
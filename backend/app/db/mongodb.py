@@ -1,5 +1,7 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from ..core.config import settings
+from .indexes import reconcile_indexes
+from .pool_metrics import PoolMetrics
 from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -7,12 +9,24 @@ logger = setup_logger(__name__)
 class MongoDB:
     client: AsyncIOMotorClient = None
     db = None
+    pool_metrics: PoolMetrics = None
 
     @classmethod
     async def connect_to_database(cls):
         """Create database connection."""
         try:
-            cls.client = AsyncIOMotorClient(settings.MONGODB_URL)
+            cls.pool_metrics = PoolMetrics()
+            cls.client = AsyncIOMotorClient(
+                settings.MONGODB_URL,
+                maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+                minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+                maxIdleTimeMS=settings.MONGODB_MAX_IDLE_TIME_MS,
+                waitQueueTimeoutMS=settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+                connectTimeoutMS=settings.MONGODB_CONNECT_TIMEOUT_MS,
+                serverSelectionTimeoutMS=settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+                socketTimeoutMS=settings.MONGODB_SOCKET_TIMEOUT_MS,
+                event_listeners=[cls.pool_metrics],
+            )
             cls.db = cls.client[settings.MONGODB_DB_NAME]
             
             # Create indexes
@@ -25,22 +39,10 @@ class MongoDB:
 
     @classmethod
     async def create_indexes(cls):
-        """Create necessary indexes."""
+        """Create any registered indexes that are missing; existing ones are kept."""
         try:
-            # Drop existing indexes
-            await cls.db.users.drop_indexes()
-            
-            # Create unique index on email
-            await cls.db.users.create_index("email", unique=True)
-            
-            # Create index on phone (not unique, allow null)
-            await cls.db.users.create_index(
-                [("phone", 1)],
-                sparse=True,
-                name="phone_sparse_idx"
-            )
-            
-            logger.info("Created MongoDB indexes")
+            await reconcile_indexes(cls.db)
+            logger.info("MongoDB indexes reconciled")
         except Exception as e:
             logger.error(f"Could not create indexes: {e}")
             raise
@@ -57,4 +59,11 @@ class MongoDB:
     @classmethod
     def get_database(cls):
         """Get database instance."""
-        return cls.db 
\ No newline at end of file
+        return cls.db
+
+    @classmethod
+    def get_pool_metrics(cls) -> dict:
+        """Connection pool checkout metrics for the shared client."""
+        if cls.pool_metrics is None:
+            return {}
+        return cls.pool_metrics.snapshot() 
\ No newline at end of file
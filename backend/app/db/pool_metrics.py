@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict
+
+from pymongo import monitoring
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool listener counting checkouts and how long they wait.
+
+    Motor runs pymongo in worker threads and a checkout starts and finishes
+    on the same thread, so the wait is timed per thread. Events can arrive
+    from several threads at once, hence the lock.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.lock = threading.Lock()
+        self.started: Dict[int, float] = {}
+        self.waits_ms: Deque[float] = deque(maxlen=window)
+        self.checkouts = 0
+        self.checkout_failures: Dict[str, int] = {}
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.pool_clears = 0
+
+    def connection_check_out_started(self, event):
+        with self.lock:
+            self.started[threading.get_ident()] = time.monotonic()
+
+    def connection_checked_out(self, event):
+        with self.lock:
+            start = self.started.pop(threading.get_ident(), None)
+            if start is not None:
+                self.waits_ms.append((time.monotonic() - start) * 1000)
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def connection_check_out_failed(self, event):
+        with self.lock:
+            self.started.pop(threading.get_ident(), None)
+            reason = str(event.reason)
+            self.checkout_failures[reason] = self.checkout_failures.get(reason, 0) + 1
+
+    def connection_checked_in(self, event):
+        with self.lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def connection_created(self, event):
+        with self.lock:
+            self.connections_created += 1
+
+    def connection_closed(self, event):
+        with self.lock:
+            self.connections_closed += 1
+
+    def pool_cleared(self, event):
+        with self.lock:
+            self.pool_clears += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def snapshot(self) -> Dict:
+        """Checkout counts, wait latency and connection churn so far"""
+        with self.lock:
+            waits = sorted(self.waits_ms)
+            return {
+                'checkouts': self.checkouts,
+                'checkout_failures': dict(self.checkout_failures),
+                'checked_out': self.checked_out,
+                'peak_checked_out': self.peak_checked_out,
+                'open_connections': self.connections_created - self.connections_closed,
+                'connections_created': self.connections_created,
+                'pool_clears': self.pool_clears,
+                'checkout_wait_ms': {
+                    'avg': round(sum(waits) / len(waits), 3) if waits else None,
+                    'p95': round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3) if waits else None,
+                    'max': round(waits[-1], 3) if waits else None,
+                },
+            }
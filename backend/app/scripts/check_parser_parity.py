@@ -0,0 +1,90 @@
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+
+from app.core.config import settings
+from app.services.html_backends import available_backends
+from app.services.product_parser import ProductParser
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def extract_with_backend(backend: str, pages: dict) -> tuple:
+    """Run the DOM extractors over every page with one parser backend"""
+    parser = ProductParser(backend)
+    results = {}
+    start = time.perf_counter()
+    for name, html in pages.items():
+        results[name] = {
+            'fields': parser.plan.extract(html, parser.PRODUCT_FIELDS),
+            'links': sorted(parser.extract_product_links(html)),
+        }
+        # The compiled plan must agree with the selector-by-selector reference
+        reference = parser.extract_dom_fields(html, parser.PRODUCT_FIELDS)
+        if results[name]['fields'] != reference:
+            results[name]['reference_fields'] = reference
+    return results, time.perf_counter() - start
+
+
+def check_parity(pages_dir: str, backends: list) -> bool:
+    """Compare extraction results across backends over recorded pages"""
+    paths = sorted(glob.glob(os.path.join(pages_dir, '*.html')))
+    if not paths:
+        logger.error(f"No recorded pages found in {pages_dir}")
+        return False
+
+    pages = {}
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            pages[os.path.basename(path)] = f.read()
+
+    reference_backend = backends[0]
+    reference, elapsed = extract_with_backend(reference_backend, pages)
+    logger.info(f"{reference_backend}: {elapsed / len(pages) * 1000:.1f}ms/page")
+
+    ok = True
+    for name in pages:
+        if 'reference_fields' in reference[name]:
+            ok = False
+            logger.error(f"Extraction plan mismatch on {name} ({reference_backend})")
+            logger.error(f"  {reference[name]['fields']!r} != {reference[name]['reference_fields']!r}")
+    for backend in backends[1:]:
+        results, elapsed = extract_with_backend(backend, pages)
+        logger.info(f"{backend}: {elapsed / len(pages) * 1000:.1f}ms/page")
+        for name in pages:
+            if results[name] != reference[name]:
+                ok = False
+                logger.error(f"Mismatch on {name} ({reference_backend} vs {backend})")
+                for key in ('fields', 'links', 'reference_fields'):
+                    if results[name].get(key) != reference[name].get(key):
+                        logger.error(f"  {key}: {reference[name].get(key)!r} != {results[name].get(key)!r}")
+
+    if ok:
+        logger.info(f"All {len(pages)} pages match across: {', '.join(backends)}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check HTML parser backend parity over recorded pages")
+    parser.add_argument('pages_dir', nargs='?', default=settings.SCRAPER_RECORD_PAGES_DIR)
+    parser.add_argument('--backends', nargs='+', default=None)
+    args = parser.parse_args()
+
+    if not args.pages_dir:
+        parser.error("pages_dir is required when SCRAPER_RECORD_PAGES_DIR is not set")
+
+    backends = args.backends or available_backends()
+    if len(backends) < 2:
+        logger.error(f"Need at least two installed backends, found: {backends}")
+        sys.exit(1)
+
+    sys.exit(0 if check_parity(args.pages_dir, backends) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import datetime
+from itertools import product
+from typing import Iterator, List, Set, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.api.v1.products import (
+    COLLECTION_NAME, ProductSearch, build_product_filter, build_search_filter, get_keyset_sort, get_sort_query,
+    keyset_filter,
+)
+from app.core.config import settings
+from app.db.indexes import reconcile_indexes
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SORT_OPTIONS = ['price_asc', 'price_desc', 'views_desc', 'sold_desc', 'likes_desc', 'created_desc', 'updated_desc']
+PRICE_RANGES = [(None, None), (1000, None), (None, 5000), (1000, 5000)]
+
+
+def query_shapes() -> Iterator[Tuple[str, dict, list, bool]]:
+    """Every (label, filter, sort, expect_scan) shape the products API sends to MongoDB"""
+    for category, (min_price, max_price), sort_by in product([None, 'fashion'], PRICE_RANGES, SORT_OPTIONS):
+        shape = f"category={category} price={min_price}-{max_price} sort={sort_by}"
+        filter_query = build_product_filter(category, min_price, max_price)
+        yield f"list {shape}", filter_query, get_keyset_sort(sort_by), False
+        yield f"export {shape}", filter_query, get_sort_query(sort_by), False
+    # Later pages of GET /products, after a cursor
+    for sort_by in SORT_OPTIONS:
+        sort_query = get_keyset_sort(sort_by)
+        field, direction = sort_query[0]
+        value = datetime.utcnow() if field.endswith('_at') else 1000
+        filter_query = keyset_filter(field, direction, value, ObjectId())
+        yield f"list page after cursor sort={sort_by}", filter_query, sort_query, False
+    for category, (min_price, max_price) in product([None, 'fashion'], PRICE_RANGES):
+        search = ProductSearch(keyword='iphone', category=category, min_price=min_price, max_price=max_price)
+        # Without a price range a search only has substring matches on name
+        # and category, which no index can serve; it is reported but does not
+        # fail the check
+        unbounded = min_price is None and max_price is None
+        yield f"search category={category} price={min_price}-{max_price}", build_search_filter(search), [], unbounded
+    yield "detail by id", {'id': 'm00000000000'}, [], False
+
+
+def plan_stages(plan: dict) -> Set[str]:
+    """Stage names anywhere in an explain() plan tree"""
+    stages = set()
+    if 'stage' in plan:
+        stages.add(plan['stage'])
+    for key in ('inputStage', 'queryPlan'):
+        if isinstance(plan.get(key), dict):
+            stages |= plan_stages(plan[key])
+    for child in plan.get('inputStages', []):
+        stages |= plan_stages(child)
+    return stages
+
+
+async def check_query_plans(reconcile: bool) -> List[str]:
+    """Explain every API query shape and return the ones that unexpectedly scan the collection"""
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    try:
+        db = client[settings.MONGODB_DB_NAME]
+        if reconcile:
+            await reconcile_indexes(db)
+        collection = db[COLLECTION_NAME]
+        scans = []
+        for label, filter_query, sort_query, expect_scan in query_shapes():
+            cursor = collection.find(filter_query)
+            if sort_query:
+                cursor = cursor.sort(sort_query)
+            explain = await cursor.explain()
+            stages = plan_stages(explain['queryPlanner']['winningPlan'])
+            if 'COLLSCAN' in stages and expect_scan:
+                logger.warning(f"COLLSCAN (expected): {label} {filter_query}")
+            elif 'COLLSCAN' in stages:
+                scans.append(label)
+                logger.error(f"COLLSCAN: {label} {filter_query} sort={sort_query}")
+            else:
+                logger.info(f"ok ({', '.join(sorted(stages))}): {label}")
+        return scans
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fail if any query shape issued by the products API needs a collection scan"
+    )
+    parser.add_argument('--reconcile', action='store_true', help="Create missing registered indexes first")
+    args = parser.parse_args()
+
+    scans = asyncio.run(check_query_plans(args.reconcile))
+    if scans:
+        logger.error(f"{len(scans)} query shapes scan the whole collection")
+        sys.exit(1)
+    logger.info("Every query shape uses an index")
+
+
+if __name__ == "__main__":
+    main()
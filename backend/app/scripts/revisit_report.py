@@ -0,0 +1,65 @@
+import argparse
+import asyncio
+import logging
+from dataclasses import replace
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.services.revisit_scheduler import RevisitPolicy, RevisitScheduler
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def revisit_report(policy: RevisitPolicy, horizon_hours: float, cycle_limit: int):
+    """Log how many detail pages a revisit policy would fetch, without scraping"""
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    try:
+        db = client[settings.MONGODB_DB_NAME]
+        scheduler = RevisitScheduler(policy, db.crawl_frontier, db.products, db.product_changes)
+        report = await scheduler.dry_run(horizon_hours=horizon_hours)
+    finally:
+        client.close()
+
+    total = report['total']
+    logger.info(f"Policy: {policy}")
+    logger.info(f"URLs in frontier: {total} ({report['new']} never scraped)")
+    logger.info(f"Due now: {report['due_now']} + {report['new']} new")
+    logger.info(
+        f"Due within {horizon_hours:g}h: {report['due_in_horizon']} "
+        f"({report['hot_due_in_horizon']} in the hot ranking range) + {report['new']} new"
+    )
+    fetches = report['due_now'] + report['new']
+    if cycle_limit:
+        logger.info(f"Next cycle would fetch {min(fetches, cycle_limit)} pages (limit {cycle_limit})")
+    if total:
+        logger.info(f"Fetches vs. re-scraping everything now: {fetches}/{total} ({fetches / total * 100:.1f}%)")
+
+
+def main():
+    defaults = RevisitPolicy.from_settings(settings)
+    parser = argparse.ArgumentParser(description="Dry-run report of pages a revisit policy would fetch")
+    parser.add_argument('--base-hours', type=float, default=defaults.base_hours)
+    parser.add_argument('--min-hours', type=float, default=defaults.min_hours)
+    parser.add_argument('--max-hours', type=float, default=defaults.max_hours)
+    parser.add_argument('--hot-rank', type=int, default=defaults.hot_rank)
+    parser.add_argument('--window-days', type=float, default=defaults.window_days)
+    parser.add_argument('--horizon-hours', type=float, default=24)
+    parser.add_argument('--cycle-limit', type=int, default=0, help="Per-run scrape limit, to show what one cycle fetches")
+    args = parser.parse_args()
+
+    policy = replace(
+        defaults,
+        base_hours=args.base_hours,
+        min_hours=args.min_hours,
+        max_hours=args.max_hours,
+        hot_rank=args.hot_rank,
+        window_days=args.window_days,
+    )
+    asyncio.run(revisit_report(policy, args.horizon_hours, args.cycle_limit))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import asyncio
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.services.product_parser import ProductParser
+from app.services.selector_stats import SelectorStats
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def show_selector_stats(mongodb_url: str = None, path: str = None, min_evaluations: int = 20):
+    """Log the adaptive selector order and per-selector counters"""
+    client = AsyncIOMotorClient(mongodb_url) if mongodb_url else None
+    try:
+        stats = SelectorStats(
+            collection=client.mercari_search.selector_stats if client else None,
+            path=path,
+        )
+        await stats.load()
+        order = stats.order(ProductParser().plan.chain_selectors(), min_evaluations)
+        for field, selectors in order.items():
+            logger.info(f"{field}:")
+            for selector in selectors:
+                counter = stats.counters.get((field, selector))
+                if counter is None:
+                    logger.info(f"  {selector}: no data")
+                    continue
+                last_hit = counter['last_hit_at'].isoformat() if counter['last_hit_at'] else 'never'
+                logger.info(
+                    f"  {selector}: score={stats.score(field, selector):.2f} "
+                    f"hits={counter['hits']:.1f} misses={counter['misses']:.1f} last_hit={last_hit}"
+                )
+        for field, selector, _ in stats.dead_selectors(min_evaluations):
+            logger.warning(f"Dead selector for {field}: {selector}")
+    finally:
+        if client:
+            client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show selector hit statistics and dead selectors")
+    parser.add_argument('--mongodb-url', default=None, help="Read counters from MongoDB instead of the local file")
+    parser.add_argument('--file', default=settings.SCRAPER_SELECTOR_STATS_FILE)
+    parser.add_argument('--min-evaluations', type=int, default=settings.SCRAPER_DEAD_SELECTOR_EVALUATIONS)
+    args = parser.parse_args()
+    asyncio.run(show_selector_stats(args.mongodb_url, args.file, args.min_evaluations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from playwright.async_api import async_playwright
+
+from app.services.browser_recycler import BrowserRecycler
+from app.services.resource_blocker import ResourceBlocker
+
+
+class BrowserPool:
+    """Long-lived Chromium with pre-warmed contexts that scrape jobs lease.
+
+    Started once at app startup, so an API-triggered scrape skips the
+    Playwright and Chromium launch and gets a ready page from the pool. Up
+    to size contexts are kept warm; when none is idle a new one is opened
+    (a cold lease) as long as fewer than max_size are leased, otherwise
+    the caller waits. Returned pages are reset to about:blank and reused,
+    or closed and replaced once the recycler says their context is due.
+    The whole browser is relaunched when memory stays over the limit and
+    nothing is leased.
+    """
+
+    def __init__(
+        self,
+        user_agent: str,
+        size: int = 6,
+        max_size: int = 12,
+        lease_timeout: float = 60,
+        resource_blocker: Optional[ResourceBlocker] = None,
+        recycler: Optional[BrowserRecycler] = None,
+        enabled: bool = True,
+    ):
+        self.enabled = enabled
+        self.user_agent = user_agent
+        self.size = max(0, size)
+        self.max_size = max(1, size, max_size)
+        self.lease_timeout = lease_timeout
+        self.resource_blocker = resource_blocker
+        self.recycler = recycler or BrowserRecycler()
+        self.playwright = None
+        self.browser = None
+        self.idle: Optional[asyncio.Queue] = None
+        self.slots: Optional[asyncio.Semaphore] = None
+        self.leased = 0
+        self.lock = asyncio.Lock()
+        self.latencies: Dict[str, Deque[float]] = {'warm': deque(maxlen=500), 'cold': deque(maxlen=500)}
+        self.leases = {'warm': 0, 'cold': 0}
+        self.started_at: Optional[float] = None
+        self.startup_seconds = 0.0
+
+    @classmethod
+    def from_settings(cls, settings) -> 'BrowserPool':
+        return cls(
+            user_agent=settings.SCRAPER_USER_AGENT,
+            size=settings.SCRAPER_BROWSER_POOL_SIZE,
+            max_size=settings.SCRAPER_BROWSER_POOL_MAX_SIZE,
+            lease_timeout=settings.SCRAPER_BROWSER_POOL_LEASE_TIMEOUT_SECONDS,
+            resource_blocker=ResourceBlocker.from_settings(settings) if settings.SCRAPER_BLOCK_RESOURCES else None,
+            recycler=BrowserRecycler(
+                max_navigations=settings.SCRAPER_RECYCLE_NAVIGATIONS,
+                max_rss_mb=settings.SCRAPER_RECYCLE_RSS_MB,
+                min_navigations=settings.SCRAPER_RECYCLE_MIN_NAVIGATIONS,
+                check_seconds=settings.SCRAPER_MEMORY_CHECK_SECONDS,
+            ),
+            enabled=settings.SCRAPER_BROWSER_POOL_ENABLED,
+        )
+
+    @property
+    def running(self) -> bool:
+        return self.browser is not None
+
+    async def start(self):
+        """Launch Chromium and warm size contexts; safe to call again"""
+        if not self.enabled:
+            raise RuntimeError("Browser pool is disabled (SCRAPER_BROWSER_POOL_ENABLED)")
+        async with self.lock:
+            if self.running:
+                return
+            start = time.monotonic()
+            if self.playwright is None:
+                self.playwright = await async_playwright().start()
+            await self._launch()
+            self.started_at = time.time()
+            self.startup_seconds = time.monotonic() - start
+
+    async def _launch(self):
+        self.browser = await self.playwright.chromium.launch(
+            headless=True,
+            args=['--no-sandbox', '--disable-dev-shm-usage']
+        )
+        self.idle = asyncio.Queue()
+        self.slots = asyncio.Semaphore(self.max_size)
+        self.leased = 0
+        for _ in range(self.size):
+            self.idle.put_nowait(await self._open_page())
+
+    async def _open_page(self):
+        context = await self.browser.new_context(user_agent=self.user_agent)
+        if self.resource_blocker:
+            await self.resource_blocker.attach(context)
+        return await context.new_page()
+
+    async def close(self):
+        """Close every context and stop Chromium"""
+        async with self.lock:
+            while self.idle is not None and not self.idle.empty():
+                self.recycler.forget(self.idle.get_nowait().context)
+            if self.browser is not None:
+                await self.browser.close()
+                self.browser = None
+            if self.playwright is not None:
+                await self.playwright.stop()
+                self.playwright = None
+            self.idle = None
+
+    async def acquire(self):
+        """Lease a page, warm if one is idle, otherwise freshly opened"""
+        await self.start()
+        start = time.monotonic()
+        await asyncio.wait_for(self.slots.acquire(), self.lease_timeout)
+        try:
+            if not self.idle.empty():
+                kind, page = 'warm', self.idle.get_nowait()
+            else:
+                kind, page = 'cold', await self._open_page()
+        except Exception:
+            self.slots.release()
+            raise
+        self.leased += 1
+        self.leases[kind] += 1
+        self.latencies[kind].append((time.monotonic() - start) * 1000)
+        return page
+
+    async def release(self, page, discard: bool = False):
+        """Return a leased page; discarded or worn-out contexts are replaced.
+
+        Pages returned after the pool was closed are just closed.
+        """
+        self.leased -= 1
+        self.slots.release()
+        context = page.context
+        if self.idle is None:
+            # The pool was closed while this page was leased
+            try:
+                await context.close()
+            except Exception:
+                pass
+            self.recycler.forget(context)
+            return
+        reason = 'discarded' if discard else self.recycler.recycle_reason(context)
+        discard = reason is not None
+        try:
+            if discard:
+                before = self.recycler.snapshot(fresh=True)
+                await context.close()
+                self.recycler.recycled(context, reason, "pooled context", before)
+            else:
+                # Drop the DOM of the last page before the next lease
+                await page.goto('about:blank')
+        except Exception as e:
+            print(f"   Warning: Could not reset pooled page: {e}")
+            self.recycler.forget(context)
+            discard = True
+        if not discard:
+            self.idle.put_nowait(page)
+        elif self.idle.qsize() + self.leased < self.size:
+            try:
+                self.idle.put_nowait(await self._open_page())
+            except Exception as e:
+                print(f"   Warning: Could not refill browser pool: {e}")
+        if self.leased == 0 and self.recycler.over_limit(fresh=True):
+            await self.restart()
+
+    async def restart(self):
+        """Relaunch Chromium to give its memory back; only while nothing is leased"""
+        async with self.lock:
+            if self.leased or self.browser is None:
+                return
+            before = self.recycler.snapshot(fresh=True)
+            await self.browser.close()
+            await self._launch()
+            self.recycler.restarted(before)
+
+    @staticmethod
+    def _latency_stats(latencies: Deque[float]) -> Dict:
+        if not latencies:
+            return {'avg_ms': None, 'p95_ms': None}
+        ordered = sorted(latencies)
+        return {
+            'avg_ms': round(sum(ordered) / len(ordered), 2),
+            'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+        }
+
+    def metrics(self) -> Dict:
+        """Pool occupancy, warm/cold lease counts and latencies, memory"""
+        memory = self.recycler.snapshot()
+        return {
+            'enabled': self.enabled,
+            'running': self.running,
+            'size': self.size,
+            'max_size': self.max_size,
+            'idle': self.idle.qsize() if self.idle is not None else 0,
+            'leased': self.leased,
+            'startup_seconds': round(self.startup_seconds, 3),
+            'leases': dict(self.leases),
+            'warm_lease': self._latency_stats(self.latencies['warm']),
+            'cold_lease': self._latency_stats(self.latencies['cold']),
+            'browser_restarts': self.recycler.restarts,
+            'memory_mb': round(memory.total_mb, 1),
+        }
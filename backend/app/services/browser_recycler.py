@@ -0,0 +1,134 @@
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import psutil
+
+
+@dataclass
+class MemorySnapshot:
+    """Resident memory of the scraper process and its children (Chromium, parse workers)"""
+    main_mb: float = 0.0
+    children_mb: float = 0.0
+    processes: int = 1
+
+    @property
+    def total_mb(self) -> float:
+        return self.main_mb + self.children_mb
+
+    def __str__(self) -> str:
+        return (
+            f"{self.total_mb:.0f}MB (scraper {self.main_mb:.0f}MB, "
+            f"{self.processes - 1} child processes {self.children_mb:.0f}MB)"
+        )
+
+
+def memory_snapshot(pid: int = None) -> MemorySnapshot:
+    """Measure RSS for a process and all of its descendants"""
+    process = psutil.Process(pid or os.getpid())
+    snapshot = MemorySnapshot(main_mb=process.memory_info().rss / 1024 / 1024)
+    for child in process.children(recursive=True):
+        try:
+            snapshot.children_mb += child.memory_info().rss / 1024 / 1024
+            snapshot.processes += 1
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            # Renderer processes come and go while we measure
+            continue
+    return snapshot
+
+
+class BrowserRecycler:
+    """Decides when browser contexts should be replaced to bound memory.
+
+    Navigations are counted per context. A context is due for recycling
+    after max_navigations, or once total RSS (scraper plus Chromium) is
+    above max_rss_mb and the context has done at least min_navigations, so
+    a high reading does not make freshly recycled contexts thrash. RSS is
+    sampled at most every check_seconds.
+    """
+
+    def __init__(
+        self,
+        max_navigations: int = 200,
+        max_rss_mb: float = 1536,
+        min_navigations: int = 20,
+        check_seconds: float = 10,
+    ):
+        self.max_navigations = max_navigations
+        self.max_rss_mb = max_rss_mb
+        self.min_navigations = min_navigations
+        self.check_seconds = check_seconds
+        self.navigations: Dict[int, int] = {}
+        self.last_snapshot: Optional[MemorySnapshot] = None
+        self.last_checked = 0.0
+        self.reset()
+
+    def reset(self):
+        """Start a new run's recycle stats; navigation counts carry over"""
+        self.recycles: Dict[str, int] = {}
+        self.restarts = 0
+        self.peak_mb = 0.0
+
+    def record_navigation(self, context):
+        if context is not None:
+            self.navigations[id(context)] = self.navigations.get(id(context), 0) + 1
+
+    def forget(self, context):
+        """Drop a closed context's count, so a new context that reuses its id starts from zero"""
+        self.navigations.pop(id(context), None)
+
+    def snapshot(self, fresh: bool = False) -> MemorySnapshot:
+        now = time.monotonic()
+        if fresh or self.last_snapshot is None or now - self.last_checked >= self.check_seconds:
+            self.last_snapshot = memory_snapshot()
+            self.last_checked = now
+            self.peak_mb = max(self.peak_mb, self.last_snapshot.total_mb)
+        return self.last_snapshot
+
+    def over_limit(self, fresh: bool = False) -> bool:
+        return bool(self.max_rss_mb) and self.snapshot(fresh).total_mb > self.max_rss_mb
+
+    def recycle_reason(self, context) -> Optional[str]:
+        """Why context should be recycled now, or None"""
+        if context is None:
+            return None
+        navigations = self.navigations.get(id(context), 0)
+        if self.max_navigations and navigations >= self.max_navigations:
+            return 'navigations'
+        if navigations >= self.min_navigations and self.over_limit():
+            return 'memory'
+        return None
+
+    def recycled(self, context, reason: str, label: str, before: MemorySnapshot):
+        """Record and log a replaced context"""
+        navigations = self.navigations.pop(id(context), 0)
+        self.recycles[reason] = self.recycles.get(reason, 0) + 1
+        after = self.snapshot(fresh=True)
+        print(
+            f"♻️  Recycled {label} after {navigations} navigations ({reason}): "
+            f"{before} → {after}"
+        )
+
+    def restarted(self, before: MemorySnapshot):
+        """Record and log a full browser restart"""
+        self.navigations.clear()
+        self.restarts += 1
+        after = self.snapshot(fresh=True)
+        print(f"♻️  Restarted browser: {before} → {after}")
+
+    def counts(self) -> Dict[str, int]:
+        """Recycles by reason and browser restarts so far, for measuring a run on a shared recycler"""
+        return {**self.recycles, 'restarts': self.restarts}
+
+    def print_summary(self, since: Dict[str, int] = None):
+        """Print memory and recycle counts; with since, only what happened after that counts() call"""
+        snapshot = self.snapshot(fresh=True)
+        since = since or {}
+        recycles = {k: v - since.get(k, 0) for k, v in self.recycles.items() if v > since.get(k, 0)}
+        restarts = self.restarts - since.get('restarts', 0)
+        recycles = ", ".join(f"{k}={v}" for k, v in sorted(recycles.items())) or "none"
+        peak = "peak" if since else "peak this run"
+        print("♻️  Memory:")
+        print(f"   Now: {snapshot}, {peak} {self.peak_mb:.0f}MB (limit {self.max_rss_mb:.0f}MB)")
+        print(f"   Context recycles: {recycles}, browser restarts: {restarts}")
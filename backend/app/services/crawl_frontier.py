@@ -0,0 +1,206 @@
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+
+PENDING = 'pending'
+IN_FLIGHT = 'in_flight'
+DONE = 'done'
+FAILED = 'failed'
+STATES = (PENDING, IN_FLIGHT, DONE, FAILED)
+
+
+class CrawlFrontier:
+    """Persistent crawl frontier stored in a MongoDB collection.
+
+    One document per URL, deduplicated by a unique index on url, with a
+    state (pending / in_flight / done / failed), a priority, an attempt count
+    and a lease. Claiming a URL leases it to this process; leases that expire
+    without completing (a crashed run) make the URL claimable again, so a
+    restarted scraper resumes where the last one stopped.
+
+    A failed URL goes back to pending with a next_attempt_at backed off by
+    retry_policy, so it is retried by a later claim instead of being dropped;
+    permanent failures (e.g. a 404) are marked failed straight away.
+
+    With a RevisitScheduler, completed URLs get a next_due_at and become
+    claimable again once it has passed.
+    """
+
+    def __init__(
+        self, collection, lease_seconds: int = 300, max_attempts: int = 3, scheduler=None, retry_policy=None
+    ):
+        self.collection = collection
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.scheduler = scheduler
+        self.retry_policy = retry_policy
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    async def ensure_indexes(self):
+        """Create the dedupe index and the index used to claim work"""
+        await self.collection.create_index('url', unique=True, name='url_unique')
+        await self.collection.create_index(
+            [('state', ASCENDING), ('priority', DESCENDING), ('added_at', ASCENDING)],
+            name='claim_order',
+        )
+        await self.collection.create_index(
+            [('state', ASCENDING), ('lease_expires', ASCENDING)], name='lease_expiry'
+        )
+        await self.collection.create_index(
+            [('state', ASCENDING), ('next_due_at', ASCENDING)], name='revisit_due'
+        )
+
+    async def add(self, urls: Iterable[str], start_rank: int = 0) -> int:
+        """Add URLs that are not in the frontier yet; returns how many were new.
+
+        urls are in rank order starting at start_rank. Each URL's rank is
+        recorded and its priority set from it, so claims follow rank order;
+        re-adding a known URL refreshes both.
+        """
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return 0
+        now = datetime.utcnow()
+        requests = [
+            UpdateOne(
+                {'url': url},
+                {
+                    '$setOnInsert': {'url': url, 'state': PENDING, 'attempts': 0, 'added_at': now},
+                    '$set': {'rank': start_rank + i, 'priority': -(start_rank + i), 'rank_seen_at': now},
+                },
+                upsert=True,
+            )
+            for i, url in enumerate(urls)
+        ]
+        result = await self.collection.bulk_write(requests, ordered=False)
+        return result.upserted_count
+
+    def claimable(self, now: datetime) -> dict:
+        """Query matching URLs that may be claimed at now"""
+        branches = [
+            # Failed URLs wait out their backoff; new URLs have no next_attempt_at
+            {'state': PENDING, 'next_attempt_at': {'$not': {'$gt': now}}},
+            {'state': IN_FLIGHT, 'lease_expires': {'$lt': now}},
+        ]
+        if self.scheduler is not None:
+            # URLs completed before revisits were scheduled are due right away
+            branches.append({'state': DONE, 'next_due_at': {'$lte': now}})
+            branches.append({'state': DONE, 'next_due_at': None})
+        return {'$or': branches}
+
+    async def count_claimable(self, urls: Iterable[str]) -> int:
+        """How many of urls could be claimed now"""
+        urls = list(urls)
+        if not urls:
+            return 0
+        return await self.collection.count_documents(
+            {'$and': [{'url': {'$in': urls}}, self.claimable(datetime.utcnow())]}
+        )
+
+    async def claim(self) -> Optional[str]:
+        """Lease the highest-priority claimable URL"""
+        now = datetime.utcnow()
+        doc = await self.collection.find_one_and_update(
+            self.claimable(now),
+            {
+                '$set': {
+                    'state': IN_FLIGHT,
+                    'leased_by': self.owner,
+                    'leased_at': now,
+                    'lease_expires': now + timedelta(seconds=self.lease_seconds),
+                },
+                '$inc': {'attempts': 1},
+            },
+            sort=[('priority', DESCENDING), ('added_at', ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+        return doc['url'] if doc else None
+
+    async def complete(self, urls: Iterable[str]):
+        """Mark URLs as done, scheduling their next visit when revisits are enabled"""
+        urls = list(urls)
+        if not urls:
+            return
+        now = datetime.utcnow()
+        unset = {'leased_by': '', 'lease_expires': '', 'last_error': '', 'next_attempt_at': ''}
+        if self.scheduler is None:
+            await self.collection.update_many(
+                {'url': {'$in': urls}},
+                {'$set': {'state': DONE, 'completed_at': now, 'attempts': 0}, '$unset': unset},
+            )
+            return
+        due = await self.scheduler.schedule(urls, now)
+        await self.collection.bulk_write([
+            UpdateOne(
+                {'url': url},
+                {
+                    '$set': {'state': DONE, 'completed_at': now, 'attempts': 0, 'next_due_at': due[url]},
+                    '$unset': unset,
+                },
+            )
+            for url in urls
+        ], ordered=False)
+
+    async def fail(self, url: str, error: str = None, permanent: bool = False):
+        """Return a URL to pending after a backoff, or mark it failed.
+
+        URLs are marked failed on a permanent error or after max_attempts.
+        """
+        doc = await self.collection.find_one({'url': url}, {'attempts': 1})
+        attempts = doc.get('attempts', 0) if doc else 0
+        now = datetime.utcnow()
+        update = {'last_error': error, 'failed_at': now}
+        if permanent or attempts >= self.max_attempts:
+            update['state'] = FAILED
+        else:
+            update['state'] = PENDING
+            if self.retry_policy is not None:
+                delay = self.retry_policy.delay(max(1, attempts))
+                update['next_attempt_at'] = now + timedelta(seconds=delay)
+        await self.collection.update_one(
+            {'url': url},
+            {'$set': update, '$unset': {'leased_by': '', 'lease_expires': ''}},
+        )
+
+    async def release(self):
+        """Return this process's unfinished leases to pending.
+
+        The attempt their claim counted is taken back, since an interrupted
+        run is not a failure of the URL.
+        """
+        await self.collection.update_many(
+            {'state': IN_FLIGHT, 'leased_by': self.owner},
+            {
+                '$set': {'state': PENDING},
+                '$unset': {'leased_by': '', 'lease_expires': ''},
+                '$inc': {'attempts': -1},
+            },
+        )
+
+    async def counts(self) -> Dict[str, int]:
+        """Number of URLs in each state"""
+        counts = {state: 0 for state in STATES}
+        async for row in self.collection.aggregate([{'$group': {'_id': '$state', 'count': {'$sum': 1}}}]):
+            counts[row['_id']] = row['count']
+        return counts
+
+    async def print_summary(self):
+        counts = await self.counts()
+        summary = ", ".join(f"{state}={counts[state]}" for state in STATES)
+        if self.retry_policy is not None:
+            backing_off = await self.collection.count_documents(
+                {'state': PENDING, 'next_attempt_at': {'$gt': datetime.utcnow()}}
+            )
+            if backing_off:
+                summary += f" ({backing_off} pending retries backing off)"
+        if self.scheduler is not None:
+            due = await self.collection.count_documents(
+                {'state': DONE, 'next_due_at': {'$lte': datetime.utcnow()}}
+            )
+            summary += f" (due for revisit: {due})"
+        print(f"🗂️  Crawl frontier: {summary}")
+
@@ -0,0 +1,307 @@
+import json
+import re
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+
+# Script payloads are pulled out with regexes so the fast path never has to
+# build a full DOM tree.
+JSON_LD_PATTERN = re.compile(
+    r'<script[^>]*type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL,
+)
+NEXT_DATA_PATTERN = re.compile(
+    r'<script[^>]*id=["\']__NEXT_DATA__["\'][^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL,
+)
+# Where __NEXT_DATA__ keeps the page's own item (marketplace) or product
+# (Shops); related and recommended items live elsewhere in the payload
+NEXT_DATA_PRODUCT_PATHS = [
+    ('props', 'pageProps', 'item'),
+    ('props', 'pageProps', 'product'),
+]
+
+def _load_json(raw: str) -> Optional[Any]:
+    try:
+        return json.loads(raw.strip())
+    except (ValueError, TypeError):
+        return None
+
+
+def _walk(node: Any) -> Iterator[dict]:
+    """Yield every dict nested anywhere inside a JSON value"""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            yield current
+            stack.extend(reversed(list(current.values())))
+        elif isinstance(current, list):
+            stack.extend(reversed(current))
+
+
+def _get(data: dict, *path) -> Any:
+    """Follow a key path through nested dicts, returning None when missing"""
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def _first(data: dict, *paths) -> Any:
+    """Return the first non-empty value among several key paths"""
+    for path in paths:
+        value = _get(data, *path)
+        if value not in (None, '', [], {}):
+            return value
+    return None
+
+
+def _to_int(value: Any) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        digits = re.sub(r'[^\d.]', '', value)
+        if digits:
+            try:
+                return int(float(digits))
+            except ValueError:
+                return None
+    return None
+
+
+def _image_from(value: Any) -> Optional[str]:
+    """Pick the first image URL from a string, list or image object"""
+    if isinstance(value, str):
+        return value or None
+    if isinstance(value, list):
+        for item in value:
+            image = _image_from(item)
+            if image:
+                return image
+    if isinstance(value, dict):
+        return _first(value, ('url',), ('contentUrl',), ('imageUrl',), ('image',))
+    return None
+
+
+def _is_type(node: dict, type_name: str) -> bool:
+    node_type = node.get('@type')
+    if isinstance(node_type, list):
+        return type_name in node_type
+    return node_type == type_name
+
+
+def _top_level_nodes(payload: Any) -> Iterator[dict]:
+    """Nodes a JSON-LD script describes directly: the payload, its list items and its @graph"""
+    nodes = payload if isinstance(payload, list) else [payload]
+    for node in nodes:
+        if isinstance(node, dict):
+            yield node
+            graph = node.get('@graph')
+            if isinstance(graph, list):
+                yield from (n for n in graph if isinstance(n, dict))
+
+
+def _json_ld_ids(node: dict) -> List[str]:
+    """Item ids a Product node names through sku, productID or the last segment of its url"""
+    ids = [str(node[key]) for key in ('sku', 'productID') if node.get(key)]
+    url = node.get('url')
+    if isinstance(url, str) and url:
+        ids.append(urlparse(url).path.rstrip('/').rsplit('/', 1)[-1])
+    return ids
+
+
+def _find_json_ld_product(payloads: List[Any], item_id: Optional[str]) -> Optional[dict]:
+    """The page's own Product node: one naming the URL's item id, else a top-level one.
+
+    Related items are often embedded as Products inside an ItemList, so a
+    nested Product is only used when its id matches the URL.
+    """
+    if item_id is not None:
+        for payload in payloads:
+            for node in _walk(payload):
+                if _is_type(node, 'Product') and item_id in _json_ld_ids(node):
+                    return node
+    for payload in payloads:
+        for node in _top_level_nodes(payload):
+            if _is_type(node, 'Product') and (item_id is None or not _json_ld_ids(node)):
+                return node
+    return None
+
+
+def _from_json_ld(payloads: List[Any], item_id: Optional[str] = None) -> Dict[str, Any]:
+    """Map the page's schema.org Product node and a BreadcrumbList to product fields"""
+    fields = {}
+    node = _find_json_ld_product(payloads, item_id)
+    if node is not None:
+        offers = node.get('offers')
+        if isinstance(offers, list):
+            offers = offers[0] if offers else {}
+        offers = offers if isinstance(offers, dict) else {}
+        condition = _first(node, ('itemCondition',)) or _first(offers, ('itemCondition',))
+        # schema.org enum URLs do not match the page's own condition labels
+        if isinstance(condition, str) and condition.startswith('http'):
+            condition = None
+        like_count = None
+        stats = node.get('interactionStatistic')
+        for stat in stats if isinstance(stats, list) else [stats]:
+            if isinstance(stat, dict) and 'Like' in str(stat.get('interactionType', '')):
+                like_count = _to_int(stat.get('userInteractionCount'))
+        candidates = {
+            'name': node.get('name'),
+            'price': _to_int(_first(offers, ('price',), ('lowPrice',))),
+            'condition': condition,
+            'seller_name': _first(offers, ('seller', 'name')),
+            'like_count': like_count,
+            'image_url': _image_from(node.get('image')),
+            'description': node.get('description'),
+        }
+        fields.update({key: value for key, value in candidates.items() if value not in (None, '')})
+    for payload in payloads:
+        for node in _walk(payload):
+            if _is_type(node, 'BreadcrumbList'):
+                items = node.get('itemListElement') or []
+                ordered = sorted(
+                    (i for i in items if isinstance(i, dict)),
+                    key=lambda i: _to_int(i.get('position')) or 0,
+                )
+                path = [_first(i, ('name',), ('item', 'name')) for i in ordered]
+                path = [p for p in path if isinstance(p, str) and p.strip()]
+                if path:
+                    fields['category_path'] = path
+                    return fields
+    return fields
+
+
+def _is_product_node(node: Any) -> bool:
+    return isinstance(node, dict) and isinstance(node.get('name'), str) and 'price' in node
+
+
+def _node_id(node: dict) -> Optional[str]:
+    node_id = node.get('id') or node.get('productId')
+    return str(node_id) if node_id else None
+
+
+def _find_next_data_product(payload: Any, item_id: Optional[str]) -> Optional[dict]:
+    """The page's own product: from a known path, else the product-like object with the URL's item id.
+
+    Item pages also embed related and recommended items, so the search
+    never settles for an object whose id cannot be checked against the URL.
+    """
+    for path in NEXT_DATA_PRODUCT_PATHS:
+        node = _get(payload, *path)
+        if _is_product_node(node) and (item_id is None or _node_id(node) in (None, item_id)):
+            return node
+    if item_id is None:
+        return None
+    for node in _walk(payload):
+        if _is_product_node(node) and _node_id(node) == item_id:
+            return node
+    return None
+
+
+def _from_next_data(payload: Any, item_id: Optional[str] = None) -> Dict[str, Any]:
+    """Map the page's product in __NEXT_DATA__ to product fields"""
+    node = _find_next_data_product(payload, item_id)
+    if node is None:
+        return {}
+    detail = node.get('productDetail') if isinstance(node.get('productDetail'), dict) else {}
+
+    category_path = None
+    item_category = node.get('item_category') or node.get('itemCategory')
+    if isinstance(item_category, dict):
+        category_path = [
+            c for c in (
+                item_category.get('root_category_name') or item_category.get('rootCategoryName'),
+                item_category.get('parent_category_name') or item_category.get('parentCategoryName'),
+                item_category.get('name'),
+            ) if c
+        ]
+    elif isinstance(detail.get('categories'), list):
+        category_path = [
+            c.get('displayName') or c.get('name')
+            for c in detail['categories'] if isinstance(c, dict)
+        ]
+        category_path = [c for c in category_path if c]
+
+    return {
+        'name': node.get('name'),
+        'price': _to_int(node.get('price')),
+        'category_path': category_path or None,
+        'condition': _first(
+            node, ('item_condition', 'name'), ('itemCondition', 'name'),
+        ) or _first(detail, ('condition', 'displayName'), ('condition', 'name')),
+        'seller_name': _first(
+            node, ('seller', 'name'), ('shop', 'displayName'), ('shop', 'name'),
+        ),
+        'like_count': _to_int(_first(node, ('num_likes',), ('numLikes',), ('likeCount',))),
+        'image_url': _image_from(
+            _first(node, ('photos',), ('thumbnails',)) or _first(detail, ('photos',))
+        ),
+        'description': node.get('description') or detail.get('description'),
+    }
+
+
+def extract_embedded_product(html: str, item_id: Optional[str] = None) -> Dict[str, Any]:
+    """Read product fields from JSON payloads embedded in the page.
+
+    __NEXT_DATA__ is preferred; JSON-LD fills whatever it leaves empty.
+    item_id (from the page URL) identifies the product among the items the
+    page embeds. Only non-empty fields are returned.
+    """
+    fields = {}
+
+    match = NEXT_DATA_PATTERN.search(html)
+    if match:
+        payload = _load_json(match.group(1))
+        if payload is not None:
+            fields.update({k: v for k, v in _from_next_data(payload, item_id).items() if v not in (None, '', [])})
+
+    json_ld = [p for p in (_load_json(raw) for raw in JSON_LD_PATTERN.findall(html)) if p is not None]
+    for key, value in _from_json_ld(json_ld, item_id).items():
+        if key not in fields and value not in (None, '', []):
+            fields[key] = value
+
+    return fields
+
+
+class FieldSourceStats:
+    """Counts which extraction path produced each field during a run"""
+
+    def __init__(self):
+        self.counts: Dict[str, Dict[str, int]] = {}
+        self.pages = 0
+        self.dom_pages = 0
+        self.json_seconds = 0.0
+        self.dom_seconds = 0.0
+
+    def record(self, field_sources: Dict[str, str], json_seconds: float, dom_seconds: float):
+        """Record one page's field sources ('json', 'dom' or 'missing')"""
+        self.pages += 1
+        if dom_seconds:
+            self.dom_pages += 1
+        self.json_seconds += json_seconds
+        self.dom_seconds += dom_seconds
+        for field, source in field_sources.items():
+            per_field = self.counts.setdefault(field, {})
+            per_field[source] = per_field.get(source, 0) + 1
+
+    def print_summary(self):
+        """Print per-field source counts, fallback rate and parse time"""
+        if not self.pages:
+            return
+        print("🧩 Field sources (json / dom / missing):")
+        for field in sorted(self.counts):
+            per_field = self.counts[field]
+            print(
+                f"   {field}: {per_field.get('json', 0)} / "
+                f"{per_field.get('dom', 0)} / {per_field.get('missing', 0)}"
+            )
+        print(f"   DOM fallback rate: {self.dom_pages / self.pages * 100:.1f}% of pages")
+        print(
+            f"   Parse time: json {self.json_seconds / self.pages * 1000:.1f}ms/page, "
+            f"dom {self.dom_seconds / self.pages * 1000:.1f}ms/page"
+        )
+
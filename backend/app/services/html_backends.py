@@ -0,0 +1,217 @@
+import re
+from typing import Callable, Dict, List, Sequence
+
+import soupsieve
+import soupsieve.css_match
+from bs4 import BeautifulSoup, NavigableString, Tag
+
+
+class ParserBackend:
+    """Minimal DOM interface used by the scraper's field extractors.
+
+    Every backend must return identical results for the same page; see
+    app/scripts/check_parser_parity.py.
+    """
+
+    name = None
+
+    # Whether compiled selectors can be matched node by node during a single
+    # document traversal (see ExtractionPlan)
+    supports_single_pass = False
+
+    def parse(self, html: str):
+        raise NotImplementedError
+
+    def compile(self, selector: str):
+        """Precompile a CSS selector for repeated matching"""
+        return selector
+
+    def bind(self, compiled, doc) -> Callable:
+        """Return a node matcher for compiled, specialised to one document"""
+        return lambda node: self.matches(compiled, node)
+
+    def matches(self, compiled, node) -> bool:
+        raise NotImplementedError
+
+    def tag_name(self, node) -> str:
+        raise NotImplementedError
+
+    def iter_document(self, doc):
+        """Yield (element, None) for elements and (parent, string) for text, in document order"""
+        raise NotImplementedError
+
+    def select_one(self, doc, selector: str):
+        raise NotImplementedError
+
+    def select(self, doc, selector: str) -> list:
+        raise NotImplementedError
+
+    def text(self, node) -> str:
+        """Concatenated descendant text with each text node stripped"""
+        raise NotImplementedError
+
+    def attr(self, node, name: str, default: str = '') -> str:
+        raise NotImplementedError
+
+    def find_text_parent(self, doc, pattern: re.Pattern):
+        """Parent element of the first text node matching pattern"""
+        raise NotImplementedError
+
+    def descendants(self, node, tags: Sequence[str]) -> list:
+        """Descendant elements with one of the given tag names, in document order"""
+        raise NotImplementedError
+
+
+class BeautifulSoupBackend(ParserBackend):
+    """BeautifulSoup with a configurable tree builder"""
+
+    supports_single_pass = True
+
+    def __init__(self, features: str):
+        self.name = features
+        self.features = features
+
+    def parse(self, html: str):
+        return BeautifulSoup(html, self.features)
+
+    def compile(self, selector: str):
+        return soupsieve.compile(selector)
+
+    def bind(self, compiled, doc) -> Callable:
+        # SoupSieve.match() rebuilds its match state (root lookup, caches) on
+        # every call; select() builds it once per document, so do the same
+        try:
+            return soupsieve.css_match.CSSMatch(
+                compiled.selectors, doc, compiled.namespaces, compiled.flags
+            ).match
+        except (AttributeError, TypeError):
+            return compiled.match
+
+    def matches(self, compiled, node) -> bool:
+        return compiled.match(node)
+
+    def tag_name(self, node) -> str:
+        return node.name
+
+    def iter_document(self, doc):
+        for node in doc.descendants:
+            if isinstance(node, Tag):
+                yield node, None
+            elif isinstance(node, NavigableString):
+                yield node.parent, node
+
+    def select_one(self, doc, selector: str):
+        return doc.select_one(selector)
+
+    def select(self, doc, selector: str) -> list:
+        return doc.select(selector)
+
+    def text(self, node) -> str:
+        return node.get_text(strip=True)
+
+    def attr(self, node, name: str, default: str = '') -> str:
+        return node.get(name, default)
+
+    def find_text_parent(self, doc, pattern: re.Pattern):
+        element = doc.find(string=pattern)
+        return element.parent if element is not None else None
+
+    def descendants(self, node, tags: Sequence[str]) -> list:
+        return node.find_all(list(tags), recursive=True)
+
+
+class SelectolaxBackend(ParserBackend):
+    """Lexbor-based parser and CSS engine from selectolax (C-accelerated)"""
+
+    name = 'selectolax'
+
+    # Text inside these elements is not part of BeautifulSoup's get_text()
+    SKIPPED_TEXT_PARENTS = ('script', 'style', 'template')
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self.parser_class = LexborHTMLParser
+
+    def parse(self, html: str):
+        return self.parser_class(html)
+
+    def tag_name(self, node) -> str:
+        return node.tag
+
+    def select_one(self, doc, selector: str):
+        return doc.css_first(selector)
+
+    def select(self, doc, selector: str) -> list:
+        return doc.css(selector)
+
+    def _text_nodes(self, node):
+        # Like BeautifulSoup, a script/style element yields only its own text,
+        # and any other element skips text nested inside script/style
+        own_text_only = node.tag in self.SKIPPED_TEXT_PARENTS
+        for child in node.traverse(include_text=True):
+            if child.tag == '-text':
+                parent = child.parent
+                if not own_text_only and parent is not None and parent.tag in self.SKIPPED_TEXT_PARENTS:
+                    continue
+                yield child
+
+    def text(self, node) -> str:
+        return ''.join(t.text_content.strip() for t in self._text_nodes(node))
+
+    @staticmethod
+    def _string_content(node) -> str:
+        """Text of a text or comment node"""
+        if node.tag == '-comment':
+            content = getattr(node, 'comment_content', None)
+            if content is None:
+                content = (node.html or '').removeprefix('<!--').removesuffix('-->')
+            return content
+        return node.text_content
+
+    def attr(self, node, name: str, default: str = '') -> str:
+        value = node.attributes.get(name, default)
+        return default if value is None else value
+
+    def find_text_parent(self, doc, pattern: re.Pattern):
+        root = doc.root
+        if root is None:
+            return None
+        # BeautifulSoup's find(string=...) also matches script text and comments
+        for child in root.traverse(include_text=True):
+            if child.tag in ('-text', '-comment') and pattern.search(self._string_content(child) or ''):
+                return child.parent
+        return None
+
+    def descendants(self, node, tags: Sequence[str]) -> list:
+        wanted = set(tags)
+        return [child for child in node.traverse() if child is not node and child.tag in wanted]
+
+
+PARSER_BACKENDS: Dict[str, Callable[[], ParserBackend]] = {
+    'html.parser': lambda: BeautifulSoupBackend('html.parser'),
+    'lxml': lambda: BeautifulSoupBackend('lxml'),
+    'selectolax': SelectolaxBackend,
+}
+
+
+def get_parser_backend(name: str) -> ParserBackend:
+    """Create the parser backend registered under name"""
+    try:
+        factory = PARSER_BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown HTML parser backend '{name}', expected one of: {', '.join(PARSER_BACKENDS)}"
+        )
+    return factory()
+
+
+def available_backends() -> List[str]:
+    """Names of backends whose dependencies are installed"""
+    names = []
+    for name in PARSER_BACKENDS:
+        try:
+            get_parser_backend(name).parse('<p></p>')
+        except Exception:
+            continue
+        names.append(name)
+    return names
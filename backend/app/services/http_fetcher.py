@@ -0,0 +1,126 @@
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+
+
+@dataclass
+class FetchStats:
+    """Outcome counts for product pages fetched without the browser"""
+    fetched: int = 0
+    errors: int = 0
+    escalated: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+    @property
+    def attempted(self) -> int:
+        return self.fetched + self.errors
+
+
+class HttpFetcher:
+    """Fetch product HTML over a pooled keep-alive HTTP client.
+
+    Much cheaper than a Chromium navigation, but only pages that ship the
+    product in their initial HTML parse completely; the scraper escalates
+    the rest to the browser.
+    """
+
+    def __init__(
+        self,
+        user_agent: str,
+        max_connections: int = 16,
+        timeout_ms: int = 15000,
+        http2: bool = True,
+        rate_limiter=None,
+    ):
+        self.user_agent = user_agent
+        self.max_connections = max_connections
+        self.timeout_ms = timeout_ms
+        self.http2 = http2
+        # Shared RateLimiter: each request takes a token and reports back
+        self.rate_limiter = rate_limiter
+        self.client: Optional[httpx.AsyncClient] = None
+        self.stats = FetchStats()
+
+    async def start(self):
+        """Open the connection pool"""
+        if self.client is not None:
+            return
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+            keepalive_expiry=30,
+        )
+        headers = {
+            "User-Agent": self.user_agent,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "ja,en-US;q=0.8,en;q=0.6",
+        }
+        timeout = httpx.Timeout(self.timeout_ms / 1000)
+        try:
+            self.client = httpx.AsyncClient(
+                http2=self.http2, limits=limits, headers=headers, timeout=timeout, follow_redirects=True
+            )
+        except ImportError:
+            # HTTP/2 needs the optional h2 package
+            print("   Warning: h2 is not installed, HTTP fetcher falls back to HTTP/1.1")
+            self.client = httpx.AsyncClient(
+                limits=limits, headers=headers, timeout=timeout, follow_redirects=True
+            )
+
+    async def close(self):
+        """Close the connection pool"""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def reset(self) -> FetchStats:
+        """Start a new run and return the previous run's stats"""
+        previous, self.stats = self.stats, FetchStats()
+        return previous
+
+    async def fetch(self, url: str) -> Optional[str]:
+        """Return the page HTML, or None when the request fails"""
+        await self.start()
+        if self.rate_limiter:
+            await self.rate_limiter.acquire()
+        start = time.monotonic()
+        try:
+            response = await self.client.get(url)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            if self.rate_limiter and isinstance(e, httpx.HTTPStatusError):
+                # Error statuses never count as clean responses
+                self.rate_limiter.record_response(e.response.status_code, (time.monotonic() - start) * 1000)
+            elif self.rate_limiter and isinstance(e, httpx.TimeoutException):
+                self.rate_limiter.record_timeout()
+            elif self.rate_limiter and isinstance(e, httpx.TransportError):
+                self.rate_limiter.throttle('connection_error')
+            self.stats.errors += 1
+            print(f"   Warning: HTTP fetch failed for {url}: {e}")
+            return None
+        finally:
+            self.stats.seconds += time.monotonic() - start
+        if self.rate_limiter:
+            self.rate_limiter.record_response(response.status_code, (time.monotonic() - start) * 1000)
+        self.stats.fetched += 1
+        self.stats.bytes += len(response.content)
+        return response.text
+
+    def print_summary(self):
+        """Print fetch counts, latency and how often the browser was needed"""
+        stats = self.stats
+        if not stats.attempted:
+            return
+        print("🌐 HTTP fetcher:")
+        print(
+            f"   Fetched: {stats.fetched}, errors: {stats.errors}, "
+            f"avg {stats.seconds / stats.attempted * 1000:.0f}ms/page, "
+            f"{stats.bytes / 1024 / 1024:.1f}MB"
+        )
+        print(
+            f"   Escalated to browser: {stats.escalated}/{stats.attempted} "
+            f"({stats.escalated / stats.attempted * 100:.1f}%)"
+        )
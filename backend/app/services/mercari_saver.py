@@ -1,16 +1,37 @@
 from playwright.async_api import async_playwright
-from bs4 import BeautifulSoup
 import json
+import hashlib
 import re
-from urllib.parse import urljoin
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 import time
+import multiprocessing
 import os
 import sys
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 import asyncio
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from urllib.parse import urljoin
+from app.core.config import settings
+from app.db.indexes import INDEXES, reconcile_indexes
+from app.services.resource_blocker import ResourceBlocker
+from app.services.wait_strategy import WaitStrategy
+from app.services.embedded_data import FieldSourceStats
+from app.services.selector_stats import SelectorStats
+from app.services.http_fetcher import HttpFetcher
+from app.services.scrape_pipeline import PipelineStats, ScrapePipeline
+from app.services.crawl_frontier import CrawlFrontier
+from app.services.revisit_scheduler import RevisitPolicy, RevisitScheduler
+from app.services.sharded_discovery import ShardedDiscovery
+from app.services.rate_limiter import RateLimiter
+from app.services.browser_recycler import BrowserRecycler
+from app.services.retry_policy import (
+    CircuitBreaker, FetchError, Retrier, RetryBudget, RetryPolicy, classify_error, is_retryable,
+)
+from app.services.product_parser import ParseResult, ProductParser, init_parse_worker, parse_product_page
 
 print("Starting Mercari Scraper...")
 
@@ -30,51 +51,344 @@ class ProductData:
     created_at: datetime = None
     updated_at: datetime = None
 
+    # Fields that come from the page; timestamps and the hash itself are excluded
+    SCRAPED_FIELDS = (
+        'id', 'name', 'price', 'price_text', 'url', 'image_url', 'category',
+        'condition', 'seller_name', 'description', 'like_count',
+    )
+
+    def scraped_fields(self) -> dict:
+        return {field: getattr(self, field) for field in self.SCRAPED_FIELDS}
+
+    def content_hash(self) -> str:
+        """Stable hash of the scraped fields, used to skip unchanged writes"""
+        payload = json.dumps(self.scraped_fields(), sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
 class FixedMercariScraper:
-    def __init__(self, mongo_client: AsyncIOMotorClient = None):
+    # Fields that must be rendered before a detail page is parsed
+    REQUIRED_READY_FIELDS = ('name', 'price')
+    FETCH_MODES = ('browser', 'http')
+    LOAD_MORE_SELECTORS = ('button:has-text("もっと見る")', 'button:has-text("Load more")')
+    # Return hrefs of links not returned by an earlier call, in document order
+    NEW_LINKS_SCRIPT = """sel => {
+        const hrefs = [];
+        for (const link of document.querySelectorAll(sel)) {
+            if (link.dataset.scraperSeen) continue;
+            link.dataset.scraperSeen = '1';
+            const href = link.getAttribute('href');
+            if (href) hrefs.push(href);
+        }
+        return hrefs;
+    }"""
+
+    def __init__(
+        self,
+        mongo_client: AsyncIOMotorClient = None,
+        concurrency: int = None,
+        parser: str = None,
+        fetch_mode: str = None,
+        browser_pool=None,
+        parse_pool: ProcessPoolExecutor = None,
+    ):
         print("Initializing scraper...")
         self.base_url = "https://jp.mercari.com"
-        self.all_products = []
+        self.parser_name = parser or settings.SCRAPER_HTML_PARSER
+        self.product_parser = ProductParser(self.parser_name, self.base_url)
+        # Process pool for CPU-bound parsing, sized to the number of cores;
+        # the API passes its app-lifetime pool, otherwise one is made per browser session
+        self.parse_workers = settings.SCRAPER_PARSE_WORKERS or os.cpu_count() or 1
+        self.parse_pool: Optional[ProcessPoolExecutor] = parse_pool
+        self.owns_parse_pool = parse_pool is None
         self.playwright = None
         self.browser = None
         self.page = None
+        # Pages that read ranking/search listings, one per discovery shard worker,
+        # all in one context (unless leased from the pool)
+        self.collector_context = None
+        self.collector_pages = []
+        self.discovery: Optional[ShardedDiscovery] = None
+        # One request budget for listing and product page fetches,
+        # adapting its rate to throttling signals (AIMD)
+        self.rate_limiter = RateLimiter(
+            settings.SCRAPER_RATE_PER_SECOND,
+            settings.SCRAPER_RATE_BURST,
+            min_rate=settings.SCRAPER_RATE_MIN_PER_SECOND,
+            max_rate=settings.SCRAPER_RATE_MAX_PER_SECOND,
+            increase_step=settings.SCRAPER_RATE_INCREASE_STEP,
+            decrease_factor=settings.SCRAPER_RATE_DECREASE_FACTOR,
+            slow_ms=settings.SCRAPER_RATE_SLOW_MS,
+        )
+        # Backoff, per-run retry budget and circuit breaker for every navigation
+        self.retrier = Retrier(
+            RetryPolicy(
+                max_attempts=settings.SCRAPER_RETRY_MAX_ATTEMPTS,
+                base_delay=settings.SCRAPER_RETRY_BASE_DELAY_MS / 1000,
+                max_delay=settings.SCRAPER_RETRY_MAX_DELAY_MS / 1000,
+            ),
+            RetryBudget(settings.SCRAPER_RETRY_BUDGET),
+            CircuitBreaker(
+                window=settings.SCRAPER_BREAKER_WINDOW,
+                failure_rate=settings.SCRAPER_BREAKER_FAILURE_RATE,
+                pause_seconds=settings.SCRAPER_BREAKER_PAUSE_SECONDS,
+            ),
+        )
+        # Pool of browser contexts/pages used for detail extraction
+        self.concurrency = max(1, concurrency or settings.SCRAPER_CONCURRENCY)
+        self.contexts = []
+        self.page_pool: Optional[asyncio.Queue] = None
+        self.worker_failures = {}
+        # Replaces contexts after N navigations or when RSS grows too large
+        self.recycler = BrowserRecycler(
+            max_navigations=settings.SCRAPER_RECYCLE_NAVIGATIONS,
+            max_rss_mb=settings.SCRAPER_RECYCLE_RSS_MB,
+            min_navigations=settings.SCRAPER_RECYCLE_MIN_NAVIGATIONS,
+            check_seconds=settings.SCRAPER_MEMORY_CHECK_SECONDS,
+        )
+        # Abort images, fonts, media and trackers the scraper never needs
+        self.resource_blocker = None
+        if settings.SCRAPER_BLOCK_RESOURCES:
+            self.resource_blocker = ResourceBlocker.from_settings(settings)
+        self.wait_strategy = WaitStrategy(
+            pct=settings.SCRAPER_WAIT_PERCENTILE,
+            headroom=settings.SCRAPER_WAIT_HEADROOM,
+            min_timeout_ms=settings.SCRAPER_WAIT_MIN_TIMEOUT_MS,
+        )
+        self.field_source_stats = FieldSourceStats()
+        # Shared warm browser (API jobs): pages are leased instead of launched,
+        # and the pool's blocker and recycler apply to them
+        self.browser_pool = browser_pool
+        if browser_pool is not None:
+            self.resource_blocker = browser_pool.resource_blocker
+            self.recycler = browser_pool.recycler
+        # Browserless fetching of product pages; the browser is only the fallback
+        self.fetch_mode = self.check_fetch_mode(fetch_mode or settings.SCRAPER_FETCH_MODE)
+        self.http_fetcher = HttpFetcher(
+            user_agent=settings.SCRAPER_USER_AGENT,
+            max_connections=settings.SCRAPER_HTTP_CONCURRENCY,
+            timeout_ms=settings.SCRAPER_HTTP_TIMEOUT_MS,
+            http2=settings.SCRAPER_HTTP2,
+            rate_limiter=self.rate_limiter,
+        )
+        self.ready_selectors = {
+            'name': ProductParser.NAME_SELECTORS,
+            'price': ProductParser.PRICE_SELECTORS,
+            'category': [ProductParser.BREADCRUMB_SELECTOR] + ProductParser.CATEGORY_SELECTORS,
+            'condition': ProductParser.CONDITION_SELECTORS,
+            'seller': ProductParser.SELLER_SELECTORS,
+            'description': ProductParser.DESCRIPTION_SELECTORS,
+            'like': ProductParser.LIKE_SELECTORS,
+        }
         # Initialize MongoDB connection
         if mongo_client is not None:
             self.db = mongo_client.mercari_search
             self.products_collection = self.db.products
+            self.changes_collection = self.db.product_changes if settings.SCRAPER_RECORD_CHANGES else None
         else:
             self.db = None
             self.products_collection = None
+            self.changes_collection = None
+        # Persistent, deduplicated queue of product URLs shared across runs
+        self.frontier = None
+        if self.db is not None and settings.SCRAPER_FRONTIER_ENABLED:
+            # Completed URLs come due again based on rank, volatility and last change
+            scheduler = None
+            if settings.SCRAPER_REVISIT_ENABLED:
+                scheduler = RevisitScheduler(
+                    RevisitPolicy.from_settings(settings),
+                    self.db.crawl_frontier,
+                    self.products_collection,
+                    self.changes_collection,
+                )
+            self.frontier = CrawlFrontier(
+                self.db.crawl_frontier,
+                lease_seconds=settings.SCRAPER_FRONTIER_LEASE_SECONDS,
+                max_attempts=settings.SCRAPER_FRONTIER_MAX_ATTEMPTS,
+                scheduler=scheduler,
+                retry_policy=RetryPolicy(
+                    base_delay=settings.SCRAPER_FRONTIER_RETRY_BASE_SECONDS,
+                    max_delay=settings.SCRAPER_FRONTIER_RETRY_MAX_SECONDS,
+                ),
+            )
+        # Hit/miss counters that move never-matching selectors to the back of their chain
+        self.selector_stats = None
+        self.selector_order = None
+        if settings.SCRAPER_ADAPTIVE_SELECTORS:
+            self.selector_stats = SelectorStats(
+                collection=self.db.selector_stats if self.db is not None else None,
+                path=settings.SCRAPER_SELECTOR_STATS_FILE,
+                decay=settings.SCRAPER_SELECTOR_STATS_DECAY,
+            )
     
+    def check_fetch_mode(self, fetch_mode: str) -> str:
+        if fetch_mode not in self.FETCH_MODES:
+            raise ValueError(f"Unknown fetch mode '{fetch_mode}', expected one of: {', '.join(self.FETCH_MODES)}")
+        return fetch_mode
+
     async def start_browser(self):
         """Start the browser with optimized settings"""
         try:
-            print("Starting browser...")
-            self.playwright = await async_playwright().start()
-            print("Playwright started successfully")
-            
-            self.browser = await self.playwright.chromium.launch(
-                headless=True,
-                args=['--no-sandbox', '--disable-dev-shm-usage']
-            )
-            print("Browser launched successfully")
-            
-            self.page = await self.browser.new_page()
-            print("New page created")
-            
-            await self.page.set_extra_http_headers({
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            })
+            if self.browser_pool is not None:
+                # Lease warm pages from the shared pool instead of launching Chromium
+                await self.browser_pool.start()
+                await self.open_collector_pages()
+                await self.open_page_pool()
+                print("Leased pages from the browser pool")
+            else:
+                print("Starting browser...")
+                self.playwright = await async_playwright().start()
+                print("Playwright started successfully")
+                
+                await self.launch_browser()
+            
+            if self.parse_pool is None:
+                # Spawned, not forked: Motor and Playwright already run threads
+                self.parse_pool = ProcessPoolExecutor(
+                    max_workers=self.parse_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=init_parse_worker,
+                    initargs=(self.parser_name,),
+                )
+                print(f"Parse pool ready ({self.parse_workers} processes)")
             print("Browser setup complete")
             
         except Exception as e:
             print(f"Error starting browser: {str(e)}")
             raise
     
-    async def close_browser(self):
-        """Close the browser"""
+    async def launch_browser(self):
+        """Launch Chromium with the collector pages and the worker page pool"""
+        self.browser = await self.playwright.chromium.launch(
+            headless=True,
+            args=['--no-sandbox', '--disable-dev-shm-usage']
+        )
+        print("Browser launched successfully")
+        
+        await self.open_collector_pages()
+        print("New page created")
+        
+        await self.open_page_pool()
+    
+    async def open_page_pool(self):
+        """Create one isolated context per worker for detail extraction"""
+        self.contexts = [None] * self.concurrency
+        self.page_pool = asyncio.Queue()
+        for worker_id in range(self.concurrency):
+            await self.page_pool.put((worker_id, await self.open_worker_page(worker_id)))
+        print(f"Page pool ready ({self.concurrency} workers)")
+    
+    async def open_collector_pages(self):
+        """Open the listing pages, which share one context (one context each when pooled)"""
+        collectors = max(1, settings.SCRAPER_COLLECTOR_CONCURRENCY)
+        if self.browser_pool is not None:
+            self.collector_pages = [await self.browser_pool.acquire() for _ in range(collectors)]
+            self.page = self.collector_pages[0]
+            return
+        # Pages from browser.new_page() own their context and cannot share it,
+        # so the listing context is created explicitly
+        self.collector_context = await self.browser.new_context(user_agent=settings.SCRAPER_USER_AGENT)
+        if self.resource_blocker:
+            await self.resource_blocker.attach(self.collector_context)
+        self.collector_pages = [await self.collector_context.new_page() for _ in range(collectors)]
+        self.page = self.collector_pages[0]
+    
+    async def open_worker_page(self, worker_id: int):
+        """Open a fresh context and page for a detail worker"""
+        if self.browser_pool is not None:
+            return await self.browser_pool.acquire()
+        context = await self.browser.new_context(user_agent=settings.SCRAPER_USER_AGENT)
+        if self.resource_blocker:
+            await self.resource_blocker.attach(context)
+        page = await context.new_page()
+        self.contexts[worker_id] = context
+        return page
+    
+    async def recycle_worker_page(self, worker_id: int, page):
+        """Swap a worker's context for a fresh one when the recycler says so.
+
+        Called between URLs, so nothing is in flight on the old page. The new
+        context is opened before the old one is closed; if that fails the
+        worker keeps its current page.
+        """
+        context = getattr(page, 'context', None)
+        reason = self.recycler.recycle_reason(context)
+        if reason is None:
+            return page
+        if self.browser_pool is not None:
+            # The pool closes and logs the worn-out context on release
+            await self.browser_pool.release(page)
+            return await self.browser_pool.acquire()
+        if self.browser is None:
+            return page
+        before = self.recycler.snapshot(fresh=True)
+        try:
+            new_page = await self.open_worker_page(worker_id)
+        except Exception as e:
+            print(f"   Warning: Could not recycle worker {worker_id} context: {e}")
+            return page
+        try:
+            await context.close()
+        except Exception as e:
+            print(f"   Warning: Could not close old context for worker {worker_id}: {e}")
+        self.recycler.recycled(context, reason, f"worker {worker_id} context", before)
+        return new_page
+    
+    async def recycle_between_runs(self):
+        """Recycle the collector context, and restart Chromium if memory stays high.
+
+        Runs before a scrape starts, while no page is in use.
+        """
+        if self.browser is None or self.collector_context is None:
+            # Pooled pages are recycled by the pool as they are returned
+            return
+        context = self.collector_context
+        reason = self.recycler.recycle_reason(context)
+        if reason is not None:
+            before = self.recycler.snapshot(fresh=True)
+            # Closing the context closes every collector page with it
+            await context.close()
+            self.collector_context = None
+            await self.open_collector_pages()
+            self.recycler.recycled(context, reason, "collector context", before)
+        if self.recycler.over_limit(fresh=True):
+            before = self.recycler.snapshot()
+            await self.shutdown_browser()
+            await self.launch_browser()
+            self.recycler.restarted(before)
+    
+    async def shutdown_browser(self):
+        """Close every context and the Chromium process, or return pooled pages"""
+        if self.browser_pool is not None:
+            pages = list(self.collector_pages)
+            while self.page_pool is not None and not self.page_pool.empty():
+                pages.append(self.page_pool.get_nowait()[1])
+            for page in pages:
+                await self.browser_pool.release(page)
+            self.page_pool = None
+            self.page = None
+            self.collector_pages = []
+            return
+        for context in [self.collector_context] + self.contexts:
+            if context is not None:
+                await context.close()
+                self.recycler.forget(context)
+        self.contexts = []
+        self.page_pool = None
+        self.collector_context = None
+        self.page = None
+        self.collector_pages = []
         if self.browser:
             await self.browser.close()
+            self.browser = None
+    
+    async def close_browser(self):
+        """Close the browser"""
+        await self.http_fetcher.close()
+        if self.parse_pool and self.owns_parse_pool:
+            # Waiting for workers to exit would block the event loop
+            await asyncio.get_running_loop().run_in_executor(None, self.parse_pool.shutdown)
+            self.parse_pool = None
+        await self.shutdown_browser()
         if self.playwright:
             await self.playwright.stop()
     
@@ -89,403 +403,311 @@ class FixedMercariScraper:
             return False
         return True
     
-    def extract_text_safely(self, soup, selectors: List[str], default: str = None) -> Optional[str]:
-        """Safely extract text using multiple selectors with fallbacks"""
-        # Filter out None values from selectors list
-        selectors = [s for s in selectors if s is not None]
-        
-        for selector in selectors:
-            try:
-                # Add null check for selector
-                if selector is None:
-                    continue
-                    
-                if ':contains(' in selector:
-                    # Handle contains selector differently
-                    text_to_find = selector.split(':contains(')[1].split(')')[0].strip('"\'')
-                    elements = soup.find_all(string=re.compile(text_to_find))
-                    if elements:
-                        parent = elements[0].parent
-                        if parent:
-                            result = parent.get_text(strip=True)
-                            if result and result != default:
-                                return result
-                else:
-                    element = soup.select_one(selector)
-                    if element:
-                        result = element.get_text(strip=True)
-                        if result and result != default:
-                            return result
-            except Exception as e:
-                print(f"   Warning: Selector '{selector}' failed: {e}")
-                continue
-        return default
+    async def collect_product_urls(self, limit: int) -> List[str]:
+        """Collect product URLs from the ranking page up to the limit, in rank order"""
+        product_urls = []
+        async for batch in self.iter_listing_urls(f"{self.base_url}/ranking", limit):
+            product_urls.extend(batch)
+        return product_urls
 
-    def extract_attribute_safely(self, soup, selectors: List[str], attribute: str, default: str = None) -> Optional[str]:
-        """Safely extract attribute using multiple selectors"""
-        # Filter out None values from selectors list
-        selectors = [s for s in selectors if s is not None]
-        
-        for selector in selectors:
-            try:
-                # Add null check for selector
-                if selector is None:
-                    continue
-                    
-                element = soup.select_one(selector)
-                if element:
-                    result = element.get(attribute, '')
-                    if result and result != default:
-                        return result
-            except Exception as e:
-                print(f"   Warning: Selector '{selector}' failed: {e}")
-                continue
-        return default
+    async def iter_listing_urls(
+        self,
+        entry_url: str,
+        limit: Optional[int],
+        page=None,
+        seen: set = None,
+        total_limit: int = None,
+    ) -> AsyncIterator[List[str]]:
+        """Yield batches of newly found product URLs from a ranking or search page.
 
-    async def collect_product_urls(self, limit: int) -> List[str]:
-        """Collect product URLs from the ranking page up to the limit"""
-        print(f"🔍 Collecting {limit} product URLs from ranking page...")
+        URLs come out in listing order. Each step reads only links that appeared
+        since the previous step (the page marks links it has already returned),
+        then scrolls or clicks a load-more button. Collection stops after limit
+        new URLs, once seen (which may be shared with other collectors) holds
+        total_limit URLs, or once SCRAPER_SCROLL_IDLE_STEPS steps in a row find
+        nothing new. With no limit the caller decides when to stop.
+        """
+        print(f"🔍 Collecting {limit or 'all'} product URLs from {entry_url}...")
         
-        ranking_url = f"{self.base_url}/ranking"
-        max_retries = 3
+        page = page or self.page
+        seen = seen if seen is not None else set()
+        total_limit = total_limit or limit
+        max_retries = self.retrier.policy.max_attempts
         retry_count = 0
+        found = 0
+
+        def full() -> bool:
+            return (limit is not None and found >= limit) or (total_limit is not None and len(seen) >= total_limit)
+        
+        link_selector = ", ".join(ProductParser.LINK_SELECTORS)
         
         while retry_count < max_retries:
             try:
-                # Try with a longer timeout and different wait strategy
-                await self.page.goto(ranking_url, wait_until="domcontentloaded", timeout=60000)
-                await self.page.wait_for_timeout(5000)  # Additional wait time
-                
-                # Scroll to load more products
-                for _ in range(5):
-                    await self.page.mouse.wheel(0, 2000)
-                    await self.page.wait_for_timeout(2000)
-                
-                # Get the HTML content
-                html_content = await self.page.content()
-                soup = BeautifulSoup(html_content, 'html.parser')
+                # Navigate, then wait only until product links are rendered
+                await self.navigate(page, entry_url, 'navigation:listing', settings.SCRAPER_NAVIGATION_TIMEOUT_MS * 2)
+                await self.wait_strategy.wait_for_selectors(
+                    page, 'listing:links', ProductParser.LINK_SELECTORS, settings.SCRAPER_WAIT_DEFAULT_TIMEOUT_MS
+                )
                 
-                # Find product links using multiple selectors
-                link_selectors = [
-                    'a[data-testid="thumbnail-link"]',
-                    'a[href*="/item/"]',
-                    'a[href*="/product/"]',
-                    'a[href*="/shops/product/"]',
-                    'a[class*="ranking-item"]',
-                    'a[class*="ranking-product"]'
-                ]
-                
-                item_links = []
-                for selector in link_selectors:
-                    links = soup.select(selector)
-                    item_links.extend(links)
-                
-                # Remove duplicates and create URLs
-                unique_hrefs = list(set([link.get('href') for link in item_links if link.get('href')]))
-                page_urls = [urljoin(self.base_url, href) for href in unique_hrefs]
+                idle_steps = 0
+                for _ in range(settings.SCRAPER_MAX_SCROLL_STEPS):
+                    hrefs = await page.evaluate(self.NEW_LINKS_SCRIPT, link_selector)
+                    batch = []
+                    for href in hrefs:
+                        url = urljoin(self.base_url, href)
+                        if url not in seen and not full():
+                            seen.add(url)
+                            batch.append(url)
+                            found += 1
+                    if batch:
+                        idle_steps = 0
+                        yield batch
+                    if full():
+                        break
+                    
+                    # Load more products, stopping once several steps add nothing
+                    count = await page.evaluate(
+                        "sel => document.querySelectorAll(sel).length", link_selector
+                    )
+                    await self.rate_limiter.acquire()
+                    await page.mouse.wheel(0, 2000)
+                    grew = await self.wait_strategy.wait_for_growth(
+                        page, 'listing:scroll', link_selector, count, settings.SCRAPER_SCROLL_TIMEOUT_MS
+                    )
+                    if not grew and await self.click_load_more(page):
+                        grew = await self.wait_strategy.wait_for_growth(
+                            page, 'listing:load_more', link_selector, count,
+                            settings.SCRAPER_WAIT_DEFAULT_TIMEOUT_MS
+                        )
+                    if not grew and not batch:
+                        idle_steps += 1
+                        if idle_steps >= settings.SCRAPER_SCROLL_IDLE_STEPS:
+                            break
                 
-                if page_urls:
-                    print(f"✅ Successfully collected {len(page_urls)} URLs")
-                    return page_urls[:limit]
+                if found:
+                    print(f"✅ Successfully collected {found} URLs from {entry_url}")
+                    if limit is not None and not full():
+                        print(f"⚠️ {entry_url} ran out after {found} of {limit} URLs")
+                    return
                 
                 retry_count += 1
-                print(f"⚠️ No URLs found, retrying ({retry_count}/{max_retries})...")
-                await self.page.wait_for_timeout(5000)  # Wait before retry
+                print(f"⚠️ No URLs found on {entry_url}")
                 
             except Exception as e:
+                if found:
+                    # URLs already streamed downstream; stop rather than start over
+                    print(f"⚠️ Error collecting URLs from {entry_url} after {found} found: {str(e)}")
+                    return
+                kind = classify_error(e)
+                print(f"⚠️ Error collecting URLs ({kind}): {str(e)}")
+                if not is_retryable(kind):
+                    # A permanent error (e.g. a 404 listing) is not worth another pass
+                    break
                 retry_count += 1
-                print(f"⚠️ Error collecting URLs: {str(e)}")
-                print(f"Retrying ({retry_count}/{max_retries})...")
-                await self.page.wait_for_timeout(5000)  # Wait before retry
+            
+            if retry_count < max_retries:
+                if not self.retrier.budget.take():
+                    print("⚠️ Retry budget exhausted")
+                    break
+                delay = self.retrier.policy.delay(retry_count)
+                print(f"Retrying in {delay:.1f}s ({retry_count}/{max_retries})...")
+                await asyncio.sleep(delay)
         
-        print("❌ Failed to collect URLs after maximum retries")
-        return []
+        print(f"❌ Failed to collect URLs from {entry_url} after maximum retries")
 
-    async def extract_product_details(self, url: str) -> Optional[ProductData]:
+    async def click_load_more(self, page) -> bool:
+        """Click a visible load-more button, if the listing has one"""
+        for selector in self.LOAD_MORE_SELECTORS:
+            button = page.locator(selector).first
+            try:
+                if await button.is_visible():
+                    await button.click(timeout=settings.SCRAPER_SCROLL_TIMEOUT_MS)
+                    return True
+            except Exception:
+                continue
+        return False
+
+    async def extract_product_details(self, url: str, page=None) -> Optional[ProductData]:
         """Extract product details with improved data filtering"""
         try:
-            print(f"📦 Processing: {url}")
-            
-            # Navigate to the page and wait for content to load
-            try:
-                await self.page.goto(url, wait_until="networkidle", timeout=30000)
-                await self.page.wait_for_timeout(3000)  # Increased wait time
-            except Exception as e:
-                print(f"   Warning: Initial page load timeout, retrying with domcontentloaded: {e}")
-                await self.page.goto(url, wait_until="domcontentloaded", timeout=30000)
-                await self.page.wait_for_timeout(3000)
-            
-            # Wait for key elements to be present
+            html_content = await self.fetch_html_with_browser(url, page)
+        except Exception as e:
+            print(f"❌ Error processing {url}: {e}")
+            return None
+        try:
+            result = await self.parse_page(html_content, url)
+        except Exception as e:
+            print(f"❌ Error parsing {url}: {e}")
+            return None
+        return self.validate_product(result, url)
+
+    async def fetch_html_with_browser(self, url: str, page=None) -> str:
+        """Navigate to a product page and return its rendered HTML.
+
+        Navigation errors are retried by navigate(); anything still failing is
+        raised so the caller can classify it.
+        """
+        page = page or self.page
+        print(f"📦 Processing: {url}")
+        
+        # Navigate and wait only for the selectors the field extractors need
+        await self.navigate(page, url, 'navigation:product', settings.SCRAPER_NAVIGATION_TIMEOUT_MS)
+        
+        deadline = self.wait_strategy.deadline_in(settings.SCRAPER_READY_DEADLINE_MS)
+        ready = await self.wait_strategy.wait_for_fields(
+            page, self.ready_selectors, settings.SCRAPER_WAIT_DEFAULT_TIMEOUT_MS, deadline
+        )
+        missing = [f for f in self.REQUIRED_READY_FIELDS if not ready.get(f)]
+        if missing:
+            print(f"   Warning: Fields not ready before deadline: {', '.join(missing)}")
+        
+        html_content = await page.content()
+        if settings.SCRAPER_RECORD_PAGES_DIR:
+            self.record_page(url, html_content)
+        
+        # Print page title for debugging
+        print(f"   Debug - Page title: {await page.title()}")
+        return html_content
+
+    async def navigate(self, page, url: str, key: str, timeout_ms: int):
+        """Rate-limited navigation under the retrier's backoff and circuit breaker.
+
+        The first attempt uses the wait strategy's learned timeout; retries
+        use the full timeout_ms. A timeout under a learned timeout shorter
+        than timeout_ms only means the estimate was too tight, so it falls
+        back to timeout_ms at once without throttling or counting towards
+        the circuit breaker; only failures under the full timeout and error
+        statuses do. Status and latency feed the rate limiter, and error
+        statuses are raised as FetchError so they are classified (429/5xx
+        retried, other 4xx not).
+        """
+        async def attempt_navigation(attempt: int):
+            await self.rate_limiter.acquire()
+            self.recycler.record_navigation(getattr(page, 'context', None))
+            start = time.monotonic()
             try:
-                await self.page.wait_for_selector('h1', timeout=5000)
-            except Exception as e:
-                print(f"   Warning: Could not find h1 element: {e}")
-            
-            html_content = await self.page.content()
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Print page title for debugging
-            print(f"   Debug - Page title: {await self.page.title()}")
-            
-            # Extract item ID from URL with multiple patterns
-            item_id = None
-            id_patterns = [
-                r'/item/([^/?]+)',
-                r'/product/([^/?]+)',
-                r'/shops/product/([^/?]+)'
-            ]
-            
-            for pattern in id_patterns:
-                match = re.search(pattern, url)
-                if match:
-                    item_id = match.group(1)
-                    break
-            
-            # Extract name with updated selectors
-            name_selectors = [
-                'h1[data-testid="product-name"]',
-                'h1[class*="heading"]',
-                'h1[class*="title"]',
-                'h1[class*="name"]',
-                'h1',
-                '[data-testid*="name"]',
-                '.product-name',
-                '.item-name',
-                'span[data-testid="thumbnail-item-name"]'
-            ]
-            
-            name = self.extract_text_safely(soup, name_selectors, 'Unknown')
-            print(f"   Debug - Name found: {name}")
-            
-            # Extract price with updated selectors
-            price_text = '¥0'
-            price = 0
-            
-            price_selectors = [
-                'div[class*="sc-d804af5a-9 bjxcBV mer-spacing-t-8 mer-spacing-b-16"]',
-                'div[class*="sc-c5724afb-0 feUXIG sc-75176d5b-1 knGNCr mer-spacing-r-8"]',
-            ]
-            
-            price_raw = self.extract_text_safely(soup, price_selectors, '0')
-            print(f"   Debug - Raw price found: {price_raw}")
-            
-            if price_raw and price_raw != '0':
-                # Clean price text
-                price_clean = re.sub(r'[^\d,]', '', price_raw)
-                if price_clean:
+                if attempt == 1:
+                    learned_ms = self.wait_strategy.goto_timeout(key, timeout_ms)
                     try:
-                        price = int(price_clean.replace(',', ''))
-                        price_text = f"¥{price_clean}"
-                    except ValueError:
-                        price = 0
-                        price_text = '¥0'
-            
-            print(f"   Debug - Cleaned price: {price_text}")
-            
-            # Extract image with updated selectors and filtering
-            image_selectors = [
-                'img[data-testid="product-image"]',
-                'img[class*="product-image"]',
-                'img[class*="item-image"]',
-                'img[alt*="商品画像"]',
-                'img[alt*="product"]',
-                'img[src*="mercari"]',
-                'img[src*="mercari-shops-static"]',
-                'img[src*="assets.mercari"]',
-                'img'
-            ]
-            
-            # Get all images and filter out tracking pixels
-            all_images = []
-            for selector in image_selectors:
-                try:
-                    images = soup.select(selector)
-                    for img in images:
-                        src = img.get('src', '')
-                        if src and not any(x in src.lower() for x in ['bat.bing.com', 'tracking', 'pixel', 'analytics']):
-                            all_images.append(src)
-                except Exception as e:
-                    print(f"   Warning: Image selector '{selector}' failed: {e}")
-            
-            # Use the first valid image URL
-            image_url = next((url for url in all_images if url), '')
-            print(f"   Debug - Image URL found: {image_url}")
-
-            # --- Improved Category Extraction ---
-            # Get all breadcrumb items and join them
-            breadcrumb = soup.select('nav[aria-label="パンくずリスト"], nav[aria-label="breadcrumb"]')
-            category = None
-            
-            # List of known non-category values to filter out
-            non_category_values = [
-                'iwaki', '松屋', '甲羅組', 'NIKE', 'ネイル工房', 'Lucille', 'SCHICK', 'PIP',
-                'IRIS OHAYAMA', '西川', 'ブランド', 'Brand', '出品者', 'Seller', 'メルカリ', 'Mercari'
-            ]
-            
-            if breadcrumb:
-                items = breadcrumb[0].find_all(['a', 'span', 'div'], recursive=True)
-                categories = [item.get_text(strip=True) for item in items if item.get_text(strip=True)]
-                
-                # Filter out non-category values and empty strings
-                categories = [cat for cat in categories if cat and not any(non_cat.lower() in cat.lower() for non_cat in non_category_values)]
-                
-                if categories:
-                    # Get the second category (main category) if it exists
-                    if len(categories) >= 2:
-                        category = categories[1]  # Second item is the main category
-                    else:
-                        category = categories[0]  # Fallback to first item if only one exists
-            
-            # Fallback: try category-specific selectors
-            if not category:
-                category_selectors = [
-                    'span[class*="merTextLink sc-3acb98-0 dtocME"]',
-                    'a[href="/search?category"]',
-                    'a[data-location="item_details:item_info:category_link"]',
-                    'a[location-2="category_link"]',
-                ]
-                
-                for selector in category_selectors:
-                    found = soup.select(selector)
-                    if found:
-                        links = [link.get_text(strip=True) for link in found if link.get_text(strip=True)]
-                        # Filter out non-category values and empty strings
-                        links = [link for link in links if link and not any(non_cat.lower() in link.lower() for non_cat in non_category_values)]
-                        if links:
-                            # Get the second category if it exists
-                            if len(links) >= 2:
-                                category = links[1]
-                            else:
-                                category = links[0]
-                            break
-            
-            # Additional fallback: try to find category in product details
-            if not category:
-                detail_selectors = [
-                    'div[data-testid="商品の詳細"]',
-                    'div[class*="product-details"]',
-                    'div[class*="item-details"]',
-                    'div[class*="merText"]'
-                ]
-                
-                for selector in detail_selectors:
-                    details = soup.select(selector)
-                    if details:
-                        for detail in details:
-                            text = detail.get_text(strip=True)
-                            if 'カテゴリ' in text:
-                                # Try to extract category after "カテゴリ"
-                                parts = text.split('カテゴリ')
-                                if len(parts) > 1:
-                                    potential_category = parts[1].strip().split('\n')[0].strip()
-                                    # Filter out non-category values and empty strings
-                                    if potential_category and not any(non_cat.lower() in potential_category.lower() for non_cat in non_category_values):
-                                        category = potential_category
-                                        break
-            
-            # Final validation: ensure category is not empty and not a non-category value
-            if category and (not category.strip() or any(non_cat.lower() in category.lower() for non_cat in non_category_values)):
-                category = None
-                
-            print(f"   Debug - Category found: {category}")
-
-            # Extract condition
-            condition_selectors = [
-                'span[data-testid="商品の状態"]',
-                'div:contains("商品の状態") + div',
-                'div:contains("Condition") + div',
-                '.condition'
-            ]
-            condition = self.extract_text_safely(soup, condition_selectors)
-            print(f"   Debug - Condition found: {condition}")
-
-            # Extract seller name with improved selectors
-            seller_selectors = [
-                'a[data-testid="seller-link"] p.bold__5616e150',
-                'div[data-testid="shops-information"] p.bold__5616e150',
-                'p.bold__5616e150',
-                '.seller-name',
-                'a[data-testid="seller-link"]',
-                'div[data-testid="shops-information"]',
-                'div[class*="seller"]',
-                'div[class*="shops"]',
-                'div:contains("出品者") + div',
-                'div:contains("Seller") + div'
-            ]
-            seller_name = self.extract_text_safely(soup, seller_selectors)
-            # Clean up seller name if it contains unwanted text
-            if seller_name:
-                seller_name = seller_name.replace('出品者', '').replace('Seller', '').strip()
-            print(f"   Debug - Seller name found: {seller_name}")
-
-            # Extract description
-            desc_selectors = [
-                'pre[data-testid="description"]',
-                'div[data-testid="description"]',
-                '.description',
-                '.product-description'
-            ]
-            description_raw = self.extract_text_safely(soup, desc_selectors)
-            description = None
-            if description_raw:
-                description = description_raw[:200] + "..." if len(description_raw) > 200 else description_raw
-            print(f"   Debug - Description found: {description}")
-            
-            # Extract like count with updated selectors
-            like_selectors = [
-                'div[class="targetContainer__f205fbf7"]',
-                'div[class="merIconButton"]',
-                'div[aria-label="イイね機能を利用するには、ログインが必要です。ログインページへのリンク"]',
-                'span[class="merText body__5616e150 inherit__5616e150"]',
-            ]
-            
-            like_count = None
-            like_text = self.extract_text_safely(soup, like_selectors)
-            if like_text:
-                # Extract numbers from text (e.g., "123 likes" -> 123)
-                like_numbers = re.findall(r'\d+', like_text)
-                if like_numbers:
-                    try:
-                        like_count = int(like_numbers[0])
-                    except ValueError:
-                        like_count = None
-            
-            print(f"   Debug - Like count found: {like_count}")
-
-            # Create product data
-            product_data = {
-                'id': item_id,
-                'name': name,
-                'price': price,
-                'price_text': price_text,
-                'url': url,
-                'image_url': image_url,
-                'category': category,
-                'condition': condition,
-                'seller_name': seller_name,
-                'description': description,
-                'like_count': like_count
-            }
-            
-            # Print validation details
-            print("   Debug - Validation details:")
-            print(f"     Name valid: {bool(product_data['name'] and product_data['name'] != 'Unknown')}")
-            print(f"     Price valid: {bool(product_data['price_text'] and product_data['price_text'] != '¥0')}")
-            print(f"     URL valid: {bool(product_data['url'])}")
-            
-            # Validate data quality
-            if not self.validate_data(product_data):
-                print(f"   ⚠️  Data validation failed for {url}")
-                return None
-            
-            return ProductData(**product_data)
-            
+                        response = await self.wait_strategy.goto(page, url, key, timeout_ms)
+                    except Exception as e:
+                        if learned_ms >= timeout_ms or classify_error(e) != 'timeout':
+                            raise
+                        print(f"   ⏳ Learned timeout ({learned_ms}ms) too short for {url}, retrying with {timeout_ms}ms")
+                        start = time.monotonic()
+                        response = await self.wait_strategy.goto_fallback(page, url, key, timeout_ms)
+                else:
+                    response = await page.goto(url, wait_until="domcontentloaded", timeout=timeout_ms)
+            except Exception as e:
+                self.rate_limiter.throttle('timeout' if classify_error(e) == 'timeout' else 'navigation_error')
+                raise
+            status = response.status if response is not None else None
+            self.rate_limiter.record_response(status, (time.monotonic() - start) * 1000)
+            if status is not None and status >= 400:
+                raise FetchError.from_status(url, status)
+            return response
+        
+        return await self.retrier.call(attempt_navigation, url)
+
+    async def fetch_html_over_http(self, url: str) -> Optional[str]:
+        """Fetch a product page's HTML without the browser"""
+        try:
+            print(f"📦 Processing over HTTP: {url}")
+            html_content = await self.http_fetcher.fetch(url)
+            if html_content is not None and settings.SCRAPER_RECORD_PAGES_DIR:
+                self.record_page(url, html_content)
+            return html_content
         except Exception as e:
-            print(f"❌ Error processing {url}: {e}")
+            print(f"❌ Error processing {url} over HTTP: {e}")
+            return None
+
+    async def parse_page(self, html_content: str, url: str) -> ParseResult:
+        """Parse fetched HTML and record which extraction paths were used"""
+        result = await self.parse_html(html_content, url)
+        self.field_source_stats.record(result.field_sources, result.json_seconds, result.dom_seconds)
+        if self.selector_stats:
+            self.selector_stats.record(result.selector_outcomes)
+        return result
+
+    def validate_product(self, result: ParseResult, url: str) -> Optional[ProductData]:
+        """Validate a parsed product, returning None when it is unusable"""
+        product_data = result.product
+        
+        sources = result.field_sources
+        print(f"   Debug - Name found: {product_data['name']} ({sources['name']})")
+        print(f"   Debug - Price found: {product_data['price_text']} ({sources['price']})")
+        print(f"   Debug - Category found: {product_data['category']} ({sources['category']})")
+        
+        # Print validation details
+        print("   Debug - Validation details:")
+        print(f"     Name valid: {bool(product_data['name'] and product_data['name'] != 'Unknown')}")
+        print(f"     Price valid: {bool(product_data['price_text'] and product_data['price_text'] != '¥0')}")
+        print(f"     URL valid: {bool(product_data['url'])}")
+        
+        # Validate data quality
+        if not self.validate_data(product_data):
+            print(f"   ⚠️  Data validation failed for {url}")
             return None
+        
+        return ProductData(**product_data)
+
+    async def parse_html(self, html: str, url: str) -> ParseResult:
+        """Run parsing and field extraction off the event loop"""
+        if self.parse_pool is None:
+            return self.product_parser.parse_product(html, url)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.parse_pool, parse_product_page, html, url, self.selector_order)
+
+    async def load_selector_order(self):
+        """Load selector statistics and reorder the fallback chains for this run"""
+        try:
+            await self.selector_stats.load()
+        except Exception as e:
+            print(f"   Warning: Could not load selector statistics: {e}")
+        self.selector_stats.start_run()
+        self.selector_order = self.selector_stats.order(
+            self.product_parser.plan.chain_selectors(), settings.SCRAPER_DEAD_SELECTOR_EVALUATIONS
+        )
+        self.product_parser.plan.reorder(self.selector_order)
+
+    async def save_selector_stats(self):
+        """Persist selector statistics collected during this run"""
+        try:
+            await self.selector_stats.save()
+        except Exception as e:
+            print(f"   Warning: Could not save selector statistics: {e}")
+
+    def record_page(self, url: str, html: str):
+        """Save a fetched page for offline parser parity checks"""
+        try:
+            os.makedirs(settings.SCRAPER_RECORD_PAGES_DIR, exist_ok=True)
+            filename = re.sub(r'[^\w.-]+', '_', url.split('://', 1)[-1]).strip('_') + '.html'
+            with open(os.path.join(settings.SCRAPER_RECORD_PAGES_DIR, filename), 'w', encoding='utf-8') as f:
+                f.write(html)
+        except OSError as e:
+            print(f"   Warning: Could not record page {url}: {e}")
+
+    async def ensure_indexes(self):
+        """Create the registered product indexes, including the unique URL index upserts match on"""
+        if self.products_collection is None:
+            return
+        collections = ['products']
+        if self.changes_collection is not None:
+            collections.append('product_changes')
+        for report in await reconcile_indexes(self.db, {name: INDEXES[name] for name in collections}):
+            for failure in report.failed:
+                # Usually duplicate URLs saved before the unique index existed
+                print(f"⚠️  Could not create index on {report.collection}: {failure}")
+        if self.frontier is not None:
+            await self.frontier.ensure_indexes()
 
     async def save_products_to_mongodb(self, products: List[ProductData]):
-        """Save products to MongoDB"""
+        """Save products to MongoDB, writing only new products and changed fields.
+
+        Existing documents are looked up per batch by URL and compared by
+        content hash; unchanged products are skipped entirely and changed
+        ones $set only the fields that differ.
+        """
         if self.products_collection is None:
             print("❌ MongoDB connection not available")
             return
@@ -493,76 +715,140 @@ class FixedMercariScraper:
         try:
             saved_count = 0
             updated_count = 0
-            
-            for product in products:
-                # Convert product to dict
-                product_dict = {
-                    'id': product.id,
-                    'name': product.name,
-                    'price': product.price,
-                    'price_text': product.price_text,
-                    'url': product.url,
-                    'image_url': product.image_url,
-                    'category': product.category,
-                    'condition': product.condition,
-                    'seller_name': product.seller_name,
-                    'description': product.description,
-                    'like_count': product.like_count,
-                    'updated_at': datetime.utcnow()
-                }
-
-                # Check if product exists
-                existing_product = await self.products_collection.find_one({'url': product.url})
-                
-                if existing_product:
-                    # Update existing product
-                    await self.products_collection.update_one(
+            unchanged_count = 0
+            change_count = 0
+            batch_size = max(1, settings.SCRAPER_SAVE_BATCH_SIZE)
+            projection = {field: 1 for field in ProductData.SCRAPED_FIELDS}
+            projection['content_hash'] = 1
+            
+            for start in range(0, len(products), batch_size):
+                now = datetime.utcnow()
+                batch = products[start:start + batch_size]
+                existing = {}
+                async for doc in self.products_collection.find(
+                    {'url': {'$in': [product.url for product in batch]}}, projection
+                ):
+                    existing[doc['url']] = doc
+
+                requests = []
+                changes = []
+                for product in batch:
+                    fields = product.scraped_fields()
+                    content_hash = product.content_hash()
+                    current = existing.get(product.url)
+                    if current is None:
+                        requests.append(UpdateOne(
+                            {'url': product.url},
+                            {
+                                '$set': {**fields, 'content_hash': content_hash, 'updated_at': now},
+                                '$setOnInsert': {'created_at': now},
+                            },
+                            upsert=True,
+                        ))
+                        continue
+                    if current.get('content_hash') == content_hash:
+                        unchanged_count += 1
+                        continue
+
+                    changed = {k: v for k, v in fields.items() if current.get(k) != v}
+                    if not changed:
+                        # Saved before hashes existed; store the hash without touching updated_at
+                        requests.append(UpdateOne({'url': product.url}, {'$set': {'content_hash': content_hash}}))
+                        unchanged_count += 1
+                        continue
+                    requests.append(UpdateOne(
                         {'url': product.url},
-                        {'$set': product_dict}
-                    )
+                        {'$set': {**changed, 'content_hash': content_hash, 'updated_at': now}},
+                    ))
                     updated_count += 1
-                else:
-                    # Insert new product
-                    product_dict['created_at'] = datetime.utcnow()
-                    await self.products_collection.insert_one(product_dict)
-                    saved_count += 1
+                    changes.append(self.change_record(product, current, changed, now))
+
+                if requests:
+                    try:
+                        result = await self.products_collection.bulk_write(requests, ordered=False)
+                        saved_count += result.upserted_count
+                    except BulkWriteError as e:
+                        # Unordered: the rest of the batch was still written
+                        saved_count += e.details.get('nUpserted', 0)
+                        print(f"⚠️  {len(e.details.get('writeErrors', []))} products in batch failed to save")
+                if changes and self.changes_collection is not None:
+                    await self.changes_collection.insert_many(changes, ordered=False)
+                    change_count += len(changes)
 
             print(f"💾 MongoDB Update Summary:")
             print(f"   ✓ New products saved: {saved_count}")
             print(f"   ✓ Existing products updated: {updated_count}")
+            print(f"   ✓ Unchanged products skipped: {unchanged_count}")
+            if change_count:
+                print(f"   ✓ Change records written: {change_count}")
             
         except Exception as e:
             print(f"❌ Error saving to MongoDB: {str(e)}")
             raise
 
-    async def scrape_products(self, limit: int):
-        """Scrape products from ranking page with improved filtering"""
+    @staticmethod
+    def change_record(product: ProductData, current: dict, changed: dict, now: datetime) -> dict:
+        """Compact record of what changed on a rescrape"""
+        record = {
+            'product_id': product.id,
+            'url': product.url,
+            'changed_at': now,
+            'fields': sorted(changed),
+        }
+        for field in ('price', 'like_count'):
+            if field in changed:
+                record[field] = {'old': current.get(field), 'new': changed[field]}
+        return record
+
+    async def scrape_products(
+        self, limit: int, fetch_mode: str = None, entry_points: List[str] = None
+    ) -> PipelineStats:
+        """Scrape products from ranking page with improved filtering.
+
+        URLs stream through the pipeline stages and products are written to
+        MongoDB in small batches while the crawl is still running.
+        """
+        fetch_mode = self.check_fetch_mode(fetch_mode or self.fetch_mode)
         start_time = time.time()
+        self.http_fetcher.reset()
+        self.rate_limiter.reset()
+        self.retrier.reset()
+        recycler_baseline = blocker_baseline = None
+        if self.browser_pool is None:
+            self.recycler.reset()
+            if self.resource_blocker:
+                self.resource_blocker.reset()
+        else:
+            # The pool's recycler and blocker outlive this job, so the run is
+            # measured from a baseline instead of resetting them
+            recycler_baseline = self.recycler.counts()
+            if self.resource_blocker:
+                blocker_baseline = self.resource_blocker.snapshot()
+        await self.recycle_between_runs()
+        self.field_source_stats = FieldSourceStats()
+        if self.selector_stats:
+            await self.load_selector_order()
         
-        # Collect URLs
-        product_urls = await self.collect_product_urls(limit)
-        print(f"✅ Found {len(product_urls)} URLs")
-        
-        # Process each URL
-        batch_products = []
-        failed_count = 0
-        
-        for i, url in enumerate(product_urls, 1):
-            print(f"⚡ Processing {i}/{len(product_urls)}")
-            product = await self.extract_product_details(url)
-            if product:
-                batch_products.append(product)
-                print(f"   ✓ {product.name[:50]}... - {product.price_text}")
-                print(f"     Category: {product.category or 'N/A'}")
-                print(f"     Seller: {product.seller_name or 'N/A'}")
-            else:
-                failed_count += 1
-                print(f"   ✗ Failed to extract valid data")
-        
-        # Save to MongoDB
-        if batch_products:
-            await self.save_products_to_mongodb(batch_products)
-            self.all_products.extend(batch_products)
+        print(f"⚡ Streaming up to {limit} products with {self.concurrency} browser workers ({fetch_mode} fetch)")
+        self.worker_failures = {worker_id: 0 for worker_id in range(self.concurrency)}
+        pipeline = ScrapePipeline(
+            self,
+            fetch_mode=fetch_mode,
+            queue_size=settings.SCRAPER_PIPELINE_QUEUE_SIZE,
+            write_batch_size=settings.SCRAPER_WRITE_BATCH_SIZE,
+            flush_seconds=settings.SCRAPER_WRITE_FLUSH_SECONDS,
+            frontier=self.frontier,
+            on_scraped=lambda url: self.discovery.record_product(url),
+            url_retries=settings.SCRAPER_URL_RETRIES,
+        )
+        try:
+            stats = await pipeline.run(self.iter_product_urls(limit, entry_points))
+        finally:
+            if self.frontier is not None:
+                # Leases left by an interrupted run go straight back to pending
+                await self.frontier.release()
+            if self.selector_stats:
+                await self.save_selector_stats()
         
         # Summary
         end_time = time.time()
@@ -571,20 +857,93 @@ class FixedMercariScraper:
         print("\n" + "=" * 60)
         print(f"✅ SCRAPING COMPLETED!")
         print(f"🎯 Requested: {limit} products")
-        print(f"📦 Successfully scraped: {len(batch_products)} products")
-        print(f"❌ Failed extractions: {failed_count}")
+        print(f"🔗 URLs discovered: {stats.discovered}")
+        print(f"📦 Successfully scraped: {stats.scraped} products ({stats.written} written)")
+        print(f"❌ Failed extractions: {stats.failed}")
+        for worker_id, failures in sorted(self.worker_failures.items()):
+            print(f"   Worker {worker_id}: {failures} failed")
         print(f"⏱️  Total time: {duration:.2f} seconds")
-        if product_urls:
-            print(f"📊 Success rate: {len(batch_products)/len(product_urls)*100:.1f}%")
+        if stats.discovered:
+            print(f"📊 Success rate: {stats.scraped/stats.discovered*100:.1f}%")
+        stats.print_summary()
+        if self.discovery is not None:
+            self.discovery.print_summary()
+        if self.frontier is not None:
+            await self.frontier.print_summary()
+        if self.resource_blocker:
+            self.resource_blocker.print_summary(
+                self.resource_blocker.stats.since(blocker_baseline) if blocker_baseline else None
+            )
+        self.wait_strategy.print_summary()
+        self.http_fetcher.print_summary()
+        self.rate_limiter.print_summary()
+        self.retrier.print_summary()
+        self.recycler.print_summary(recycler_baseline)
+        self.field_source_stats.print_summary()
+        if self.selector_stats:
+            self.selector_stats.print_summary(
+                self.selector_order, settings.SCRAPER_DEAD_SELECTOR_EVALUATIONS
+            )
         print("=" * 60)
         
-        return batch_products
+        return stats
+
+    async def iter_product_urls(self, limit: int, entry_points: List[str] = None) -> AsyncIterator[str]:
+        """Discovery stage: yield product URLs to scrape as listings are read.
+
+        Entry points are sharded across the collector pages (see
+        ShardedDiscovery). With a frontier, each batch is added to it at its
+        rank within its listing and up to limit URLs are claimed from it, so
+        URLs already done (and not yet due for a revisit) are skipped and work
+        left pending by an earlier run is picked up. Skipped URLs do not count
+        towards limit, so listings are read until limit claimable URLs are
+        found or they run out.
+        """
+        entry_urls = [urljoin(self.base_url, entry) for entry in entry_points or settings.SCRAPER_ENTRY_POINTS]
+        found = 0
+        if self.frontier is None:
+            self.discovery = ShardedDiscovery(self, entry_urls, self.collector_pages, limit)
+            async for _, _, batch in self.discovery.batches():
+                found += len(batch)
+                for url in batch:
+                    yield url
+            print(f"✅ Found {found} URLs")
+            return
+        
+        added = 0
+        claimed = 0
+
+        async def admit(batch: List[str], start_rank: int) -> int:
+            # Only URLs the frontier would hand out count towards limit
+            nonlocal added
+            added += await self.frontier.add(batch, start_rank=start_rank)
+            return await self.frontier.count_claimable(batch)
+
+        self.discovery = ShardedDiscovery(self, entry_urls, self.collector_pages, limit, admit=admit)
+        async for _, _, batch in self.discovery.batches():
+            found += len(batch)
+            # Claim as much work as was discovered so fetching starts right away
+            while claimed < min(self.discovery.admitted, limit):
+                url = await self.frontier.claim()
+                if url is None:
+                    break
+                claimed += 1
+                yield url
+        print(f"✅ Found {found} URLs, {added} new to the crawl frontier, {self.discovery.admitted} due")
+        while claimed < limit:
+            url = await self.frontier.claim()
+            if url is None:
+                break
+            claimed += 1
+            yield url
 
     async def run_interactive(self, limit: int):
         """Run the scraper in interactive mode"""
         try:
             await self.start_browser()
             
+            await self.ensure_indexes()
+            
             # Initial scrape
             print(f"🚀 Starting scrape of {limit} products from ranking page")
             await self.scrape_products(limit)
@@ -592,6 +951,8 @@ class FixedMercariScraper:
             while True:
                 print("\nOptions:")
                 print("  'r' - Scrape more products")
+                print("  'h' - Scrape more products over HTTP (browser fallback)")
+                print("  'b' - Scrape more products with the browser only")
                 print("  'q' - Quit")
                 
                 user_input = input("\n➤ Your choice: ").strip().lower()
@@ -602,6 +963,10 @@ class FixedMercariScraper:
                 elif user_input == 'r':
                     print(f"\n🔄 Scraping next {limit} products...")
                     await self.scrape_products(limit)
+                elif user_input in ('h', 'b'):
+                    fetch_mode = 'http' if user_input == 'h' else 'browser'
+                    print(f"\n🔄 Scraping next {limit} products ({fetch_mode} fetch)...")
+                    await self.scrape_products(limit, fetch_mode)
                 else:
                     print("❌ Invalid option")
                     
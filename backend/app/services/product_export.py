@@ -0,0 +1,228 @@
+import asyncio
+import csv
+import io
+import json
+import logging
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Product fields every export format carries, in column order
+EXPORT_FIELDS = [
+    'id', 'name', 'price', 'category', 'condition', 'seller_name',
+    'url', 'image_url', 'description', 'created_at', 'updated_at',
+]
+CSV_HEADERS = [
+    'ID', 'Name', 'Price', 'Category', 'Condition',
+    'Seller', 'Product URL', 'Image URL', 'Description',
+    'Created At', 'Updated At'
+]
+EXPORT_PROJECTION = {'_id': 0, **{name: 1 for name in EXPORT_FIELDS}}
+# Rows per chunk for the row formats; columnar formats use larger record
+# batches, each written as one Parquet row group / Arrow record batch
+EXPORT_BATCH_SIZE = 1000
+COLUMNAR_BATCH_SIZE = 10000
+
+# format -> (media type, file extension)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+COLUMNAR_FORMATS = ('parquet', 'arrow')
+
+
+def load_pyarrow():
+    """Import pyarrow, which only the columnar formats need"""
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+    return pyarrow
+
+
+async def iter_batches(cursor, size: int) -> AsyncIterator[List[dict]]:
+    """Group cursor documents into lists of up to size, closing the cursor at the end"""
+    try:
+        batch = []
+        exported = 0
+        async for product in cursor:
+            batch.append(product)
+            if len(batch) >= size:
+                yield batch
+                exported += len(batch)
+                batch = []
+        if batch:
+            yield batch
+            exported += len(batch)
+        logger.info(f"Exported {exported} products")
+    except Exception as e:
+        # Headers are already sent; the client sees a truncated download
+        logger.error(f"Error exporting products: {str(e)}")
+        raise
+    finally:
+        await cursor.close()
+
+
+def csv_row(product: dict) -> list:
+    return [
+        product.get('id', ''),
+        product.get('name', ''),
+        product.get('price', 0),
+        product.get('category', ''),
+        product.get('condition', ''),
+        product.get('seller_name', ''),
+        product.get('url', ''),
+        product.get('image_url', ''),
+        product.get('description', ''),
+        product.get('created_at', '').isoformat() if product.get('created_at') else '',
+        product.get('updated_at', '').isoformat() if product.get('updated_at') else ''
+    ]
+
+
+async def iter_csv_chunks(cursor) -> AsyncIterator[bytes]:
+    """Encode CSV one cursor batch at a time; the header goes out before the first query batch"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADERS)
+    # UTF-8 BOM so Excel detects the encoding
+    yield ('\ufeff' + buffer.getvalue()).encode('utf-8')
+    async for batch in iter_batches(cursor, EXPORT_BATCH_SIZE):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(csv_row(product) for product in batch)
+        yield buffer.getvalue().encode('utf-8')
+
+
+def json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+async def iter_ndjson_chunks(cursor) -> AsyncIterator[bytes]:
+    """One JSON object per line, keeping numbers as numbers"""
+    async for batch in iter_batches(cursor, EXPORT_BATCH_SIZE):
+        lines = [
+            json.dumps({name: product.get(name) for name in EXPORT_FIELDS}, ensure_ascii=False, default=json_default)
+            for product in batch
+        ]
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def arrow_schema(pa):
+    return pa.schema([
+        ('id', pa.string()),
+        ('name', pa.string()),
+        ('price', pa.int64()),
+        ('category', pa.string()),
+        ('condition', pa.string()),
+        ('seller_name', pa.string()),
+        ('url', pa.string()),
+        ('image_url', pa.string()),
+        ('description', pa.string()),
+        ('created_at', pa.timestamp('ms')),
+        ('updated_at', pa.timestamp('ms')),
+    ])
+
+
+def _as_int(value):
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def arrow_columns(batch: List[dict]) -> Dict[str, list]:
+    """Column lists for a record batch, coercing values that do not fit the schema to null"""
+    columns = {}
+    for name in EXPORT_FIELDS:
+        values = [product.get(name) for product in batch]
+        if name == 'price':
+            values = [_as_int(value) for value in values]
+        elif name.endswith('_at'):
+            values = [value if isinstance(value, datetime) else None for value in values]
+        else:
+            values = [None if value is None else str(value) for value in values]
+        columns[name] = values
+    return columns
+
+
+class ChunkSink:
+    """Write-only file object collecting what pyarrow writes until it is drained"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self.chunks = b''.join(self.chunks), []
+        return data
+
+
+async def iter_columnar_chunks(cursor, export_format: str) -> AsyncIterator[bytes]:
+    """Parquet (zstd, one row group per batch) or an Arrow IPC stream, built batch by batch.
+
+    Encoding runs in a thread so large batches do not stall the event loop.
+    """
+    pa = load_pyarrow()
+    schema = arrow_schema(pa)
+    sink = ChunkSink()
+    output = pa.PythonFile(sink, mode='w')
+    if export_format == 'parquet':
+        writer = pa.parquet.ParquetWriter(output, schema, compression='zstd')
+
+        def write(batch):
+            writer.write_table(pa.Table.from_pydict(arrow_columns(batch), schema=schema))
+    else:
+        writer = pa.ipc.new_stream(output, schema)
+
+        def write(batch):
+            writer.write_batch(pa.RecordBatch.from_pydict(arrow_columns(batch), schema=schema))
+    try:
+        async for batch in iter_batches(cursor, COLUMNAR_BATCH_SIZE):
+            await asyncio.to_thread(write, batch)
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_chunks(cursor, export_format: str) -> AsyncIterator[bytes]:
+    if export_format == 'csv':
+        return iter_csv_chunks(cursor)
+    if export_format == 'ndjson':
+        return iter_ndjson_chunks(cursor)
+    return iter_columnar_chunks(cursor, export_format)
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Gzip a byte stream incrementally"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,752 @@
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from app.services.embedded_data import extract_embedded_product
+from app.services.html_backends import ParserBackend, get_parser_backend
+
+PRICE_CLEAN_PATTERN = re.compile(r'[^\d,]')
+NUMBER_PATTERN = re.compile(r'\d+')
+CONTAINS_PATTERN = re.compile(r':contains\(([^)]*)\)')
+# Tag name of the last compound selector, i.e. the element a selector matches
+SUBJECT_TAG_PATTERN = re.compile(r'(?:^|[\s>+~])([a-zA-Z][\w-]*)[^\s>+~]*$')
+
+# Image sources containing these markers are tracking pixels, not product photos
+TRACKING_MARKERS = ('bat.bing.com', 'tracking', 'pixel', 'analytics')
+
+
+@dataclass
+class ParseResult:
+    """Fields extracted from one product page and how they were found"""
+    product: dict
+    field_sources: Dict[str, str]
+    json_seconds: float
+    dom_seconds: float
+    # (field, selector, hit) for every fallback selector the plan evaluated
+    selector_outcomes: List[Tuple[str, str, bool]]
+
+
+class ProductParser:
+    """Pure HTML-to-fields extraction for Mercari pages.
+
+    Holds no browser or database state, so it can run in worker processes.
+    """
+
+    LINK_SELECTORS = [
+        'a[data-testid="thumbnail-link"]',
+        'a[href*="/item/"]',
+        'a[href*="/product/"]',
+        'a[href*="/shops/product/"]',
+        'a[class*="ranking-item"]',
+        'a[class*="ranking-product"]'
+    ]
+
+    NAME_SELECTORS = [
+        'h1[data-testid="product-name"]',
+        'h1[class*="heading"]',
+        'h1[class*="title"]',
+        'h1[class*="name"]',
+        'h1',
+        '[data-testid*="name"]',
+        '.product-name',
+        '.item-name',
+        'span[data-testid="thumbnail-item-name"]'
+    ]
+
+    PRICE_SELECTORS = [
+        'div[class*="sc-d804af5a-9 bjxcBV mer-spacing-t-8 mer-spacing-b-16"]',
+        'div[class*="sc-c5724afb-0 feUXIG sc-75176d5b-1 knGNCr mer-spacing-r-8"]',
+    ]
+
+    IMAGE_SELECTORS = [
+        'img[data-testid="product-image"]',
+        'img[class*="product-image"]',
+        'img[class*="item-image"]',
+        'img[alt*="商品画像"]',
+        'img[alt*="product"]',
+        'img[src*="mercari"]',
+        'img[src*="mercari-shops-static"]',
+        'img[src*="assets.mercari"]',
+        'img'
+    ]
+
+    BREADCRUMB_SELECTOR = 'nav[aria-label="パンくずリスト"], nav[aria-label="breadcrumb"]'
+
+    CATEGORY_SELECTORS = [
+        'span[class*="merTextLink sc-3acb98-0 dtocME"]',
+        'a[href="/search?category"]',
+        'a[data-location="item_details:item_info:category_link"]',
+        'a[location-2="category_link"]',
+    ]
+
+    CATEGORY_DETAIL_SELECTORS = [
+        'div[data-testid="商品の詳細"]',
+        'div[class*="product-details"]',
+        'div[class*="item-details"]',
+        'div[class*="merText"]'
+    ]
+
+    CONDITION_SELECTORS = [
+        'span[data-testid="商品の状態"]',
+        'div:contains("商品の状態") + div',
+        'div:contains("Condition") + div',
+        '.condition'
+    ]
+
+    SELLER_SELECTORS = [
+        'a[data-testid="seller-link"] p.bold__5616e150',
+        'div[data-testid="shops-information"] p.bold__5616e150',
+        'p.bold__5616e150',
+        '.seller-name',
+        'a[data-testid="seller-link"]',
+        'div[data-testid="shops-information"]',
+        'div[class*="seller"]',
+        'div[class*="shops"]',
+        'div:contains("出品者") + div',
+        'div:contains("Seller") + div'
+    ]
+
+    DESCRIPTION_SELECTORS = [
+        'pre[data-testid="description"]',
+        'div[data-testid="description"]',
+        '.description',
+        '.product-description'
+    ]
+
+    LIKE_SELECTORS = [
+        'div[class="targetContainer__f205fbf7"]',
+        'div[class="merIconButton"]',
+        'div[aria-label="イイね機能を利用するには、ログインが必要です。ログインページへのリンク"]',
+        'span[class="merText body__5616e150 inherit__5616e150"]',
+    ]
+
+    # Known non-category values to filter out of category paths
+    NON_CATEGORY_VALUES = [
+        'iwaki', '松屋', '甲羅組', 'NIKE', 'ネイル工房', 'Lucille', 'SCHICK', 'PIP',
+        'IRIS OHAYAMA', '西川', 'ブランド', 'Brand', '出品者', 'Seller', 'メルカリ', 'Mercari'
+    ]
+
+    # Product fields filled from embedded JSON or, failing that, the DOM
+    PRODUCT_FIELDS = (
+        'name', 'price', 'image_url', 'category', 'condition',
+        'seller_name', 'description', 'like_count',
+    )
+
+    ID_PATTERNS = [
+        r'/item/([^/?]+)',
+        r'/product/([^/?]+)',
+        r'/shops/product/([^/?]+)'
+    ]
+
+    def __init__(self, parser: str = 'html.parser', base_url: str = "https://jp.mercari.com"):
+        self.parser = get_parser_backend(parser)
+        self.base_url = base_url
+        self.id_patterns = [re.compile(pattern) for pattern in self.ID_PATTERNS]
+        self.plan = ExtractionPlan(self)
+
+    def extract_item_id(self, url: str) -> Optional[str]:
+        """Extract item ID from URL with multiple patterns"""
+        for pattern in self.id_patterns:
+            match = pattern.search(url)
+            if match:
+                return match.group(1)
+        return None
+
+    def parse_product(self, html: str, url: str) -> ParseResult:
+        """Extract product fields, trying embedded JSON before the DOM"""
+        # Fast path: read fields from the JSON the page already embeds
+        json_start = time.perf_counter()
+        fields = self.extract_json_fields(html, self.extract_item_id(url))
+        json_seconds = time.perf_counter() - json_start
+        field_sources = {field: 'json' for field in self.PRODUCT_FIELDS if field in fields}
+        
+        # Fall back to the DOM selector chains only for missing fields
+        dom_seconds = 0.0
+        selector_outcomes = []
+        missing_fields = [f for f in self.PRODUCT_FIELDS if f not in fields]
+        if missing_fields:
+            dom_start = time.perf_counter()
+            dom_fields, selector_outcomes = self.plan.extract_with_outcomes(html, missing_fields)
+            dom_seconds = time.perf_counter() - dom_start
+            for field in missing_fields:
+                value = dom_fields.get(field)
+                if value is not None and value != '':
+                    fields[field] = value
+                    field_sources[field] = 'dom'
+                else:
+                    field_sources[field] = 'missing'
+            if field_sources.get('price') == 'dom':
+                fields['price_text'] = dom_fields['price_text']
+        
+        product = {
+            'id': self.extract_item_id(url),
+            'name': fields.get('name') or 'Unknown',
+            'price': fields.get('price') or 0,
+            'price_text': fields.get('price_text') or '¥0',
+            'url': url,
+            'image_url': fields.get('image_url') or '',
+            'category': fields.get('category'),
+            'condition': fields.get('condition'),
+            'seller_name': fields.get('seller_name'),
+            'description': fields.get('description'),
+            'like_count': fields.get('like_count')
+        }
+        return ParseResult(product, field_sources, json_seconds, dom_seconds, selector_outcomes)
+
+    def extract_text_safely(self, doc, selectors: List[str], default: str = None) -> Optional[str]:
+        """Safely extract text using multiple selectors with fallbacks"""
+        # Filter out None values from selectors list
+        selectors = [s for s in selectors if s is not None]
+        
+        for selector in selectors:
+            try:
+                # Add null check for selector
+                if selector is None:
+                    continue
+                    
+                if ':contains(' in selector:
+                    # Handle contains selector differently
+                    text_to_find = selector.split(':contains(')[1].split(')')[0].strip('"\'')
+                    parent = self.parser.find_text_parent(doc, re.compile(text_to_find))
+                    if parent is not None:
+                        result = self.parser.text(parent)
+                        if result and result != default:
+                            return result
+                else:
+                    element = self.parser.select_one(doc, selector)
+                    if element is not None:
+                        result = self.parser.text(element)
+                        if result and result != default:
+                            return result
+            except Exception as e:
+                print(f"   Warning: Selector '{selector}' failed: {e}")
+                continue
+        return default
+
+    def extract_attribute_safely(self, doc, selectors: List[str], attribute: str, default: str = None) -> Optional[str]:
+        """Safely extract attribute using multiple selectors"""
+        # Filter out None values from selectors list
+        selectors = [s for s in selectors if s is not None]
+        
+        for selector in selectors:
+            try:
+                # Add null check for selector
+                if selector is None:
+                    continue
+                    
+                element = self.parser.select_one(doc, selector)
+                if element is not None:
+                    result = self.parser.attr(element, attribute)
+                    if result and result != default:
+                        return result
+            except Exception as e:
+                print(f"   Warning: Selector '{selector}' failed: {e}")
+                continue
+        return default
+
+    def extract_product_links(self, html: str) -> List[str]:
+        """Extract product URLs from a ranking page"""
+        doc = self.parser.parse(html)
+        
+        # One pass over a selector list returns each link once, in document (rank) order
+        item_links = self.parser.select(doc, ", ".join(self.LINK_SELECTORS))
+        hrefs = [self.parser.attr(link, 'href') for link in item_links]
+        urls = [urljoin(self.base_url, href) for href in hrefs if href]
+        return list(dict.fromkeys(urls))
+
+    def extract_json_fields(self, html: str, item_id: Optional[str] = None) -> dict:
+        """Map embedded JSON payloads to product fields"""
+        embedded = extract_embedded_product(html, item_id)
+        fields = {}
+        if embedded.get('name'):
+            fields['name'] = embedded['name']
+        if embedded.get('price'):
+            fields['price'] = embedded['price']
+            fields['price_text'] = f"¥{embedded['price']:,}"
+        if embedded.get('image_url'):
+            fields['image_url'] = embedded['image_url']
+        category = self.select_category(embedded.get('category_path') or [])
+        if category:
+            fields['category'] = category
+        for field in ('condition', 'seller_name', 'like_count'):
+            if embedded.get(field) is not None:
+                fields[field] = embedded[field]
+        if embedded.get('description'):
+            fields['description'] = self.truncate_description(embedded['description'])
+        return fields
+
+    def select_category(self, categories: List[str]) -> Optional[str]:
+        """Pick the main category from a category path"""
+        # Filter out non-category values and empty strings
+        categories = [cat for cat in categories if cat and not any(non_cat.lower() in cat.lower() for non_cat in self.NON_CATEGORY_VALUES)]
+        if not categories:
+            return None
+        # Second item is the main category; fall back to the first if only one exists
+        return categories[1] if len(categories) >= 2 else categories[0]
+
+    @staticmethod
+    def truncate_description(description: str) -> str:
+        return description[:200] + "..." if len(description) > 200 else description
+
+    def extract_dom_fields(self, html: str, fields: List[str]) -> dict:
+        """Extract the requested fields by running each selector chain separately.
+
+        This is the reference for ExtractionPlan, which must return the same
+        result in a single traversal.
+        """
+        doc = self.parser.parse(html)
+        raw = {}
+        
+        if 'name' in fields:
+            raw['name'] = self.extract_text_safely(doc, self.NAME_SELECTORS, 'Unknown')
+        
+        if 'price' in fields:
+            raw['price'] = self.extract_text_safely(doc, self.PRICE_SELECTORS, '0')
+        
+        if 'image_url' in fields:
+            # Get all images and filter out tracking pixels
+            all_images = []
+            for selector in self.IMAGE_SELECTORS:
+                try:
+                    images = self.parser.select(doc, selector)
+                    for img in images:
+                        src = self.parser.attr(img, 'src')
+                        if is_product_image(src):
+                            all_images.append(src)
+                except Exception as e:
+                    print(f"   Warning: Image selector '{selector}' failed: {e}")
+            
+            # Use the first valid image URL
+            raw['image_url'] = next((url for url in all_images if url), '')
+
+        if 'category' in fields:
+            raw['category'] = self.extract_dom_category(doc)
+
+        if 'condition' in fields:
+            raw['condition'] = self.extract_text_safely(doc, self.CONDITION_SELECTORS)
+
+        if 'seller_name' in fields:
+            raw['seller_name'] = self.extract_text_safely(doc, self.SELLER_SELECTORS)
+
+        if 'description' in fields:
+            raw['description'] = self.extract_text_safely(doc, self.DESCRIPTION_SELECTORS)
+        
+        if 'like_count' in fields:
+            raw['like_count'] = self.extract_text_safely(doc, self.LIKE_SELECTORS)
+        
+        return self.finish_dom_fields(raw)
+
+    def finish_dom_fields(self, raw: dict) -> dict:
+        """Clean raw selector results into product fields"""
+        result = {}
+        
+        if raw.get('name') and raw['name'] != 'Unknown':
+            result['name'] = raw['name']
+        
+        price_raw = raw.get('price')
+        if price_raw and price_raw != '0':
+            # Clean price text
+            price_clean = PRICE_CLEAN_PATTERN.sub('', price_raw)
+            if price_clean:
+                try:
+                    result['price'] = int(price_clean.replace(',', ''))
+                    result['price_text'] = f"¥{price_clean}"
+                except ValueError:
+                    pass
+        
+        for field in ('image_url', 'category', 'condition'):
+            if field in raw:
+                result[field] = raw[field]
+        
+        if 'seller_name' in raw:
+            seller_name = raw['seller_name']
+            # Clean up seller name if it contains unwanted text
+            if seller_name:
+                seller_name = seller_name.replace('出品者', '').replace('Seller', '').strip()
+            result['seller_name'] = seller_name
+        
+        if raw.get('description'):
+            result['description'] = self.truncate_description(raw['description'])
+        
+        if raw.get('like_count'):
+            # Extract numbers from text (e.g., "123 likes" -> 123)
+            like_numbers = NUMBER_PATTERN.findall(raw['like_count'])
+            if like_numbers:
+                result['like_count'] = int(like_numbers[0])
+        
+        return result
+
+    def extract_dom_category(self, doc) -> Optional[str]:
+        """Extract the main category from breadcrumbs or category links"""
+        category = None
+        
+        # Get all breadcrumb items
+        breadcrumb = self.parser.select(doc, self.BREADCRUMB_SELECTOR)
+        if breadcrumb:
+            items = self.parser.descendants(breadcrumb[0], ['a', 'span', 'div'])
+            categories = [self.parser.text(item) for item in items]
+            category = self.select_category(categories)
+        
+        # Fallback: try category-specific selectors
+        if not category:
+            for selector in self.CATEGORY_SELECTORS:
+                found = self.parser.select(doc, selector)
+                if found:
+                    links = [self.parser.text(link) for link in found]
+                    category = self.select_category(links)
+                    if category:
+                        break
+        
+        # Additional fallback: try to find category in product details
+        if not category:
+            for selector in self.CATEGORY_DETAIL_SELECTORS:
+                details = self.parser.select(doc, selector)
+                if details:
+                    for detail in details:
+                        potential_category = self.category_from_detail_text(self.parser.text(detail))
+                        if potential_category:
+                            category = potential_category
+                            break
+        
+        return self.validate_category(category)
+
+    def category_from_detail_text(self, text: str) -> Optional[str]:
+        """Extract the category following "カテゴリ" in a product details block"""
+        if 'カテゴリ' not in text:
+            return None
+        parts = text.split('カテゴリ')
+        potential_category = parts[1].strip().split('\n')[0].strip()
+        # Filter out non-category values and empty strings
+        if potential_category and not any(non_cat.lower() in potential_category.lower() for non_cat in self.NON_CATEGORY_VALUES):
+            return potential_category
+        return None
+
+    def validate_category(self, category: Optional[str]) -> Optional[str]:
+        """Ensure category is not empty and not a non-category value"""
+        if category and (not category.strip() or any(non_cat.lower() in category.lower() for non_cat in self.NON_CATEGORY_VALUES)):
+            return None
+        return category
+
+
+def is_product_image(src: str) -> bool:
+    """Whether an image source is a real image rather than a tracking pixel"""
+    return bool(src) and not any(marker in src.lower() for marker in TRACKING_MARKERS)
+
+
+class PlanRule:
+    """One compiled entry of a selector chain"""
+
+    __slots__ = ('field', 'rank', 'selector', 'compiled', 'pattern', 'kind', 'tags')
+
+    def __init__(self, field: str, rank: int, selector: str, kind: str, backend: ParserBackend):
+        self.field = field
+        self.rank = rank
+        self.selector = selector
+        # 'text': first match's text, 'image': first usable src,
+        # 'first': first matching node, 'all': every matching node
+        self.kind = kind
+        self.compiled = None
+        self.pattern = None
+        self.tags = None
+        contains = CONTAINS_PATTERN.search(selector)
+        if contains:
+            self.pattern = re.compile(contains.group(1).strip('"\''))
+        else:
+            self.compiled = backend.compile(selector)
+            self.tags = self.subject_tags(selector)
+
+    @staticmethod
+    def subject_tags(selector: str) -> Optional[frozenset]:
+        """Tag names the selector can match, or None if it can match any tag"""
+        tags = set()
+        for part in selector.split(','):
+            # Drop attribute values so quoted text cannot look like a tag
+            match = SUBJECT_TAG_PATTERN.search(re.sub(r'\[[^\]]*\]', '[]', part.strip()))
+            if not match:
+                return None
+            tags.add(match.group(1).lower())
+        return frozenset(tags)
+
+
+class ExtractionPlan:
+    """Selector chains and regexes compiled once per parser.
+
+    On backends that can match compiled selectors node by node, every
+    requested field is gathered in a single document traversal. A chain
+    stops testing lower-ranked selectors once a higher-ranked one has
+    produced a usable value. With the default order, results match
+    ProductParser.extract_dom_fields; reorder() lets selector statistics
+    move selectors that never match to the back of their chain.
+    """
+
+    # Chains whose order may be changed by reorder()
+    ADAPTIVE_CHAINS = (
+        'name', 'price', 'image_url', 'category', 'condition',
+        'seller_name', 'description', 'like_count',
+    )
+
+    TEXT_CHAINS = (
+        ('name', 'NAME_SELECTORS', 'Unknown'),
+        ('price', 'PRICE_SELECTORS', '0'),
+        ('condition', 'CONDITION_SELECTORS', None),
+        ('seller_name', 'SELLER_SELECTORS', None),
+        ('description', 'DESCRIPTION_SELECTORS', None),
+        ('like_count', 'LIKE_SELECTORS', None),
+    )
+
+    def __init__(self, product_parser: 'ProductParser'):
+        self.product_parser = product_parser
+        self.backend = product_parser.parser
+        self.defaults = {field: default for field, _, default in self.TEXT_CHAINS}
+        self.chains = {}
+        for field, attr, _ in self.TEXT_CHAINS:
+            self.chains[field] = self._compile_chain(field, getattr(product_parser, attr), 'text')
+        self.chains['image_url'] = self._compile_chain('image_url', product_parser.IMAGE_SELECTORS, 'image')
+        self.chains['breadcrumb'] = self._compile_chain('breadcrumb', [product_parser.BREADCRUMB_SELECTOR], 'first')
+        self.chains['category'] = self._compile_chain('category', product_parser.CATEGORY_SELECTORS, 'all')
+        self.chains['category_detail'] = self._compile_chain(
+            'category_detail', product_parser.CATEGORY_DETAIL_SELECTORS, 'all'
+        )
+
+    def _compile_chain(self, field: str, selectors: List[str], kind: str) -> List[PlanRule]:
+        rules = []
+        for selector in selectors:
+            if selector is None:
+                continue
+            try:
+                rules.append(PlanRule(field, len(rules), selector, kind, self.backend))
+            except Exception as e:
+                print(f"   Warning: Selector '{selector}' failed to compile: {e}")
+        return rules
+
+    def chain_selectors(self) -> Dict[str, List[str]]:
+        """Current selector order of each adaptive chain"""
+        return {field: [rule.selector for rule in self.chains[field]] for field in self.ADAPTIVE_CHAINS}
+
+    def reorder(self, order: Dict[str, List[str]]):
+        """Reorder adaptive chains; selectors missing from order keep their relative place at the end"""
+        for field, selectors in order.items():
+            if field not in self.ADAPTIVE_CHAINS:
+                continue
+            position = {selector: i for i, selector in enumerate(selectors)}
+            rules = sorted(self.chains[field], key=lambda r: position.get(r.selector, len(position) + r.rank))
+            for rank, rule in enumerate(rules):
+                rule.rank = rank
+            self.chains[field] = rules
+
+    def _rules_for(self, fields: List[str]) -> List[PlanRule]:
+        rules = []
+        for field in fields:
+            if field == 'category':
+                rules += self.chains['breadcrumb'] + self.chains['category'] + self.chains['category_detail']
+            elif field in self.chains:
+                rules += self.chains[field]
+        return rules
+
+    def extract(self, html: str, fields: List[str]) -> dict:
+        """Extract the requested fields from html"""
+        return self.extract_with_outcomes(html, fields)[0]
+
+    def extract_with_outcomes(self, html: str, fields: List[str]) -> Tuple[dict, List[Tuple[str, str, bool]]]:
+        """Extract the requested fields and report each evaluated selector's outcome"""
+        doc = self.backend.parse(html)
+        state = PlanState(self)
+        rules = self._rules_for(fields)
+        if self.backend.supports_single_pass:
+            self._scan(doc, rules, state)
+        else:
+            self._select(doc, rules, state)
+        result = self.product_parser.finish_dom_fields(self._collect(fields, state))
+        return result, state.outcomes(rules)
+
+    def _scan(self, doc, rules: List[PlanRule], state: 'PlanState'):
+        """Evaluate every rule in one traversal of the document"""
+        css_rules = [r for r in rules if r.compiled is not None]
+        text_rules = [r for r in rules if r.pattern is not None]
+        by_tag, any_tag = self._index_by_tag(css_rules)
+        matchers = {rule: self.backend.bind(rule.compiled, doc) for rule in css_rules}
+        tag_name = self.backend.tag_name
+        for node, string in self.backend.iter_document(doc):
+            finished = False
+            if string is None:
+                # Only rules whose subject tag fits this element are tested
+                for rule in by_tag.get(tag_name(node), ()):
+                    if matchers[rule](node):
+                        finished = state.accept(rule, node) or finished
+                for rule in any_tag:
+                    if matchers[rule](node):
+                        finished = state.accept(rule, node) or finished
+            elif text_rules:
+                for rule in text_rules:
+                    if rule.pattern.search(string):
+                        finished = state.accept(rule, node) or finished
+            if finished:
+                css_rules = [r for r in css_rules if not state.done(r)]
+                text_rules = [r for r in text_rules if not state.done(r)]
+                if not css_rules and not text_rules:
+                    break
+                by_tag, any_tag = self._index_by_tag(css_rules)
+
+    @staticmethod
+    def _index_by_tag(rules: List[PlanRule]) -> tuple:
+        """Group rules by subject tag, keeping chain order within each group"""
+        by_tag = {}
+        any_tag = []
+        for rule in rules:
+            if rule.tags is None:
+                any_tag.append(rule)
+            else:
+                for tag in rule.tags:
+                    by_tag.setdefault(tag, []).append(rule)
+        return by_tag, any_tag
+
+    def _select(self, doc, rules: List[PlanRule], state: 'PlanState'):
+        """Evaluate rules one selector at a time with the backend's CSS engine"""
+        for rule in rules:
+            if state.done(rule):
+                continue
+            try:
+                if rule.pattern is not None:
+                    node = self.backend.find_text_parent(doc, rule.pattern)
+                    if node is not None:
+                        state.accept(rule, node)
+                elif rule.kind in ('text', 'first'):
+                    node = self.backend.select_one(doc, rule.selector)
+                    if node is not None:
+                        state.accept(rule, node)
+                else:
+                    for node in self.backend.select(doc, rule.selector):
+                        if state.accept(rule, node) and rule.kind == 'image':
+                            break
+            except Exception as e:
+                print(f"   Warning: Selector '{rule.selector}' failed: {e}")
+
+    def _collect(self, fields: List[str], state: 'PlanState') -> dict:
+        """Turn matched rules into the raw values extract_dom_fields produces"""
+        raw = {}
+        for field in fields:
+            if field in self.defaults:
+                raw[field] = state.values.get(field, self.defaults[field])
+            elif field == 'image_url':
+                raw[field] = state.values.get(field, '')
+            elif field == 'category':
+                raw[field] = self._category(state)
+        return raw
+
+    def _category(self, state: 'PlanState') -> Optional[str]:
+        parser = self.product_parser
+        backend = self.backend
+        category = None
+        
+        breadcrumb = state.nodes.get(self.chains['breadcrumb'][0]) if self.chains['breadcrumb'] else None
+        if breadcrumb is not None:
+            items = backend.descendants(breadcrumb, ['a', 'span', 'div'])
+            category = parser.select_category([backend.text(item) for item in items])
+        
+        if not category:
+            for rule in self.chains['category']:
+                found = state.collected.get(rule)
+                if found:
+                    category = parser.select_category([backend.text(link) for link in found])
+                    if category:
+                        break
+        
+        if not category:
+            for rule in self.chains['category_detail']:
+                for detail in state.collected.get(rule, ()):
+                    potential_category = parser.category_from_detail_text(backend.text(detail))
+                    if potential_category:
+                        category = potential_category
+                        break
+        
+        return parser.validate_category(category)
+
+
+class PlanState:
+    """Matches gathered while evaluating an ExtractionPlan on one page"""
+
+    def __init__(self, plan: ExtractionPlan):
+        self.plan = plan
+        self.values = {}
+        self.best_rank = {}
+        self.nodes = {}
+        self.collected = {}
+        self.resolved = set()
+        self.used = set()
+
+    def done(self, rule: PlanRule) -> bool:
+        """A rule is done once resolved or outranked by a usable match"""
+        return rule in self.resolved or rule.rank > self.best_rank.get(rule.field, rule.rank)
+
+    def accept(self, rule: PlanRule, node) -> bool:
+        """Record a match; returns True when the rule is now done"""
+        if self.done(rule):
+            return False
+        backend = self.plan.backend
+        if rule.kind == 'all':
+            self.collected.setdefault(rule, []).append(node)
+            return False
+        if rule.kind == 'first':
+            self.nodes[rule] = node
+        elif rule.kind == 'image':
+            src = backend.attr(node, 'src')
+            if not is_product_image(src):
+                return False
+            self._use(rule, src)
+        else:
+            # Only the first match of a selector counts, usable or not
+            text = backend.text(node)
+            if text and text != self.plan.defaults[rule.field]:
+                self._use(rule, text)
+        self.resolved.add(rule)
+        return True
+
+    def outcomes(self, rules: List[PlanRule]) -> List[Tuple[str, str, bool]]:
+        """Hit/miss for each adaptive rule; rules skipped by pruning are not counted"""
+        outcomes = []
+        for rule in rules:
+            if rule.field not in ExtractionPlan.ADAPTIVE_CHAINS:
+                continue
+            if rule.kind == 'all':
+                outcomes.append((rule.field, rule.selector, bool(self.collected.get(rule))))
+            elif rule in self.used:
+                outcomes.append((rule.field, rule.selector, True))
+            elif rule in self.resolved or not self.done(rule):
+                # Matched without a usable value, or never matched at all
+                outcomes.append((rule.field, rule.selector, False))
+        return outcomes
+
+    def _use(self, rule: PlanRule, value: str):
+        self.used.add(rule)
+        if rule.rank < self.best_rank.get(rule.field, len(self.plan.chains[rule.field])):
+            self.best_rank[rule.field] = rule.rank
+            self.values[rule.field] = value
+
+
+# Parser instance owned by each worker process of the parse pool
+_worker_parser: Optional[ProductParser] = None
+
+
+_worker_order: Optional[Dict[str, List[str]]] = None
+
+
+def init_parse_worker(parser: str):
+    """Process pool initializer: build the parser once per worker"""
+    global _worker_parser
+    _worker_parser = ProductParser(parser)
+
+
+def warm_parse_worker() -> bool:
+    """No-op task that makes the pool start a worker ahead of the first page"""
+    return _worker_parser is not None
+
+
+def parse_product_page(html: str, url: str, selector_order: Dict[str, List[str]] = None) -> ParseResult:
+    """Parse a product page in a worker process"""
+    global _worker_order
+    if selector_order is not None and selector_order != _worker_order:
+        _worker_parser.plan.reorder(selector_order)
+        _worker_order = selector_order
+    return _worker_parser.parse_product(html, url)
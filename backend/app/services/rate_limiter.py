@@ -0,0 +1,158 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+# Response statuses that mean the site wants us to slow down
+THROTTLE_STATUSES = (429, 503)
+
+
+class RateLimiter:
+    """Token bucket shared by every page fetch the scraper makes.
+
+    Tokens refill at rate per second up to burst; each navigation, scroll
+    step or HTTP request takes one. A rate of 0 disables limiting.
+
+    The rate adapts with AIMD: after roughly one second's worth of fast,
+    successful responses it rises by increase_step, and on a timeout, a 429/503
+    or a spike of validation failures it is multiplied by decrease_factor.
+    Decreases are spaced by cooldown_seconds so one burst of errors from
+    requests already in flight only cuts the rate once.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        min_rate: float = None,
+        max_rate: float = None,
+        increase_step: float = 0.25,
+        decrease_factor: float = 0.5,
+        slow_ms: float = 5000,
+        validation_window: int = 20,
+        validation_failure_threshold: float = 0.5,
+        cooldown_seconds: float = 2.0,
+    ):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.min_rate = min_rate if min_rate is not None else rate
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.slow_ms = slow_ms
+        self.validation_failure_threshold = validation_failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+        self.validations: Deque[bool] = deque(maxlen=validation_window)
+        self.clean_streak = 0
+        self.last_decrease = 0.0
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.acquired = 0
+        self.waited = 0.0
+        self.increases = 0
+        self.decreases = 0
+        self.throttle_events: Dict[str, int] = {}
+        self.lowest_rate = self.rate
+        self.highest_rate = self.rate
+
+    def reset(self) -> Dict:
+        """Start a new run's metrics and return the previous run's; the rate carries over"""
+        previous = self.metrics()
+        self._reset_counters()
+        return previous
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Wait for a token; waiters are served in arrival order"""
+        if self.rate <= 0:
+            return
+        async with self.lock:
+            start = time.monotonic()
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+            self.acquired += 1
+            self.waited += time.monotonic() - start
+
+    def record_response(self, status: Optional[int], latency_ms: float):
+        """Feed back one completed request"""
+        if status in THROTTLE_STATUSES:
+            self.throttle(f"http_{status}")
+        elif latency_ms <= self.slow_ms and (status is None or status < 400):
+            self._clean()
+        else:
+            self.clean_streak = 0
+
+    def record_timeout(self):
+        self.throttle('timeout')
+
+    def record_validation(self, ok: bool):
+        """Feed back whether a fetched page produced a valid product"""
+        self.validations.append(ok)
+        if len(self.validations) < self.validations.maxlen:
+            return
+        failures = self.validations.count(False) / len(self.validations)
+        if failures >= self.validation_failure_threshold:
+            self.throttle('validation_failures')
+            self.validations.clear()
+
+    def _clean(self):
+        if self.rate <= 0:
+            return
+        self.clean_streak += 1
+        if self.clean_streak >= max(1, round(self.rate)) and self.rate < self.max_rate:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+            self.highest_rate = max(self.highest_rate, self.rate)
+            self.increases += 1
+            self.clean_streak = 0
+
+    def throttle(self, reason: str):
+        """Multiplicatively cut the rate in response to a throttle signal"""
+        self.throttle_events[reason] = self.throttle_events.get(reason, 0) + 1
+        self.clean_streak = 0
+        now = time.monotonic()
+        if self.rate <= 0 or now - self.last_decrease < self.cooldown_seconds:
+            return
+        self._refill()
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self.lowest_rate = min(self.lowest_rate, self.rate)
+        self.decreases += 1
+        self.last_decrease = now
+
+    def metrics(self) -> Dict:
+        """Current rate and this run's throttle events"""
+        return {
+            'rate_per_second': round(self.rate, 3),
+            'lowest_rate': round(self.lowest_rate, 3),
+            'highest_rate': round(self.highest_rate, 3),
+            'increases': self.increases,
+            'decreases': self.decreases,
+            'throttle_events': dict(self.throttle_events),
+            'acquired': self.acquired,
+            'waited_seconds': round(self.waited, 3),
+        }
+
+    def print_summary(self):
+        if self.rate <= 0:
+            return
+        metrics = self.metrics()
+        events = ", ".join(f"{k}={v}" for k, v in sorted(metrics['throttle_events'].items())) or "none"
+        print("🚦 Rate limiter:")
+        print(
+            f"   Rate: {metrics['rate_per_second']:.2f}/s "
+            f"(range this run {metrics['lowest_rate']:.2f}-{metrics['highest_rate']:.2f}/s, "
+            f"+{metrics['increases']} / -{metrics['decreases']})"
+        )
+        print(f"   Requests: {metrics['acquired']}, waited {metrics['waited_seconds']:.1f}s")
+        print(f"   Throttle events: {events}")
@@ -0,0 +1,131 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+# Rough transfer sizes used to estimate bandwidth saved by aborted requests.
+# Aborted requests are never downloaded, so their real size is unknown.
+ESTIMATED_RESOURCE_BYTES = {
+    'image': 60_000,
+    'media': 500_000,
+    'font': 40_000,
+    'stylesheet': 20_000,
+    'script': 30_000,
+    'xhr': 2_000,
+    'fetch': 2_000,
+    'ping': 500,
+    'other': 1_000,
+}
+
+
+@dataclass
+class BlockingStats:
+    """Per-run counters for the resource blocker"""
+    requests_aborted: int = 0
+    requests_allowed: int = 0
+    bytes_saved: int = 0
+    bytes_downloaded: int = 0
+    aborted_by_type: Dict[str, int] = field(default_factory=dict)
+    aborted_by_host: Dict[str, int] = field(default_factory=dict)
+
+    def since(self, baseline: 'BlockingStats') -> 'BlockingStats':
+        """Counters added after baseline was taken"""
+        def grown(counts: Dict[str, int], before: Dict[str, int]) -> Dict[str, int]:
+            return {k: v - before.get(k, 0) for k, v in counts.items() if v > before.get(k, 0)}
+
+        return BlockingStats(
+            requests_aborted=self.requests_aborted - baseline.requests_aborted,
+            requests_allowed=self.requests_allowed - baseline.requests_allowed,
+            bytes_saved=self.bytes_saved - baseline.bytes_saved,
+            bytes_downloaded=self.bytes_downloaded - baseline.bytes_downloaded,
+            aborted_by_type=grown(self.aborted_by_type, baseline.aborted_by_type),
+            aborted_by_host=grown(self.aborted_by_host, baseline.aborted_by_host),
+        )
+
+
+class ResourceBlocker:
+    """Abort unneeded browser requests using Playwright routing.
+
+    A request is blocked when its resource type or host is on a deny list,
+    unless its resource type or host is also on an allow list.
+    """
+
+    def __init__(
+        self,
+        blocked_types: Iterable[str] = (),
+        blocked_hosts: Iterable[str] = (),
+        allowed_types: Iterable[str] = (),
+        allowed_hosts: Iterable[str] = (),
+    ):
+        self.blocked_types = {t.lower() for t in blocked_types}
+        self.blocked_hosts = {h.lower() for h in blocked_hosts}
+        self.allowed_types = {t.lower() for t in allowed_types}
+        self.allowed_hosts = {h.lower() for h in allowed_hosts}
+        self.stats = BlockingStats()
+
+    @classmethod
+    def from_settings(cls, settings) -> 'ResourceBlocker':
+        return cls(
+            blocked_types=settings.SCRAPER_BLOCKED_RESOURCE_TYPES,
+            blocked_hosts=settings.SCRAPER_BLOCKED_HOSTS,
+            allowed_types=settings.SCRAPER_ALLOWED_RESOURCE_TYPES,
+            allowed_hosts=settings.SCRAPER_ALLOWED_HOSTS,
+        )
+
+    @staticmethod
+    def _host_matches(host: str, hosts: set) -> bool:
+        """Match a host against a set of domains, including subdomains"""
+        return any(host == h or host.endswith('.' + h) for h in hosts)
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        """Decide whether a request should be aborted"""
+        host = (urlparse(url).hostname or '').lower()
+        if resource_type in self.allowed_types or self._host_matches(host, self.allowed_hosts):
+            return False
+        return resource_type in self.blocked_types or self._host_matches(host, self.blocked_hosts)
+
+    async def attach(self, context):
+        """Install the routing handler on a browser context"""
+        await context.route("**/*", self.handle_route)
+        context.on("response", self.on_response)
+
+    async def handle_route(self, route):
+        """Abort or continue an intercepted request"""
+        request = route.request
+        resource_type = request.resource_type
+        if self.should_block(resource_type, request.url):
+            host = urlparse(request.url).hostname or ''
+            self.stats.requests_aborted += 1
+            self.stats.bytes_saved += ESTIMATED_RESOURCE_BYTES.get(resource_type, ESTIMATED_RESOURCE_BYTES['other'])
+            self.stats.aborted_by_type[resource_type] = self.stats.aborted_by_type.get(resource_type, 0) + 1
+            self.stats.aborted_by_host[host] = self.stats.aborted_by_host.get(host, 0) + 1
+            await route.abort()
+        else:
+            self.stats.requests_allowed += 1
+            await route.continue_()
+
+    def on_response(self, response):
+        """Track bytes downloaded for allowed requests"""
+        content_length = response.headers.get('content-length')
+        if content_length and content_length.isdigit():
+            self.stats.bytes_downloaded += int(content_length)
+
+    def snapshot(self) -> BlockingStats:
+        """Copy of the counters, for measuring a run on a shared blocker"""
+        return self.stats.since(BlockingStats())
+
+    def reset(self) -> BlockingStats:
+        """Start a new run and return the previous run's counters"""
+        previous, self.stats = self.stats, BlockingStats()
+        return previous
+
+    def print_summary(self, stats: Optional[BlockingStats] = None):
+        """Print a short report of what was blocked"""
+        stats = stats or self.stats
+        print(f"🚫 Requests aborted: {stats.requests_aborted} (allowed: {stats.requests_allowed})")
+        print(f"   Bytes saved (estimated): {stats.bytes_saved / 1024 / 1024:.1f} MB")
+        print(f"   Bytes downloaded: {stats.bytes_downloaded / 1024 / 1024:.1f} MB")
+        for resource_type, count in sorted(stats.aborted_by_type.items(), key=lambda x: -x[1]):
+            print(f"   {resource_type}: {count}")
+        top_hosts = sorted(stats.aborted_by_host.items(), key=lambda x: -x[1])[:5]
+        for host, count in top_hosts:
+            print(f"   {host}: {count}")
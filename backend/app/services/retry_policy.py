@@ -0,0 +1,194 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+# Error kinds worth another attempt; anything else fails immediately
+RETRYABLE_KINDS = ('timeout', 'network', 'throttled', 'server')
+
+
+class FetchError(Exception):
+    """A fetch that completed with an error status"""
+
+    def __init__(self, message: str, kind: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.kind = kind
+        self.status = status
+
+    @classmethod
+    def from_status(cls, url: str, status: int) -> 'FetchError':
+        if status in (429, 503):
+            kind = 'throttled'
+        elif status >= 500:
+            kind = 'server'
+        else:
+            kind = 'client'
+        return cls(f"HTTP {status} for {url}", kind, status)
+
+
+def classify_error(error: BaseException) -> str:
+    """Map an exception from Playwright, httpx or asyncio to an error kind"""
+    if isinstance(error, FetchError):
+        return error.kind
+    name = type(error).__name__
+    message = str(error)
+    if isinstance(error, asyncio.TimeoutError) or 'Timeout' in name:
+        return 'timeout'
+    if 'net::ERR_' in message or isinstance(error, (ConnectionError, OSError)) or name in (
+        'ConnectError', 'ReadError', 'WriteError', 'RemoteProtocolError', 'NetworkError',
+    ):
+        return 'network'
+    if 'Target closed' in message or 'has been closed' in message:
+        return 'closed'
+    return 'error'
+
+
+def is_retryable(kind: str) -> bool:
+    return kind in RETRYABLE_KINDS
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, capped at max_delay"""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 1.0, max_delay: float = 30.0):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait before retry number attempt (1-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class RetryBudget:
+    """Caps the number of retries one run may spend"""
+
+    def __init__(self, retries: int):
+        self.retries = retries
+        self.used = 0
+
+    def take(self) -> bool:
+        if self.used >= self.retries:
+            return False
+        self.used += 1
+        return True
+
+    def reset(self):
+        self.used = 0
+
+    @property
+    def exhausted(self) -> bool:
+        return self.used >= self.retries
+
+
+class CircuitBreaker:
+    """Pauses all calls when the recent failure rate spikes.
+
+    Tracks the outcome of the last window calls. Once at least min_calls
+    are recorded and the failure rate reaches failure_rate, the breaker
+    opens and wait() blocks every caller for pause_seconds. After the pause
+    it is half-open: the window starts over, and one failure re-opens it.
+    """
+
+    def __init__(self, window: int = 20, failure_rate: float = 0.5, min_calls: int = 10, pause_seconds: float = 60):
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.failure_rate = failure_rate
+        self.min_calls = min(min_calls, window)
+        self.pause_seconds = pause_seconds
+        self.open_until = 0.0
+        self.half_open = False
+        self.trips = 0
+        self.paused_seconds = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        return time.monotonic() < self.open_until
+
+    async def wait(self):
+        """Block while the breaker is open"""
+        remaining = self.open_until - time.monotonic()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+
+    def record(self, ok: bool):
+        if self.is_open:
+            return
+        if self.half_open:
+            self.half_open = False
+            if not ok:
+                self._trip(1.0)
+                return
+        self.outcomes.append(ok)
+        if len(self.outcomes) < self.min_calls:
+            return
+        failures = self.outcomes.count(False) / len(self.outcomes)
+        if failures >= self.failure_rate:
+            self._trip(failures)
+
+    def _trip(self, failures: float):
+        self.trips += 1
+        self.open_until = time.monotonic() + self.pause_seconds
+        self.paused_seconds += self.pause_seconds
+        self.outcomes.clear()
+        self.half_open = True
+        print(f"🔌 Circuit open: {failures * 100:.0f}% of recent navigations failed, pausing crawl for {self.pause_seconds:.0f}s")
+
+
+class Retrier:
+    """Runs navigations under a retry policy, a per-run budget and a circuit breaker"""
+
+    def __init__(self, policy: RetryPolicy, budget: RetryBudget, breaker: CircuitBreaker):
+        self.policy = policy
+        self.budget = budget
+        self.breaker = breaker
+        self.reset()
+
+    def reset(self):
+        """Start a new run: refill the budget and clear the stats"""
+        self.budget.reset()
+        self.calls = 0
+        self.retries = 0
+        self.gave_up = 0
+        self.backoff_seconds = 0.0
+        self.errors: Dict[str, int] = {}
+
+    async def call(self, func: Callable[[int], Awaitable], description: str = ''):
+        """Call func(attempt) until it succeeds or the error is not worth retrying"""
+        self.calls += 1
+        attempt = 1
+        while True:
+            await self.breaker.wait()
+            try:
+                result = await func(attempt)
+            except Exception as e:
+                kind = classify_error(e)
+                self.errors[kind] = self.errors.get(kind, 0) + 1
+                # Only failures that say the site is struggling count towards
+                # the breaker; a 404 for a deleted item is not one of them
+                if is_retryable(kind):
+                    self.breaker.record(False)
+                if not is_retryable(kind) or attempt >= self.policy.max_attempts or not self.budget.take():
+                    self.gave_up += 1
+                    raise
+                delay = self.policy.delay(attempt)
+                print(f"   ↻ Retrying {description} in {delay:.1f}s after {kind} (attempt {attempt + 1}/{self.policy.max_attempts})")
+                self.retries += 1
+                self.backoff_seconds += delay
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self.breaker.record(True)
+            return result
+
+    def print_summary(self):
+        errors = ", ".join(f"{k}={v}" for k, v in sorted(self.errors.items())) or "none"
+        print("🔁 Retries:")
+        print(
+            f"   Navigations: {self.calls}, retries: {self.retries} "
+            f"(budget {self.budget.used}/{self.budget.retries}), gave up: {self.gave_up}, "
+            f"backoff: {self.backoff_seconds:.1f}s"
+        )
+        print(f"   Errors: {errors}")
+        if self.breaker.trips:
+            print(f"   Circuit breaker trips: {self.breaker.trips} ({self.breaker.paused_seconds:.0f}s paused)")
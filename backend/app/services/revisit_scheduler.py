@@ -0,0 +1,142 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from app.services.crawl_frontier import DONE, PENDING
+
+# Changes to these fields make a product due sooner; edits to anything else
+# (description, image, ...) are recorded but do not count
+VOLATILE_FIELDS = ['price', 'like_count']
+
+
+@dataclass
+class RevisitPolicy:
+    """How long a scraped product stays fresh before it is due again.
+
+    The interval starts at base_hours and is shortened for products near the
+    top of the ranking and for products whose price or like count changed
+    recently, and lengthened for products that have not changed in a while
+    or have dropped out of the ranking.
+    """
+    base_hours: float = 24
+    min_hours: float = 1
+    max_hours: float = 168
+    # Ranks below this are "hot"; rank 0 gets a quarter of the base interval
+    hot_rank: int = 20
+    # Window for counting changes and for trusting a recorded rank
+    window_days: float = 7
+
+    @classmethod
+    def from_settings(cls, settings) -> 'RevisitPolicy':
+        return cls(
+            base_hours=settings.SCRAPER_REVISIT_BASE_HOURS,
+            min_hours=settings.SCRAPER_REVISIT_MIN_HOURS,
+            max_hours=settings.SCRAPER_REVISIT_MAX_HOURS,
+            hot_rank=settings.SCRAPER_REVISIT_HOT_RANK,
+            window_days=settings.SCRAPER_REVISIT_WINDOW_DAYS,
+        )
+
+    def interval(
+        self,
+        now: datetime,
+        rank: Optional[int] = None,
+        rank_seen_at: Optional[datetime] = None,
+        updated_at: Optional[datetime] = None,
+        changes: int = 0,
+    ) -> timedelta:
+        window = timedelta(days=self.window_days)
+        hours = self.base_hours
+        if rank is not None and rank_seen_at is not None and now - rank_seen_at <= window:
+            hours *= min(1.0, max(0.25, (rank + 1) / self.hot_rank))
+        else:
+            hours *= 2
+        # Each recent price/like change halves, thirds, ... the interval
+        hours /= 1 + changes
+        if changes == 0 and updated_at is not None and now - updated_at > window:
+            hours *= 2
+        return timedelta(hours=min(self.max_hours, max(self.min_hours, hours)))
+
+
+class RevisitScheduler:
+    """Computes when each scraped URL in the crawl frontier is next due"""
+
+    def __init__(self, policy: RevisitPolicy, frontier_collection, products_collection, changes_collection=None):
+        self.policy = policy
+        self.frontier_collection = frontier_collection
+        self.products_collection = products_collection
+        self.changes_collection = changes_collection
+
+    async def load(self, urls: List[str], now: datetime) -> Dict[str, dict]:
+        """Rank, last change and recent price/like change count for each URL"""
+        info = {url: {'rank': None, 'rank_seen_at': None, 'updated_at': None, 'changes': 0} for url in urls}
+        if not urls:
+            return info
+        async for doc in self.frontier_collection.find(
+            {'url': {'$in': urls}}, {'url': 1, 'rank': 1, 'rank_seen_at': 1, 'completed_at': 1}
+        ):
+            info[doc['url']].update(
+                rank=doc.get('rank'), rank_seen_at=doc.get('rank_seen_at'), completed_at=doc.get('completed_at')
+            )
+        async for doc in self.products_collection.find({'url': {'$in': urls}}, {'url': 1, 'updated_at': 1}):
+            info[doc['url']]['updated_at'] = doc.get('updated_at')
+        if self.changes_collection is not None:
+            since = now - timedelta(days=self.policy.window_days)
+            async for row in self.changes_collection.aggregate([
+                {'$match': {
+                    'url': {'$in': urls},
+                    'changed_at': {'$gte': since},
+                    'fields': {'$in': VOLATILE_FIELDS},
+                }},
+                {'$group': {'_id': '$url', 'count': {'$sum': 1}}},
+            ]):
+                info[row['_id']]['changes'] = row['count']
+        return info
+
+    def next_due(self, last_scraped: datetime, now: datetime, info: dict) -> datetime:
+        return last_scraped + self.policy.interval(
+            now, info['rank'], info['rank_seen_at'], info['updated_at'], info['changes']
+        )
+
+    async def schedule(self, urls: Iterable[str], now: datetime = None) -> Dict[str, datetime]:
+        """Next due time for URLs that were just scraped"""
+        now = now or datetime.utcnow()
+        info = await self.load(list(urls), now)
+        return {url: self.next_due(now, now, url_info) for url, url_info in info.items()}
+
+    async def dry_run(self, now: datetime = None, horizon_hours: float = 24, chunk_size: int = 1000) -> dict:
+        """Count the fetches this policy would make, without changing anything.
+
+        Due times are recomputed from each URL's last completed scrape, so a
+        candidate policy can be compared against the stored schedule.
+        """
+        now = now or datetime.utcnow()
+        horizon = now + timedelta(hours=horizon_hours)
+        report = {
+            'total': await self.frontier_collection.count_documents({}),
+            'new': await self.frontier_collection.count_documents({'state': PENDING}),
+            'due_now': 0,
+            'due_in_horizon': 0,
+            'hot_due_in_horizon': 0,
+            'horizon_hours': horizon_hours,
+        }
+        batch = []
+        async for doc in self.frontier_collection.find({'state': DONE}, {'url': 1}):
+            batch.append(doc['url'])
+            if len(batch) >= chunk_size:
+                await self._count_due(batch, now, horizon, report)
+                batch = []
+        if batch:
+            await self._count_due(batch, now, horizon, report)
+        return report
+
+    async def _count_due(self, urls: List[str], now: datetime, horizon: datetime, report: dict):
+        info = await self.load(urls, now)
+        for url_info in info.values():
+            last_scraped = url_info.get('completed_at')
+            due = self.next_due(last_scraped, now, url_info) if last_scraped else now
+            if due <= now:
+                report['due_now'] += 1
+            if due <= horizon:
+                report['due_in_horizon'] += 1
+                if url_info['rank'] is not None and url_info['rank'] < self.policy.hot_rank:
+                    report['hot_due_in_horizon'] += 1
@@ -0,0 +1,309 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import AsyncIterable, Callable, Dict, List, Optional
+
+from app.services.retry_policy import classify_error, is_retryable
+
+# Sentinel that tells the writer to flush whatever it has buffered
+FLUSH = object()
+
+
+@dataclass
+class PipelineStats:
+    """Per-run counters for the streaming scrape pipeline"""
+    discovered: int = 0
+    fetched: int = 0
+    parsed: int = 0
+    scraped: int = 0
+    failed: int = 0
+    retried: int = 0
+    escalated: int = 0
+    written: int = 0
+    batches: int = 0
+    write_errors: int = 0
+    peak_depth: Dict[str, int] = field(default_factory=dict)
+
+    def print_summary(self):
+        """Print stage throughput and the deepest each queue got"""
+        print("🚰 Pipeline:")
+        print(
+            f"   Discovered {self.discovered} → fetched {self.fetched} → parsed {self.parsed} "
+            f"→ valid {self.scraped} → written {self.written} in {self.batches} batches"
+        )
+        if self.escalated:
+            print(f"   Escalated to browser: {self.escalated}")
+        if self.retried:
+            print(f"   Re-queued after transient failures: {self.retried}")
+        if self.write_errors:
+            print(f"   Failed write batches: {self.write_errors}")
+        depths = ", ".join(f"{name}={depth}" for name, depth in self.peak_depth.items())
+        print(f"   Peak queue depth: {depths}")
+
+
+class ScrapePipeline:
+    """Streaming discovery → fetch → parse → validate → write pipeline.
+
+    Stages run as worker tasks connected by bounded asyncio queues, so a slow
+    stage applies backpressure upstream and at most a few pages of HTML are
+    held in memory at once, whatever the limit. Valid products are written to
+    MongoDB in small batches while the crawl is still running. With a crawl
+    frontier, URLs are marked done once their product is written and failed
+    (or returned to pending for another attempt) when extraction fails.
+
+    In http mode, pages that fail to fetch or validate are sent back to the
+    browser fetchers through the escalation queue. That queue is unbounded:
+    it feeds a cycle (validate → fetch) that would deadlock if it could block,
+    and it only ever holds URLs.
+
+    Browser fetches that fail with a transient error (timeout, network error,
+    429/5xx) are re-queued to the browser fetchers after a jittered backoff,
+    up to url_retries times per URL while the run's retry budget lasts.
+    The run ends once every discovered URL has been written or has failed
+    for good.
+    """
+
+    def __init__(
+        self,
+        scraper,
+        fetch_mode: str = 'browser',
+        queue_size: int = 16,
+        write_batch_size: int = 20,
+        flush_seconds: float = 5.0,
+        frontier=None,
+        on_scraped: Callable[[str], None] = None,
+        url_retries: int = 0,
+    ):
+        self.scraper = scraper
+        self.frontier = frontier
+        self.on_scraped = on_scraped
+        self.fetch_mode = fetch_mode
+        self.queue_size = max(1, queue_size)
+        self.write_batch_size = max(1, write_batch_size)
+        self.flush_seconds = flush_seconds
+        self.url_retries = url_retries
+        self.retry_counts: Dict[str, int] = {}
+        self.retry_tasks = set()
+        # URLs discovered but not yet written or failed for good
+        self.outstanding = 0
+        self.discovery_done = False
+        self.idle = asyncio.Event()
+        self.stats = PipelineStats()
+
+    async def run(self, urls: AsyncIterable[str]) -> PipelineStats:
+        """Feed discovered URLs through the pipeline until every stage drains"""
+        self.url_queue = asyncio.Queue(self.queue_size)
+        self.page_queue = asyncio.Queue(self.queue_size)
+        self.parsed_queue = asyncio.Queue(self.queue_size)
+        self.product_queue = asyncio.Queue(self.write_batch_size * 2)
+        self.escalation_queue = asyncio.Queue()
+
+        workers = []
+        if self.fetch_mode == 'http':
+            browser_queue = self.escalation_queue
+            workers += [
+                asyncio.create_task(self.http_fetch_worker())
+                for _ in range(self.scraper.http_fetcher.max_connections)
+            ]
+        else:
+            browser_queue = self.url_queue
+        self.browser_queue = browser_queue
+        workers += [
+            asyncio.create_task(self.browser_fetch_worker(browser_queue))
+            for _ in range(self.scraper.concurrency)
+        ]
+        parse_workers = self.scraper.parse_workers if self.scraper.parse_pool else 1
+        workers += [asyncio.create_task(self.parse_worker()) for _ in range(parse_workers)]
+        workers.append(asyncio.create_task(self.validate_worker()))
+        workers.append(asyncio.create_task(self.write_worker()))
+
+        try:
+            async for url in urls:
+                self.outstanding += 1
+                self.stats.discovered += 1
+                await self.put('urls', self.url_queue, url)
+            self.discovery_done = True
+            self.settle()
+            # Escalations and retries loop URLs back upstream, so wait until
+            # every URL has settled rather than joining the queues in order
+            await self.idle.wait()
+            await self.product_queue.put(FLUSH)
+            await self.product_queue.join()
+        finally:
+            for task in [*workers, *self.retry_tasks]:
+                task.cancel()
+            await asyncio.gather(*workers, *self.retry_tasks, return_exceptions=True)
+        return self.stats
+
+    def settle(self, url: str = None):
+        """Mark a URL as finished (written or failed for good)"""
+        if url is not None:
+            self.outstanding -= 1
+        if self.discovery_done and self.outstanding <= 0:
+            self.idle.set()
+
+    async def put(self, name: str, queue: asyncio.Queue, item):
+        await queue.put(item)
+        depth = queue.qsize()
+        if depth > self.stats.peak_depth.get(name, 0):
+            self.stats.peak_depth[name] = depth
+
+    async def fail(self, url: str, reason: str, worker_id: Optional[int] = None, kind: str = None):
+        if kind is not None and is_retryable(kind) and self.retry(url):
+            return
+        self.stats.failed += 1
+        if worker_id is not None:
+            failures = self.scraper.worker_failures
+            failures[worker_id] = failures.get(worker_id, 0) + 1
+        if self.frontier is not None:
+            try:
+                await self.frontier.fail(url, reason, permanent=kind == 'client')
+            except Exception as e:
+                print(f"   Warning: Could not update frontier for {url}: {e}")
+        self.settle(url)
+
+    def retry(self, url: str) -> bool:
+        """Re-queue a URL to the browser fetchers after a backoff, if allowed"""
+        attempt = self.retry_counts.get(url, 0) + 1
+        if attempt > self.url_retries or not self.scraper.retrier.budget.take():
+            return False
+        self.retry_counts[url] = attempt
+        self.stats.retried += 1
+        delay = self.scraper.retrier.policy.delay(attempt)
+        print(f"   ↻ Re-queueing {url} in {delay:.1f}s (retry {attempt}/{self.url_retries})")
+        task = asyncio.create_task(self.requeue(url, delay))
+        self.retry_tasks.add(task)
+        task.add_done_callback(self.retry_tasks.discard)
+        return True
+
+    async def requeue(self, url: str, delay: float):
+        await asyncio.sleep(delay)
+        await self.put('retries', self.browser_queue, url)
+
+    def escalate(self, url: str):
+        self.stats.escalated += 1
+        self.scraper.http_fetcher.stats.escalated += 1
+        print(f"   ↪️  Escalating to browser: {url}")
+        self.escalation_queue.put_nowait(url)
+
+    async def http_fetch_worker(self):
+        """Fetch stage over the pooled HTTP client"""
+        while True:
+            url = await self.url_queue.get()
+            try:
+                html = await self.scraper.fetch_html_over_http(url)
+                if html is None:
+                    self.escalate(url)
+                else:
+                    self.stats.fetched += 1
+                    await self.put('pages', self.page_queue, (url, html, 'http', None))
+            except Exception as e:
+                print(f"❌ Error fetching {url}: {e}")
+                self.escalate(url)
+            finally:
+                self.url_queue.task_done()
+
+    async def browser_fetch_worker(self, queue: asyncio.Queue):
+        """Fetch stage on a browser page leased for the whole run"""
+        worker_id, page = await self.scraper.page_pool.get()
+        try:
+            while True:
+                url = await queue.get()
+                try:
+                    html = await self.scraper.fetch_html_with_browser(url, page)
+                    self.stats.fetched += 1
+                    await self.put('pages', self.page_queue, (url, html, 'browser', worker_id))
+                except Exception as e:
+                    print(f"❌ Error fetching {url}: {e}")
+                    await self.fail(url, f"fetch error: {e}", worker_id, classify_error(e))
+                finally:
+                    queue.task_done()
+                # Between URLs nothing is in flight, so the context can be swapped
+                page = await self.scraper.recycle_worker_page(worker_id, page)
+        finally:
+            self.scraper.page_pool.put_nowait((worker_id, page))
+
+    async def parse_worker(self):
+        """Parse stage; the CPU work runs in the scraper's process pool"""
+        while True:
+            url, html, via, worker_id = await self.page_queue.get()
+            try:
+                result = await self.scraper.parse_page(html, url)
+                self.stats.parsed += 1
+                await self.put('parsed', self.parsed_queue, (url, result, via, worker_id))
+            except Exception as e:
+                print(f"❌ Error parsing {url}: {e}")
+                await self.fail(url, f"parse error: {e}", worker_id)
+            finally:
+                self.page_queue.task_done()
+
+    async def validate_worker(self):
+        """Validate stage; invalid HTTP pages are retried in the browser"""
+        while True:
+            url, result, via, worker_id = await self.parsed_queue.get()
+            try:
+                product = self.scraper.validate_product(result, url)
+                if via == 'browser':
+                    # HTTP pages fail validation by design when the product is
+                    # rendered client-side, so only browser pages count here
+                    self.scraper.rate_limiter.record_validation(product is not None)
+                if product is not None:
+                    self.stats.scraped += 1
+                    if self.on_scraped:
+                        self.on_scraped(url)
+                    print(f"   ✓ {product.name[:50]}... - {product.price_text}")
+                    print(f"     Category: {product.category or 'N/A'}")
+                    print(f"     Seller: {product.seller_name or 'N/A'}")
+                    await self.put('products', self.product_queue, (url, product))
+                    self.settle(url)
+                elif via == 'http':
+                    self.escalate(url)
+                else:
+                    await self.fail(url, 'validation failed', worker_id)
+                    print("   ✗ Failed to extract valid data")
+            except Exception as e:
+                print(f"❌ Error validating {url}: {e}")
+                await self.fail(url, f"validation error: {e}", worker_id)
+            finally:
+                self.parsed_queue.task_done()
+
+    async def write_worker(self):
+        """Writer stage: flush when the batch is full, stale, or the run is draining"""
+        loop = asyncio.get_running_loop()
+        batch: List = []
+        deadline = None
+        while True:
+            timeout = max(0, deadline - loop.time()) if batch else None
+            try:
+                item = await asyncio.wait_for(self.product_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                await self.flush(batch)
+                batch = []
+                continue
+            if item is FLUSH:
+                await self.flush(batch)
+                batch = []
+                self.product_queue.task_done()
+                continue
+            batch.append(item)
+            if len(batch) == 1:
+                deadline = loop.time() + self.flush_seconds
+            if len(batch) >= self.write_batch_size:
+                await self.flush(batch)
+                batch = []
+
+    async def flush(self, batch: List):
+        if not batch:
+            return
+        try:
+            await self.scraper.save_products_to_mongodb([product for _, product in batch])
+            if self.scraper.products_collection is not None:
+                self.stats.written += len(batch)
+                self.stats.batches += 1
+            if self.frontier is not None:
+                await self.frontier.complete(url for url, _ in batch)
+        except Exception:
+            # save_products_to_mongodb already reported the error; keep crawling
+            self.stats.write_errors += 1
+        finally:
+            for _ in batch:
+                self.product_queue.task_done()
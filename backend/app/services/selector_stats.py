@@ -0,0 +1,154 @@
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+
+class SelectorStats:
+    """Per-selector hit/miss counters for the DOM fallback chains.
+
+    Counters are keyed by (field, selector) and persist between runs, either
+    in a Mongo collection or in a local JSON file. The chains are ordered
+    from specific to broad, and a broad selector "hits" on nearly every page
+    whether or not it finds the right element, so hit rate says nothing
+    about correctness: order() keeps the hand-written order and only moves
+    selectors that keep missing (see dead_selectors()) to the back.
+    """
+
+    # Pseudo-evaluations that pull a selector's displayed score toward its prior
+    PRIOR_WEIGHT = 5
+
+    def __init__(self, collection=None, path: Optional[str] = None, decay: float = 0.9):
+        self.collection = collection
+        self.path = path
+        self.decay = decay
+        self.counters: Dict[Tuple[str, str], dict] = {}
+        self.dirty = set()
+
+    def _counter(self, field: str, selector: str) -> dict:
+        key = (field, selector)
+        if key not in self.counters:
+            self.counters[key] = {'hits': 0.0, 'misses': 0.0, 'last_hit_at': None}
+        return self.counters[key]
+
+    def record(self, outcomes: Iterable[Tuple[str, str, bool]]):
+        """Record (field, selector, hit) outcomes from one parsed page"""
+        for field, selector, hit in outcomes:
+            counter = self._counter(field, selector)
+            if hit:
+                counter['hits'] += 1
+                counter['last_hit_at'] = datetime.utcnow()
+            else:
+                counter['misses'] += 1
+            self.dirty.add((field, selector))
+
+    def start_run(self):
+        """Decay old counts so the ordering follows markup changes"""
+        for key, counter in self.counters.items():
+            counter['hits'] *= self.decay
+            counter['misses'] *= self.decay
+            self.dirty.add(key)
+
+    def score(self, field: str, selector: str, prior: float = 0.5) -> float:
+        """Smoothed hit rate of a selector"""
+        counter = self.counters.get((field, selector))
+        if counter is None:
+            return prior
+        evaluations = counter['hits'] + counter['misses']
+        return (counter['hits'] + prior * self.PRIOR_WEIGHT) / (evaluations + self.PRIOR_WEIGHT)
+
+    def order(self, chains: Dict[str, List[str]], min_evaluations: int = 20) -> Dict[str, List[str]]:
+        """Move dead selectors to the end of each chain, keeping the order otherwise.
+
+        A dead selector never matched, so evaluating it last cannot change
+        the result of a chain; decay lets it come back once it has not been
+        evaluated for a while.
+        """
+        dead = {(field, selector) for field, selector, _ in self.dead_selectors(min_evaluations)}
+        ordered = {}
+        for field, selectors in chains.items():
+            live = [selector for selector in selectors if (field, selector) not in dead]
+            ordered[field] = live + [selector for selector in selectors if (field, selector) in dead]
+        return ordered
+
+    def dead_selectors(self, min_evaluations: int = 20) -> List[Tuple[str, str, dict]]:
+        """Selectors evaluated at least min_evaluations times without a hit"""
+        dead = []
+        for (field, selector), counter in sorted(self.counters.items()):
+            if counter['hits'] < 0.5 and counter['misses'] >= min_evaluations:
+                dead.append((field, selector, counter))
+        return dead
+
+    async def load(self):
+        """Load counters from Mongo or the local file"""
+        self.counters = {}
+        self.dirty = set()
+        if self.collection is not None:
+            async for doc in self.collection.find({}):
+                self.counters[(doc['field'], doc['selector'])] = {
+                    'hits': doc.get('hits', 0.0),
+                    'misses': doc.get('misses', 0.0),
+                    'last_hit_at': doc.get('last_hit_at'),
+                }
+        elif self.path and os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                for doc in json.load(f):
+                    last_hit_at = doc.get('last_hit_at')
+                    self.counters[(doc['field'], doc['selector'])] = {
+                        'hits': doc.get('hits', 0.0),
+                        'misses': doc.get('misses', 0.0),
+                        'last_hit_at': datetime.fromisoformat(last_hit_at) if last_hit_at else None,
+                    }
+
+    async def save(self):
+        """Persist counters changed since the last load or save"""
+        if self.collection is not None:
+            requests = [
+                UpdateOne(
+                    {'field': field, 'selector': selector},
+                    {'$set': dict(self.counters[(field, selector)])},
+                    upsert=True,
+                )
+                for field, selector in sorted(self.dirty)
+            ]
+            if requests:
+                await self.collection.bulk_write(requests, ordered=False)
+        elif self.path:
+            docs = [
+                {
+                    'field': field,
+                    'selector': selector,
+                    'hits': counter['hits'],
+                    'misses': counter['misses'],
+                    'last_hit_at': counter['last_hit_at'].isoformat() if counter['last_hit_at'] else None,
+                }
+                for (field, selector), counter in sorted(self.counters.items())
+            ]
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(docs, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        self.dirty = set()
+
+    def print_summary(self, chains: Dict[str, List[str]] = None, min_evaluations: int = 20):
+        """Print the leading selectors of each chain and any dead selectors"""
+        if chains:
+            print("🎯 Selector order (score, hits/evaluations):")
+            for field, selectors in chains.items():
+                head = []
+                for selector in selectors[:3]:
+                    counter = self.counters.get((field, selector), {'hits': 0, 'misses': 0})
+                    evaluations = counter['hits'] + counter['misses']
+                    head.append(
+                        f"{selector} ({self.score(field, selector):.2f}, "
+                        f"{counter['hits']:.0f}/{evaluations:.0f})"
+                    )
+                print(f"   {field}: {' > '.join(head)}")
+        dead = self.dead_selectors(min_evaluations)
+        if dead:
+            print(f"💀 {len(dead)} selectors with no hits in their last {min_evaluations}+ evaluations:")
+            for field, selector, counter in dead:
+                last_hit = counter['last_hit_at'].strftime('%Y-%m-%d') if counter['last_hit_at'] else 'never'
+                print(f"   {field}: {selector} (last hit: {last_hit})")
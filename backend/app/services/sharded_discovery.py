@@ -0,0 +1,133 @@
+import asyncio
+import math
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class ShardStats:
+    """Discovery and scrape counts for one entry point"""
+    entry_url: str
+    found: int = 0
+    admitted: int = 0
+    scraped: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+class ShardedDiscovery:
+    """Collect product URLs from several listing pages concurrently.
+
+    Entry points are dealt round-robin to collector tasks, each driving its
+    own browser page. All collectors share one dedupe set, so a product
+    listed on several pages is only emitted by the first shard to find it,
+    and each entry point gets an equal share of the limit. Batches are
+    merged into a single stream tagged with their entry point and the rank
+    of their first URL within that listing.
+
+    With an admit hook, each batch is passed to admit(batch, start_rank)
+    before it is queued, and only the URLs it reports as worth scraping
+    count towards the quotas and the limit; listings are read past URLs
+    that are already up to date.
+    """
+
+    def __init__(
+        self,
+        scraper,
+        entry_urls: List[str],
+        pages: list,
+        limit: int,
+        admit: Optional[Callable[[List[str], int], Awaitable[int]]] = None,
+    ):
+        self.scraper = scraper
+        self.entry_urls = list(dict.fromkeys(entry_urls))
+        self.pages = pages[:max(1, min(len(pages), len(self.entry_urls)))]
+        self.limit = limit
+        self.quota = math.ceil(limit / max(1, len(self.entry_urls)))
+        self.admit = admit
+        self.admitted = 0
+        self.seen = set()
+        self.shards: Dict[str, ShardStats] = {url: ShardStats(url) for url in self.entry_urls}
+        self.url_shards: Dict[str, str] = {}
+        self.started = time.monotonic()
+
+    async def run_collector(self, page, entry_urls: List[str], queue: asyncio.Queue):
+        for entry_url in entry_urls:
+            if self.admitted >= self.limit:
+                break
+            shard = self.shards[entry_url]
+            start = time.monotonic()
+            if self.admit is None:
+                listing = self.scraper.iter_listing_urls(
+                    entry_url, self.quota, page=page, seen=self.seen, total_limit=self.limit
+                )
+            else:
+                # Only admitted URLs count, so the quotas are enforced here
+                listing = self.scraper.iter_listing_urls(entry_url, None, page=page, seen=self.seen)
+            try:
+                async for batch in listing:
+                    # Fixed before the batch is queued: found keeps growing while it waits
+                    start_rank = shard.found
+                    shard.found += len(batch)
+                    admitted = len(batch) if self.admit is None else await self.admit(batch, start_rank)
+                    shard.admitted += admitted
+                    self.admitted += admitted
+                    for url in batch:
+                        self.url_shards[url] = entry_url
+                    await queue.put((entry_url, start_rank, batch))
+                    if shard.admitted >= self.quota or self.admitted >= self.limit:
+                        break
+            except Exception as e:
+                shard.error = str(e)
+                print(f"⚠️ Collector for {entry_url} failed: {e}")
+            finally:
+                await listing.aclose()
+                shard.seconds += time.monotonic() - start
+
+    async def batches(self) -> AsyncIterator[Tuple[str, int, List[str]]]:
+        """Yield (entry_url, start_rank, urls) batches as the collectors find them"""
+        queue = asyncio.Queue(len(self.pages) * 2)
+        assignments = [self.entry_urls[i::len(self.pages)] for i in range(len(self.pages))]
+        collectors = [
+            asyncio.create_task(self.run_collector(page, entries, queue))
+            for page, entries in zip(self.pages, assignments)
+        ]
+        done = asyncio.gather(*collectors)
+        try:
+            while True:
+                getter = asyncio.ensure_future(queue.get())
+                finished, _ = await asyncio.wait({getter, done}, return_when=asyncio.FIRST_COMPLETED)
+                if getter in finished:
+                    yield getter.result()
+                    continue
+                getter.cancel()
+                while not queue.empty():
+                    yield queue.get_nowait()
+                break
+        finally:
+            for collector in collectors:
+                collector.cancel()
+            await asyncio.gather(*collectors, return_exceptions=True)
+
+    def record_product(self, url: str):
+        """Count a scraped product towards the shard that discovered it"""
+        entry_url = self.url_shards.get(url)
+        if entry_url is not None:
+            self.shards[entry_url].scraped += 1
+
+    def print_summary(self):
+        """Print per-shard discovery and scrape throughput"""
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        print(f"🧭 Shards ({len(self.shards)} entry points, {len(self.pages)} collectors):")
+        for shard in self.shards.values():
+            discovery_rate = shard.found / shard.seconds * 60 if shard.seconds else 0.0
+            line = (
+                f"   {shard.entry_url}: {shard.found} URLs ({discovery_rate:.0f}/min), "
+                f"{shard.scraped} products ({shard.scraped / elapsed * 60:.1f}/min)"
+            )
+            if self.admit is not None:
+                line += f", {shard.admitted} due"
+            if shard.error:
+                line += f" - error: {shard.error}"
+            print(line)
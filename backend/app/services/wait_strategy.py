@@ -0,0 +1,201 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Return the pct-th percentile of values using nearest-rank"""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+class ReadinessTracker:
+    """Rolling window of observed readiness latencies per wait key.
+
+    A sample of None records a wait that hit its timeout.
+    """
+
+    def __init__(self, window: int = 50):
+        self.window = window
+        self.samples: Dict[str, Deque[Optional[float]]] = {}
+
+    def record(self, key: str, latency_ms: Optional[float]):
+        """Record a readiness latency, or None for a timeout"""
+        if key not in self.samples:
+            self.samples[key] = deque(maxlen=self.window)
+        self.samples[key].append(latency_ms)
+
+    def resolve_miss(self, key: str, latency_ms: float):
+        """Replace the latest timeout for key with the latency seen once the wait was repeated"""
+        samples = self.samples.get(key)
+        if samples is None or None not in samples:
+            self.record(key, latency_ms)
+            return
+        del samples[len(samples) - 1 - list(reversed(samples)).index(None)]
+        samples.append(latency_ms)
+
+    def hits(self, key: str) -> List[float]:
+        return [s for s in self.samples.get(key, ()) if s is not None]
+
+    def misses(self, key: str) -> int:
+        return sum(1 for s in self.samples.get(key, ()) if s is None)
+
+    def percentile(self, key: str, pct: float) -> Optional[float]:
+        hits = self.hits(key)
+        return percentile(hits, pct) if hits else None
+
+
+class WaitStrategy:
+    """Readiness-driven waits with timeouts tuned from observed latencies.
+
+    Timeouts start at the given default, then follow the rolling percentile
+    of successful waits times a headroom factor. Keys that only ever time
+    out drop to the minimum timeout so dead selectors stop holding pages up.
+    """
+
+    # Floor for tuned navigation timeouts
+    GOTO_MIN_TIMEOUT_MS = 5000
+
+    def __init__(
+        self,
+        pct: float = 95,
+        headroom: float = 1.5,
+        min_timeout_ms: int = 500,
+        window: int = 50,
+    ):
+        self.pct = pct
+        self.headroom = headroom
+        self.min_timeout_ms = min_timeout_ms
+        self.tracker = ReadinessTracker(window)
+
+    def timeout_for(self, key: str, default_ms: int, min_ms: int = None) -> int:
+        """Tuned timeout for a wait key, never above default_ms"""
+        min_ms = min_ms if min_ms is not None else self.min_timeout_ms
+        if not self.tracker.samples.get(key):
+            return default_ms
+        observed = self.tracker.percentile(key, self.pct)
+        if observed is None:
+            return min_ms
+        return int(max(min_ms, min(default_ms, observed * self.headroom)))
+
+    @staticmethod
+    def _remaining_ms(deadline: Optional[float]) -> Optional[float]:
+        if deadline is None:
+            return None
+        return max(0, (deadline - time.monotonic()) * 1000)
+
+    def _bounded(self, timeout_ms: float, deadline: Optional[float]) -> float:
+        remaining = self._remaining_ms(deadline)
+        return timeout_ms if remaining is None else min(timeout_ms, remaining)
+
+    @staticmethod
+    def deadline_in(ms: int) -> float:
+        """Absolute deadline ms milliseconds from now"""
+        return time.monotonic() + ms / 1000
+
+    def goto_timeout(self, key: str, default_ms: int) -> int:
+        """Timeout goto() will use for key"""
+        return self.timeout_for(key, default_ms, self.GOTO_MIN_TIMEOUT_MS)
+
+    async def goto(self, page, url: str, key: str, default_ms: int):
+        """Navigate until DOMContentLoaded with a tuned timeout"""
+        timeout = self.goto_timeout(key, default_ms)
+        start = time.monotonic()
+        try:
+            response = await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+        except Exception:
+            self.tracker.record(key, None)
+            raise
+        self.tracker.record(key, (time.monotonic() - start) * 1000)
+        return response
+
+    async def goto_fallback(self, page, url: str, key: str, timeout_ms: int):
+        """Repeat a goto() that timed out under a learned timeout, with the full timeout.
+
+        On success the timeout goto() recorded is replaced by the real
+        latency, so learned timeouts are not tuned on censored samples.
+        """
+        start = time.monotonic()
+        response = await page.goto(url, wait_until="domcontentloaded", timeout=timeout_ms)
+        self.tracker.resolve_miss(key, (time.monotonic() - start) * 1000)
+        return response
+
+    async def wait_for_selectors(
+        self,
+        page,
+        key: str,
+        selectors: Iterable[str],
+        default_ms: int,
+        deadline: float = None,
+    ) -> bool:
+        """Wait until any of the selectors is attached to the DOM"""
+        selector = ", ".join(s for s in selectors if s and ':contains(' not in s)
+        if not selector:
+            return False
+        timeout = self._bounded(self.timeout_for(key, default_ms), deadline)
+        if timeout <= 0:
+            return False
+        start = time.monotonic()
+        try:
+            await page.wait_for_selector(selector, state="attached", timeout=timeout)
+        except Exception:
+            self.tracker.record(key, None)
+            return False
+        self.tracker.record(key, (time.monotonic() - start) * 1000)
+        return True
+
+    async def wait_for_fields(
+        self,
+        page,
+        fields: Dict[str, List[str]],
+        default_ms: int,
+        deadline: float = None,
+    ) -> Dict[str, bool]:
+        """Wait concurrently for the selectors each field extractor needs"""
+        names = list(fields)
+        results = await asyncio.gather(*(
+            self.wait_for_selectors(page, f"field:{name}", fields[name], default_ms, deadline)
+            for name in names
+        ))
+        return dict(zip(names, results))
+
+    async def wait_for_growth(
+        self,
+        page,
+        key: str,
+        selector: str,
+        previous_count: int,
+        default_ms: int,
+        deadline: float = None,
+    ) -> bool:
+        """Wait until more elements match selector than previous_count"""
+        timeout = self._bounded(self.timeout_for(key, default_ms), deadline)
+        if timeout <= 0:
+            return False
+        start = time.monotonic()
+        try:
+            await page.wait_for_function(
+                "([sel, n]) => document.querySelectorAll(sel).length > n",
+                arg=[selector, previous_count],
+                timeout=timeout,
+            )
+        except Exception:
+            self.tracker.record(key, None)
+            return False
+        self.tracker.record(key, (time.monotonic() - start) * 1000)
+        return True
+
+    def print_summary(self):
+        """Print observed readiness latencies per wait key"""
+        print("⏳ Readiness latencies:")
+        for key in sorted(self.tracker.samples):
+            hits = self.tracker.hits(key)
+            misses = self.tracker.misses(key)
+            if hits:
+                p50 = percentile(hits, 50)
+                pct = percentile(hits, self.pct)
+                print(f"   {key}: p50={p50:.0f}ms p{self.pct:g}={pct:.0f}ms timeouts={misses}")
+            else:
+                print(f"   {key}: no hits, timeouts={misses}")
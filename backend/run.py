@@ -3,6 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.db.mongodb import MongoDB
 from app.api.v1 import api_router
+from app.api.v1 import mercari_scraper
 from app.utils.logger import setup_logger
 # import argparse
 logger = setup_logger(__name__)
@@ -33,23 +34,29 @@ app.add_middleware(
         "Access-Control-Request-Method",
         "Access-Control-Request-Headers"
     ],
-    expose_headers=["Content-Type", "Authorization"],
+    expose_headers=["Content-Type", "Authorization", "X-Next-Cursor"],
     max_age=3600,
 )
 
 
 # Include API router
 app.include_router(api_router, prefix=f"/api/v{settings.API_VERSION}")
+app.include_router(mercari_scraper.router, prefix=f"/api/v{settings.API_VERSION}/mercari", tags=["mercari"])
 
 @app.on_event("startup")
 async def startup_db_client():
     """Initialize database connection on startup"""
     await MongoDB.connect_to_database()
     logger.info("Connected to MongoDB")
+    await mercari_scraper.start_browser_pool()
+    await mercari_scraper.start_parse_pool()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
     """Close database connection on shutdown"""
+    await mercari_scraper.cancel_jobs()
+    await mercari_scraper.stop_browser_pool()
+    await mercari_scraper.stop_parse_pool()
     await MongoDB.close_database_connection()
     logger.info("Disconnected from MongoDB")
 
@@ -0,0 +1,97 @@
+import glob
+import os
+
+import pytest
+
+from app.services.html_backends import available_backends
+from app.services.product_parser import ProductParser
+
+PAGES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures', 'pages')
+PAGES = sorted(os.path.basename(path) for path in glob.glob(os.path.join(PAGES_DIR, '*.html')))
+BACKENDS = available_backends()
+URL = 'https://jp.mercari.com/item/m12345678901'
+
+# Values every backend must produce, so a regression shared by all of them
+# is caught too
+EXPECTED_PRODUCTS = {
+    'item_dom.html': {
+        'name': 'ニット カーディガンベージュ',
+        'price': 2480,
+        'image_url': 'https://static.mercdn.net/item/detail/orig/photos/m12345678901_1.jpg',
+        'category': 'レディース',
+        'condition': '目立った傷や汚れなし',
+        'seller_name': 'hanako_closet',
+        'like_count': 37,
+    },
+    'item_next_data.html': {
+        'name': 'ワイヤレスイヤホン ノイズキャンセリング',
+        'price': 8800,
+        'category': 'オーディオ機器',
+        'condition': 'やや傷や汚れあり',
+        'seller_name': 'gadget_taro',
+        'like_count': 14,
+    },
+    'shops_product.html': {
+        'name': 'ハンドクリーム 3本セット',
+        'price': 1980,
+        'image_url': 'https://assets.mercari-shops-static.com/-/large/webp/abc123.jpg',
+        'category': 'コスメ・香水・美容',
+        'seller_name': 'コスメのお店',
+    },
+}
+EXPECTED_LINKS = {
+    'ranking.html': [
+        'https://jp.mercari.com/item/m10000000001',
+        'https://jp.mercari.com/item/m10000000002',
+        'https://jp.mercari.com/shops/product/3XyZabcDEF',
+        'https://jp.mercari.com/item/m10000000004',
+        'https://jp.mercari.com/item/m10000000005',
+    ],
+}
+
+
+def read_page(name: str) -> str:
+    with open(os.path.join(PAGES_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def extract(backend: str, html: str) -> dict:
+    parser = ProductParser(backend)
+    return {
+        'dom_fields': parser.plan.extract(html, parser.PRODUCT_FIELDS),
+        'links': parser.extract_product_links(html),
+        'product': parser.parse_product(html, URL).product,
+    }
+
+
+@pytest.mark.parametrize('name', PAGES)
+def test_backends_agree(name):
+    if len(BACKENDS) < 2:
+        pytest.skip(f"Need at least two installed backends, found: {BACKENDS}")
+    html = read_page(name)
+    reference = extract(BACKENDS[0], html)
+    for backend in BACKENDS[1:]:
+        assert extract(backend, html) == reference, f"{BACKENDS[0]} vs {backend}"
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('name', PAGES)
+def test_plan_matches_reference(backend, name):
+    """The single-pass extraction plan agrees with the selector-by-selector reference"""
+    html = read_page(name)
+    parser = ProductParser(backend)
+    assert parser.plan.extract(html, parser.PRODUCT_FIELDS) == parser.extract_dom_fields(html, parser.PRODUCT_FIELDS)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('name', sorted(EXPECTED_PRODUCTS))
+def test_expected_product(backend, name):
+    product = ProductParser(backend).parse_product(read_page(name), URL).product
+    for field, value in EXPECTED_PRODUCTS[name].items():
+        assert product[field] == value, field
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('name', sorted(EXPECTED_LINKS))
+def test_expected_links(backend, name):
+    assert ProductParser(backend).extract_product_links(read_page(name)) == EXPECTED_LINKS[name]